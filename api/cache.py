@@ -0,0 +1,181 @@
+import os
+import time
+import asyncio
+import threading
+import inspect
+import functools
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, Callable, Hashable, Optional, Tuple
+
+from fastapi import Request, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+CACHE_TTL_SECONDS = float(os.getenv('API_CACHE_TTL_SECONDS', '300'))
+CACHE_MAX_ENTRIES = int(os.getenv('API_CACHE_MAX_ENTRIES', '256'))
+# How often to poll the build-stamp table written by the dbt on-run-end hook
+BUILD_CHECK_SECONDS = float(os.getenv('API_BUILD_CHECK_SECONDS', '10'))
+
+_MISSING = object()
+
+
+class TTLCache:
+    """
+    Thread-safe LRU cache whose entries also expire after `ttl` seconds.
+    """
+
+    def __init__(self, maxsize: int = CACHE_MAX_ENTRIES, ttl: float = CACHE_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class ResponseCache:
+    """
+    Caches endpoint responses until their TTL runs out or the warehouse is
+    rebuilt, whichever happens first.
+
+    The build version is the latest row of `dbt_dev.warehouse_builds`, which
+    the `record_warehouse_build` on-run-end hook appends after every
+    successful `dbt run`/`dbt build`. It doubles as the ETag and
+    Last-Modified of cached responses, so polling clients revalidating an
+    unchanged build get a 304 without a query.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = CACHE_MAX_ENTRIES,
+        ttl: float = CACHE_TTL_SECONDS,
+        build_check_interval: float = BUILD_CHECK_SECONDS,
+    ):
+        self.entries = TTLCache(maxsize=maxsize, ttl=ttl)
+        self.build_check_interval = build_check_interval
+        self.build_version: Optional[str] = None
+        self.built_at: Optional[datetime] = None
+        self._last_build_check = float('-inf')
+        self._lock = asyncio.Lock()
+
+    async def check_build_version(self, db: AsyncSession) -> Optional[str]:
+        """Refresh the known build version at most every `build_check_interval`."""
+        now = time.monotonic()
+        if now - self._last_build_check < self.build_check_interval:
+            return self.build_version
+
+        async with self._lock:
+            if now - self._last_build_check < self.build_check_interval:
+                return self.build_version
+            try:
+                row = (await db.execute(text("""
+                    SELECT invocation_id, built_at
+                    FROM dbt_dev.warehouse_builds
+                    ORDER BY built_at DESC
+                    LIMIT 1
+                """))).first()
+                version, built_at = row if row else (None, None)
+            except Exception:
+                # No build has been stamped yet; fall back to TTL-only caching
+                await db.rollback()
+                version, built_at = None, None
+
+            if version != self.build_version:
+                self.entries.clear()
+                self.build_version = version
+                self.built_at = built_at
+            self._last_build_check = now
+        return self.build_version
+
+    def validators(self) -> dict:
+        """ETag and Last-Modified headers for the current build, if known."""
+        if self.build_version is None:
+            return {}
+        headers = {"ETag": f'"{self.build_version}"', "Cache-Control": "no-cache"}
+        if self.built_at is not None:
+            built_at = self.built_at if self.built_at.tzinfo else self.built_at.replace(tzinfo=timezone.utc)
+            headers["Last-Modified"] = format_datetime(built_at.astimezone(timezone.utc), usegmt=True)
+        return headers
+
+    def is_not_modified(self, request: Request) -> bool:
+        """Whether the client's cached copy matches the current build."""
+        if self.build_version is None:
+            return False
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+            return "*" in tags or f'"{self.build_version}"' in tags
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and self.built_at is not None:
+            try:
+                since = parsedate_to_datetime(if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            built_at = self.built_at if self.built_at.tzinfo else self.built_at.replace(tzinfo=timezone.utc)
+            # HTTP dates have one-second resolution
+            return built_at.replace(microsecond=0) <= since
+        return False
+
+    def cached(self, func: Callable) -> Callable:
+        """
+        Decorate an async endpoint taking a `db` session so its result is cached
+        per combination of the remaining arguments, and answered with a 304
+        when the client already holds the current build's response.
+        """
+
+        @functools.wraps(func)
+        async def wrapper(*args, _cache_request: Request, _cache_response: Response, **kwargs):
+            db = kwargs['db']
+            await self.check_build_version(db)
+
+            validators = self.validators()
+            if self.is_not_modified(_cache_request):
+                return Response(status_code=304, headers=validators)
+            _cache_response.headers.update(validators)
+
+            key = (func.__name__,) + tuple(
+                sorted((name, value) for name, value in kwargs.items() if name != 'db')
+            )
+            value = self.entries.get(key, _MISSING)
+            if value is _MISSING:
+                value = await func(*args, **kwargs)
+                self.entries.set(key, value)
+            return value
+
+        # Expose the request/response to FastAPI alongside the endpoint's own parameters
+        signature = inspect.signature(func)
+        wrapper.__signature__ = signature.replace(parameters=[
+            *signature.parameters.values(),
+            inspect.Parameter("_cache_request", inspect.Parameter.KEYWORD_ONLY, annotation=Request),
+            inspect.Parameter("_cache_response", inspect.Parameter.KEYWORD_ONLY, annotation=Response),
+        ])
+        return wrapper
+
+
+response_cache = ResponseCache()
@@ -1,9 +1,18 @@
-from fastapi import FastAPI, Depends, HTTPException
-from sqlalchemy.orm import Session
+import json
+from datetime import date
+from fastapi import FastAPI, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import text
-from typing import List
-from .database import get_db
-from .schemas import ChannelActivity, TopProduct, MessageResponse, VisualStat
+from typing import List, Literal, Optional
+from .database import engine, get_db
+from .cache import response_cache
+from .pagination import encode_cursor, decode_cursor
+from .metrics import metrics_middleware, metrics_response, record_rows, streamed_rows_recorder
+from .schemas import (
+    ChannelActivity, ChannelTrendPoint, TopProduct, ProductMention, MessageResponse, VisualStat,
+    MessageBatchRequest, MessageWithDetections,
+)
 
 app = FastAPI(
     title="Medical Data Warehouse API",
@@ -11,88 +20,352 @@ app = FastAPI(
     version="1.0.0"
 )
 
+app.middleware("http")(metrics_middleware)
+
 @app.get("/health")
-def health_check():
+async def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """
+    Prometheus metrics: per-route latency, SQL time, row counts and pool waits
+    """
+    return metrics_response()
+
 @app.get("/channels/activity", response_model=List[ChannelActivity])
-def get_channel_activity(db: Session = Depends(get_db)):
+@response_cache.cached
+async def get_channel_activity(db: AsyncSession = Depends(get_db)):
     """
     Get message count per channel
     """
     try:
         query = text("""
-            SELECT c.channel_name, COUNT(m.message_id) as message_count
-            FROM dbt_dev.fct_messages m
-            JOIN dbt_dev.dim_channels c ON m.channel_key = c.channel_key
-            GROUP BY c.channel_name
+            SELECT channel_name, message_count
+            FROM dbt_dev.agg_channel_engagement
             ORDER BY message_count DESC
         """)
-        result = db.execute(query).fetchall()
+        result = (await db.execute(query)).fetchall()
+        record_rows(len(result))
         return [{"channel_name": row[0], "message_count": row[1]} for row in result]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+def _date_key(value: date) -> int:
+    # Matches dim_dates.date_key (YYYYMMDD)
+    return value.year * 10000 + value.month * 100 + value.day
+
+@app.get("/channels/{channel_name}/activity", response_model=List[ChannelTrendPoint])
+@response_cache.cached
+async def get_channel_trend(
+    channel_name: str,
+    from_date: Optional[date] = Query(None, alias="from"),
+    to_date: Optional[date] = Query(None, alias="to"),
+    granularity: Literal["day", "week", "month"] = "day",
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Get message, view and forward totals for one channel per day, week or month.
+
+    The date range is pushed down as a `date_key` range on the daily rollup,
+    so only the requested days of a single channel are read.
+    """
+    if from_date and to_date and from_date > to_date:
+        raise HTTPException(status_code=400, detail="'from' must not be after 'to'")
+
+    params = {
+        "channel_name": channel_name,
+        "granularity": granularity,
+        "from_key": _date_key(from_date) if from_date else 0,
+        "to_key": _date_key(to_date) if to_date else 99991231,
+    }
+    try:
+        query = text("""
+            SELECT date_trunc(:granularity, d.full_date)::date as period_start,
+                   SUM(a.message_count) as message_count,
+                   SUM(a.total_views) as total_views,
+                   SUM(a.total_forwards) as total_forwards
+            FROM dbt_dev.agg_channel_daily_activity a
+            JOIN dbt_dev.dim_channels c ON a.channel_key = c.channel_key
+            JOIN dbt_dev.dim_dates d ON a.date_key = d.date_key
+            WHERE c.channel_name = :channel_name
+              AND a.date_key BETWEEN :from_key AND :to_key
+            GROUP BY 1
+            ORDER BY 1
+        """)
+        result = (await db.execute(query, params)).fetchall()
+        record_rows(len(result))
+        if not result:
+            exists = (await db.execute(
+                text("SELECT 1 FROM dbt_dev.dim_channels WHERE channel_name = :channel_name"),
+                {"channel_name": channel_name}
+            )).first()
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if not result and not exists:
+        raise HTTPException(status_code=404, detail=f"Channel '{channel_name}' not found")
+    return [
+        {
+            "period_start": row[0],
+            "message_count": row[1],
+            "total_views": row[2],
+            "total_forwards": row[3]
+        }
+        for row in result
+    ]
+
 @app.get("/products/top", response_model=List[TopProduct])
-def get_top_products(db: Session = Depends(get_db)):
+@response_cache.cached
+async def get_top_products(db: AsyncSession = Depends(get_db)):
     """
     Get top detected products (heuristic based on YOLO detections)
     """
     try:
         query = text("""
-            SELECT detection_class, COUNT(*) as count
-            FROM dbt_dev.fct_image_detections
+            SELECT detection_class, detection_count
+            FROM dbt_dev.agg_detection_class_counts
             WHERE image_class = 'Product Display'
-            GROUP BY detection_class
-            ORDER BY count DESC
+            ORDER BY detection_count DESC
             LIMIT 10
         """)
-        result = db.execute(query).fetchall()
+        result = (await db.execute(query)).fetchall()
+        record_rows(len(result))
         return [{"product_name": row[0], "count": row[1]} for row in result]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
-@app.get("/messages/search", response_model=List[MessageResponse])
-def search_messages(keyword: str, db: Session = Depends(get_db)):
+@app.get("/products/mentions", response_model=List[ProductMention])
+@response_cache.cached
+async def get_product_mentions(
+    limit: int = Query(10, ge=1, le=100),
+    db: AsyncSession = Depends(get_db)
+):
     """
-    Search messages by keyword
+    Get the most mentioned products from message text, with average quoted price
     """
     try:
         query = text("""
-            SELECT m.message_id, c.channel_name, m.message_text, m.view_count as views, d.full_date
-            FROM dbt_dev.fct_messages m
-            JOIN dbt_dev.dim_channels c ON m.channel_key = c.channel_key
-            JOIN dbt_dev.dim_dates d ON m.date_key = d.date_key
-            WHERE m.message_text ILIKE :keyword
-            LIMIT 50
+            SELECT product_name,
+                   COUNT(*) as mention_count,
+                   COUNT(DISTINCT channel_key) as channel_count,
+                   AVG(price_birr) as avg_price_birr
+            FROM dbt_dev.fct_product_mentions
+            GROUP BY product_name
+            ORDER BY mention_count DESC
+            LIMIT :limit
         """)
-        result = db.execute(query, {"keyword": f"%{keyword}%"}).fetchall()
+        result = (await db.execute(query, {"limit": limit})).fetchall()
+        record_rows(len(result))
         return [
             {
-                "message_id": row[0],
-                "channel_name": row[1],
-                "message_text": row[2],
-                "views": row[3],
-                "message_date": row[4]
+                "product_name": row[0],
+                "mention_count": row[1],
+                "channel_count": row[2],
+                "avg_price_birr": row[3]
             }
             for row in result
         ]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+SEARCH_PAGE_SIZE = 50
+SEARCH_MAX_PAGE_SIZE = 500
+
+# Whitelisted ORDER BY clauses for /messages/search. Only `recent` has a
+# stable, indexed ordering, so it is the only one that supports cursors.
+SEARCH_ORDERINGS = {
+    "relevance": "rank DESC, m.view_count DESC NULLS LAST",
+    "views": "m.view_count DESC NULLS LAST, rank DESC",
+    "recent": "m.message_date DESC, m.message_id DESC, m.channel_key DESC",
+}
+
+def _message_row(row) -> dict:
+    return {
+        "message_id": row[0],
+        "channel_name": row[1],
+        "message_text": row[2],
+        "views": row[3],
+        "message_date": row[4]
+    }
+
+@app.get("/messages/search", response_model=List[MessageResponse])
+async def search_messages(
+    response: Response,
+    keyword: str,
+    sort: Literal["relevance", "views", "recent"] = "relevance",
+    limit: Optional[int] = Query(None, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    format: Literal["json", "ndjson"] = "json",
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    Search messages by keyword.
+
+    Whole words match through the `search_vector` GIN index; partial product
+    names (Amharic or English) match through the trigram index on
+    `message_text`. Results are ranked by relevance, or by views when
+    `sort=views`.
+
+    With `sort=recent` results are paged by keyset on
+    `(message_date, message_id)`: pass the `X-Next-Cursor` header of one page
+    as `cursor` to get the next. `format=ndjson` streams every remaining row
+    (or up to `limit`) from a server-side cursor; headers are sent before the
+    rows, so with `sort=recent` a truncated stream ends with a
+    `{"next_cursor": ...}` line instead.
+    """
+    if cursor and sort != "recent":
+        raise HTTPException(status_code=400, detail="cursor requires sort=recent")
+
+    params = {"keyword": keyword, "pattern": f"%{keyword}%"}
+    keyset = ""
+    if cursor:
+        params.update(decode_cursor(cursor))
+        keyset = "AND (m.message_date, m.message_id, m.channel_key) < (:cursor_date, :cursor_id, :cursor_channel)"
+
+    if format == "ndjson":
+        page_size = limit
+    else:
+        page_size = limit or SEARCH_PAGE_SIZE
+    if page_size:
+        # Fetch one extra row to know whether another page exists
+        params["limit"] = page_size + 1
+
+    query = text(f"""
+        WITH q AS (
+            SELECT websearch_to_tsquery('simple', :keyword) AS tsq
+        )
+        SELECT m.message_id, c.channel_name, m.message_text, m.view_count as views, m.message_date,
+               m.channel_key,
+               ts_rank(m.search_vector, q.tsq) + word_similarity(:keyword, m.message_text) AS rank
+        FROM dbt_dev.fct_messages m
+        CROSS JOIN q
+        JOIN dbt_dev.dim_channels c ON m.channel_key = c.channel_key
+        WHERE (m.search_vector @@ q.tsq OR m.message_text ILIKE :pattern)
+        {keyset}
+        ORDER BY {SEARCH_ORDERINGS[sort]}
+        {"LIMIT :limit" if page_size else ""}
+    """)
+
+    if format == "ndjson":
+        record_streamed_rows = streamed_rows_recorder()
+
+        async def stream_rows():
+            i = 0
+            try:
+                async with engine.connect() as conn:
+                    result = await conn.stream(query, params)
+                    last = None
+                    async for row in result:
+                        if page_size and i == page_size:
+                            if sort == "recent":
+                                yield json.dumps({"next_cursor": encode_cursor(last[4], last[0], last[5])}) + "\n"
+                            break
+                        i += 1
+                        last = row
+                        # Serialized by the response model, exactly like the JSON format's rows
+                        yield MessageResponse(**_message_row(row)).model_dump_json() + "\n"
+            finally:
+                record_streamed_rows(i)
+
+        return StreamingResponse(stream_rows(), media_type="application/x-ndjson")
+
+    try:
+        result = (await db.execute(query, params)).fetchall()
+        record_rows(len(result))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    if len(result) > page_size:
+        result = result[:page_size]
+        if sort == "recent":
+            last = result[-1]
+            response.headers["X-Next-Cursor"] = encode_cursor(last[4], last[0], last[5])
+    return [_message_row(row) for row in result]
+
+MESSAGE_BATCH_MAX = 500
+
+@app.post("/messages/batch", response_model=List[MessageWithDetections])
+async def get_messages_batch(batch: MessageBatchRequest, db: AsyncSession = Depends(get_db)):
+    """
+    Get many messages with their image detections in one call.
+
+    Takes up to MESSAGE_BATCH_MAX `(channel_name, message_id)` pairs and runs
+    one set-based query per table. Unknown pairs are left out; results keep
+    the request order.
+    """
+    if len(batch.messages) > MESSAGE_BATCH_MAX:
+        raise HTTPException(status_code=422, detail=f"At most {MESSAGE_BATCH_MAX} messages per batch")
+
+    keys = list(dict.fromkeys((m.channel_name, m.message_id) for m in batch.messages))
+    if not keys:
+        return []
+    params = {
+        "channel_names": [channel_name for channel_name, _ in keys],
+        "message_ids": [message_id for _, message_id in keys],
+    }
+    keys_cte = """
+        WITH keys AS (
+            SELECT *
+            FROM unnest(CAST(:channel_names AS text[]), CAST(:message_ids AS bigint[])) AS k(channel_name, message_id)
+        )
+    """
+    try:
+        messages = (await db.execute(text(keys_cte + """
+            SELECT m.message_id, m.channel_name, m.message_text, m.view_count, m.forward_count,
+                   m.message_date, m.image_path
+            FROM keys k
+            JOIN dbt_dev.fct_messages m ON m.channel_name = k.channel_name AND m.message_id = k.message_id
+        """), params)).fetchall()
+        detections = (await db.execute(text(keys_cte + """
+            SELECT d.channel_name, d.message_id, d.detection_class, d.confidence, d.image_class
+            FROM keys k
+            JOIN dbt_dev.fct_image_detections d
+              ON d.channel_name = k.channel_name AND d.message_id = k.message_id
+            ORDER BY d.confidence DESC
+        """), params)).fetchall()
+        record_rows(len(messages) + len(detections))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+    detections_by_message = {}
+    for row in detections:
+        detections_by_message.setdefault((row[0], row[1]), []).append({
+            "detection_class": row[2],
+            "confidence": row[3],
+            "image_class": row[4]
+        })
+
+    messages_by_key = {
+        (row[1], row[0]): {
+            "message_id": row[0],
+            "channel_name": row[1],
+            "message_text": row[2],
+            "views": row[3],
+            "forwards": row[4],
+            "message_date": row[5],
+            "image_path": row[6],
+            "detections": detections_by_message.get((row[1], row[0]), [])
+        }
+        for row in messages
+    }
+    return [messages_by_key[key] for key in keys if key in messages_by_key]
+
 @app.get("/visual/stats", response_model=List[VisualStat])
-def get_visual_stats(db: Session = Depends(get_db)):
+@response_cache.cached
+async def get_visual_stats(db: AsyncSession = Depends(get_db)):
     """
     Get statistics on visual content types
     """
     try:
         query = text("""
-            SELECT image_class, COUNT(*) as count
-            FROM dbt_dev.fct_image_detections
+            SELECT image_class, SUM(detection_count) as count
+            FROM dbt_dev.agg_detection_class_counts
             GROUP BY image_class
             ORDER BY count DESC
         """)
-        result = db.execute(query).fetchall()
+        result = (await db.execute(query)).fetchall()
+        record_rows(len(result))
         return [{"category": row[0], "count": row[1]} for row in result]
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
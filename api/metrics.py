@@ -0,0 +1,145 @@
+import os
+import time
+import logging
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from fastapi import Request, Response
+from prometheus_client import CONTENT_TYPE_LATEST, Gauge, Histogram, generate_latest
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+# Log statements slower than this many milliseconds; 0 disables slow-query logging
+SLOW_QUERY_MS = float(os.getenv('API_SLOW_QUERY_MS', '0'))
+
+logger = logging.getLogger("api.sql")
+
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds",
+    "End-to-end request latency",
+    ["method", "route", "status"],
+)
+REQUEST_DB_TIME = Histogram(
+    "api_request_db_seconds",
+    "Time spent executing SQL per request",
+    ["route"],
+)
+REQUEST_ROWS = Histogram(
+    "api_response_rows",
+    "Rows fetched from the warehouse per request",
+    ["route"],
+    buckets=(0, 1, 10, 50, 100, 500, 1000, 5000, 10000),
+)
+QUERY_LATENCY = Histogram(
+    "api_db_query_duration_seconds",
+    "Latency of individual SQL statements",
+    ["route"],
+)
+POOL_CHECKOUT_WAIT = Histogram(
+    "api_db_pool_checkout_seconds",
+    "Time spent waiting to check a connection out of the pool",
+)
+POOL_CHECKED_OUT = Gauge(
+    "api_db_pool_checked_out",
+    "Connections currently checked out of the pool",
+)
+
+
+class RequestStats:
+    __slots__ = ("scope", "db_seconds", "rows")
+
+    def __init__(self, scope: dict):
+        self.scope = scope
+        self.db_seconds = 0.0
+        self.rows: Optional[int] = None
+
+    @property
+    def route(self) -> str:
+        # The router records the matched route on the shared ASGI scope;
+        # labelling by its template keeps metric cardinality bounded
+        return getattr(self.scope.get("route"), "path", "unmatched")
+
+
+# Per-request accumulator; SQLAlchemy's greenlets share the request's context
+_request_stats: ContextVar[Optional[RequestStats]] = ContextVar("request_stats", default=None)
+
+
+def record_rows(count: int) -> None:
+    """Record how many rows an endpoint fetched for the current request."""
+    stats = _request_stats.get()
+    if stats is not None:
+        stats.rows = (stats.rows or 0) + count
+
+
+def streamed_rows_recorder() -> Callable[[int], None]:
+    """
+    Row recorder for a streaming response. Its rows are only counted once the
+    body has been sent, after the middleware has reported the request, so
+    they are observed directly under the current request's route.
+    """
+    stats = _request_stats.get()
+    route = stats.route if stats is not None else "unmatched"
+    return lambda count: REQUEST_ROWS.labels(route).observe(count)
+
+
+async def metrics_middleware(request: Request, call_next):
+    stats = RequestStats(request.scope)
+    token = _request_stats.set(stats)
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        elapsed = time.perf_counter() - start
+        _request_stats.reset(token)
+        route = stats.route
+        REQUEST_LATENCY.labels(request.method, route, str(status)).observe(elapsed)
+        REQUEST_DB_TIME.labels(route).observe(stats.db_seconds)
+        if stats.rows is not None:
+            REQUEST_ROWS.labels(route).observe(stats.rows)
+
+
+def metrics_response() -> Response:
+    return Response(content=generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long each checkout waits for a connection."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            POOL_CHECKOUT_WAIT.observe(time.perf_counter() - start)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Attach SQL timing and pool usage listeners to `engine`."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info["query_start"].pop()
+        stats = _request_stats.get()
+        route = stats.route if stats is not None else "background"
+        if stats is not None:
+            stats.db_seconds += elapsed
+        QUERY_LATENCY.labels(route).observe(elapsed)
+        if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+            logger.warning(f"Slow query ({elapsed * 1000:.1f} ms) on {route}: {' '.join(statement.split())[:500]}")
+
+    @event.listens_for(sync_engine.pool, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        POOL_CHECKED_OUT.inc()
+
+    @event.listens_for(sync_engine.pool, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        POOL_CHECKED_OUT.dec()
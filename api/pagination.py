@@ -0,0 +1,28 @@
+import json
+import base64
+from datetime import datetime
+from fastapi import HTTPException
+
+
+def encode_cursor(message_date: datetime, message_id: int, channel_key: int) -> str:
+    """
+    Opaque keyset cursor for the last row of a page.
+
+    Message ids are only unique within a channel, so `channel_key` breaks
+    ties between messages posted at the same instant.
+    """
+    payload = json.dumps([message_date.isoformat(), message_id, channel_key])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii")
+
+
+def decode_cursor(cursor: str) -> dict:
+    """Decode a cursor into bind parameters for the keyset predicate."""
+    try:
+        message_date, message_id, channel_key = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return {
+            "cursor_date": datetime.fromisoformat(message_date),
+            "cursor_id": int(message_id),
+            "cursor_channel": int(channel_key),
+        }
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
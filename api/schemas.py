@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from typing import List, Optional
-from datetime import datetime
+from datetime import date, datetime
 
 class ChannelActivity(BaseModel):
     channel_name: str
@@ -17,6 +17,40 @@ class MessageResponse(BaseModel):
     views: Optional[int]
     message_date: datetime
 
+class ProductMention(BaseModel):
+    product_name: str
+    mention_count: int
+    channel_count: int
+    avg_price_birr: Optional[float]
+
 class VisualStat(BaseModel):
     category: str
-    count: int
\ No newline at end of file
+    count: int
+
+class ChannelTrendPoint(BaseModel):
+    period_start: date
+    message_count: int
+    total_views: int
+    total_forwards: int
+
+class MessageKey(BaseModel):
+    channel_name: str
+    message_id: int
+
+class MessageBatchRequest(BaseModel):
+    messages: List[MessageKey]
+
+class ImageDetection(BaseModel):
+    detection_class: str
+    confidence: float
+    image_class: str
+
+class MessageWithDetections(BaseModel):
+    message_id: int
+    channel_name: str
+    message_text: Optional[str]
+    views: Optional[int]
+    forwards: Optional[int]
+    message_date: datetime
+    image_path: Optional[str]
+    detections: List[ImageDetection]
\ No newline at end of file
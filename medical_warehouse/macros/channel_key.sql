@@ -0,0 +1,8 @@
+{#
+    Stable bigint surrogate key for a channel: the first 60 bits of
+    md5(channel_name). Keys never shift when channels are added, so facts
+    can carry them without joining dim_channels.
+#}
+{% macro channel_key(channel_name) %}
+    ('x' || substr(md5({{ channel_name }}), 1, 15))::bit(60)::bigint
+{% endmacro %}
@@ -0,0 +1,16 @@
+{#
+    Lower bound for an incremental model's reads of newly loaded rows.
+
+    `ingested_at` defaults to NOW(), the start of the loading transaction,
+    so a slow load can commit after a later one has already moved
+    max(ingested_at) past its rows. Re-reading the last
+    `ingest_overlap_minutes` (project var, default 60) picks those rows up;
+    each model's unique key dedupes what was already built.
+#}
+{% macro ingested_since(watermark_column='ingested_at') %}
+    (
+        select coalesce(max({{ watermark_column }}), '1900-01-01')
+            - interval '{{ var("ingest_overlap_minutes", 60) }} minutes'
+        from {{ this }}
+    )
+{% endmacro %}
@@ -0,0 +1,42 @@
+{#
+    Post-hooks that keep the marts' physical layout friendly to the API's
+    query plans. Both are controlled by project vars:
+
+      analyze_after_build (default true)  refresh planner statistics
+      cluster_facts       (default false) rewrite a table in index order;
+                                          takes an exclusive lock, so opt in
+#}
+
+{% macro analyze_relation() %}
+    {%- if var('analyze_after_build', true) -%}
+        analyze {{ this }}
+    {%- else -%}
+        select 1
+    {%- endif -%}
+{% endmacro %}
+
+
+{% macro cluster_by(columns) %}
+    {%- if var('cluster_facts', false) and execute -%}
+        {%- set column_list = columns | join(', ') -%}
+        {#- Reuse an existing btree on exactly these columns; the table
+            materialization keeps a renamed backup around while hooks run,
+            so a fixed index name could already be taken -#}
+        {%- set existing = run_query(
+            "select indexname from pg_indexes"
+            ~ " where schemaname = '" ~ this.schema ~ "'"
+            ~ " and tablename = '" ~ this.identifier ~ "'"
+            ~ " and indexdef like '%USING btree (" ~ column_list ~ ")'"
+            ~ " limit 1"
+        ) -%}
+        {%- if existing.rows | length > 0 -%}
+            cluster {{ this }} using "{{ existing.rows[0][0] }}"
+        {%- else -%}
+            {%- set index_name = this.identifier ~ '_' ~ (columns | join('_')) ~ '_' ~ invocation_id[:8] -%}
+            create index "{{ index_name }}" on {{ this }} ({{ column_list }});
+            cluster {{ this }} using "{{ index_name }}"
+        {%- endif -%}
+    {%- else -%}
+        select 1
+    {%- endif -%}
+{% endmacro %}
@@ -0,0 +1,23 @@
+{#
+    Stamp every successful `dbt run` / `dbt build` so consumers (the API
+    response cache) can tell when the marts have changed.
+#}
+{% macro record_warehouse_build(results) %}
+    {% set ns = namespace(failed=false) %}
+    {% for result in results %}
+        {% if result.status in ('error', 'fail') %}
+            {% set ns.failed = true %}
+        {% endif %}
+    {% endfor %}
+
+    {% if execute and flags.WHICH in ('run', 'build') and results and not ns.failed %}
+        create table if not exists {{ target.schema }}.warehouse_builds (
+            invocation_id text primary key,
+            built_at timestamptz not null default now()
+        );
+        insert into {{ target.schema }}.warehouse_builds (invocation_id)
+        values ('{{ invocation_id }}');
+    {% else %}
+        select 1;
+    {% endif %}
+{% endmacro %}
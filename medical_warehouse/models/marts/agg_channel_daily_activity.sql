@@ -0,0 +1,47 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key=['channel_key', 'date_key'],
+        incremental_strategy='delete+insert',
+        indexes=[
+            {'columns': ['channel_key', 'date_key'], 'unique': True},
+        ]
+    )
+}}
+
+with messages as (
+    select * from {{ ref('fct_messages') }}
+),
+
+{% if is_incremental() %}
+touched_days as (
+    -- Only (channel, day) pairs that received new or re-loaded messages are recomputed
+    select distinct channel_key, date_key
+    from messages
+    where ingested_at > {{ ingested_since('last_ingested_at') }}
+),
+
+{% endif %}
+scoped as (
+    select m.*
+    from messages m
+    {% if is_incremental() %}
+    join touched_days t on m.channel_key = t.channel_key and m.date_key = t.date_key
+    {% endif %}
+)
+
+-- Additive aggregates only, so coarser rollups can be summed from these rows
+select
+    channel_key,
+    channel_name,
+    date_key,
+    count(*) as message_count,
+    count(*) filter (where has_media) as media_count,
+    count(view_count) as viewed_message_count,
+    coalesce(sum(view_count), 0) as total_views,
+    coalesce(sum(forward_count), 0) as total_forwards,
+    min(message_date) as first_post_date,
+    max(message_date) as last_post_date,
+    max(ingested_at) as last_ingested_at
+from scoped
+group by channel_key, channel_name, date_key
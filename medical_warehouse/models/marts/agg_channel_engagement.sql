@@ -0,0 +1,20 @@
+-- Built from the daily rollup, so cost scales with channels x days
+with daily as (
+    select * from {{ ref('agg_channel_daily_activity') }}
+),
+
+channels as (
+    select * from {{ ref('dim_channels') }}
+)
+
+select
+    c.channel_key,
+    c.channel_name,
+    sum(d.message_count) as message_count,
+    sum(d.media_count) as media_count,
+    sum(d.total_views) as total_views,
+    sum(d.total_forwards) as total_forwards,
+    sum(d.total_views)::numeric / nullif(sum(d.message_count), 0) as avg_views
+from daily d
+join channels c on d.channel_key = c.channel_key
+group by 1, 2
@@ -0,0 +1,18 @@
+{{
+    config(
+        indexes=[
+            {'columns': ['image_class']},
+        ]
+    )
+}}
+
+with detections as (
+    select * from {{ ref('fct_image_detections') }}
+)
+
+select
+    image_class,
+    detection_class,
+    count(*) as detection_count
+from detections
+group by 1, 2
@@ -1,21 +1,33 @@
+{{
+    config(
+        indexes=[
+            {'columns': ['channel_key'], 'unique': True},
+            {'columns': ['channel_name'], 'unique': True},
+        ]
+    )
+}}
 
-with messages as (
-    select * from {{ ref('stg_telegram_messages') }}
+-- Channel stats are rolled up from the incremental daily aggregates rather
+-- than rescanning every message
+with daily as (
+    select * from {{ ref('agg_channel_daily_activity') }}
 ),
 
 channel_stats as (
     select
+        channel_key,
         channel_name,
-        min(message_date) as first_post_date,
-        max(message_date) as last_post_date,
-        count(*) as total_posts,
-        avg(views) as avg_views
-    from messages
-    group by 1
+        min(first_post_date) as first_post_date,
+        max(last_post_date) as last_post_date,
+        sum(message_count) as total_posts,
+        sum(total_views)::numeric / nullif(sum(viewed_message_count), 0) as avg_views
+    from daily
+    group by 1, 2
 ),
 
 channels_with_type as (
     select
+        channel_key,
         channel_name,
         case
             when lower(channel_name) like '%pharma%' then 'Pharmaceutical'
@@ -30,7 +42,4 @@ channels_with_type as (
     from channel_stats
 )
 
-select
-    row_number() over (order by channel_name) as channel_key,
-    *
-from channels_with_type
\ No newline at end of file
+select * from channels_with_type
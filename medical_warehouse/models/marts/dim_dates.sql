@@ -1,3 +1,11 @@
+{{
+    config(
+        indexes=[
+            {'columns': ['date_key'], 'unique': True},
+            {'columns': ['full_date'], 'unique': True},
+        ]
+    )
+}}
 
 with date_spine as (
     select
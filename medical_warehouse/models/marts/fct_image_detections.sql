@@ -1,5 +1,40 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key='detection_id',
+        incremental_strategy='delete+insert',
+        on_schema_change='append_new_columns',
+        indexes=[
+            {'columns': ['detection_id'], 'unique': True},
+            {'columns': ['channel_name', 'message_id']},
+            {'columns': ['channel_key', 'message_id']},
+            {'columns': ['image_class', 'detection_class']},
+            {'columns': ['ingested_at']},
+        ],
+        post_hook=["{{ cluster_by(['channel_name', 'message_id']) }}"]
+    )
+}}
+
 with detections as (
-    select * from {{ ref('stg_yolo_detections') }}
+    select * from {{ ref('stg_image_detections') }}
+    {% if is_incremental() %}
+    -- Only rows loaded since the last build, less the ingest overlap; `dbt run --full-refresh` rebuilds everything
+    where ingested_at > {{ ingested_since() }}
+    {% endif %}
+),
+
+identified as (
+    select
+        -- A detection is identified by its image and bounding box
+        md5(concat_ws('|', channel_name, message_id, detection_class, x_min, y_min, x_max, y_max)) as detection_id,
+        *
+    from detections
+),
+
+latest as (
+    select distinct on (detection_id) *
+    from identified
+    order by detection_id, ingested_at desc
 ),
 
 classified as (
@@ -12,7 +47,7 @@ classified as (
             when detection_class in ('tv', 'laptop', 'cell phone', 'book', 'clock') then 'Promotional' -- Assuming devices/text-heavy might be promo
             else 'Other'
         end as image_class
-    from detections
+    from latest
 )
 
-select * from classified
\ No newline at end of file
+select * from classified
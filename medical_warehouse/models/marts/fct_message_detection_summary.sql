@@ -0,0 +1,68 @@
+{{
+    config(
+        indexes=[
+            {'columns': ['channel_key', 'message_id'], 'unique': True},
+            {'columns': ['image_class']},
+        ]
+    )
+}}
+
+-- One row per message with an image: what was detected alongside its engagement
+with detections as (
+    select * from {{ ref('fct_image_detections') }}
+),
+
+messages as (
+    select * from {{ ref('fct_messages') }}
+),
+
+per_message as (
+    select
+        channel_key,
+        channel_name,
+        message_id,
+        count(*) as detection_count,
+        max(confidence) as max_confidence
+    from detections
+    group by 1, 2, 3
+),
+
+class_counts as (
+    select
+        channel_key,
+        message_id,
+        detection_class,
+        image_class,
+        count(*) as class_count,
+        max(confidence) as class_confidence
+    from detections
+    group by 1, 2, 3, 4
+),
+
+top_class as (
+    -- Most frequent class per message, ties broken by confidence
+    select distinct on (channel_key, message_id)
+        channel_key,
+        message_id,
+        detection_class as top_class,
+        image_class
+    from class_counts
+    order by channel_key, message_id, class_count desc, class_confidence desc
+)
+
+select
+    p.channel_key,
+    p.channel_name,
+    p.message_id,
+    m.date_key,
+    p.detection_count,
+    t.top_class,
+    p.max_confidence,
+    t.image_class,
+    m.view_count,
+    m.forward_count
+from per_message p
+join top_class t
+    on p.channel_key = t.channel_key and p.message_id = t.message_id
+left join messages m
+    on p.channel_name = m.channel_name and p.message_id = m.message_id
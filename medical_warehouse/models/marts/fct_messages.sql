@@ -1,11 +1,35 @@
-
+{{
+    config(
+        materialized='incremental',
+        unique_key=['channel_name', 'message_id'],
+        incremental_strategy='delete+insert',
+        on_schema_change='append_new_columns',
+        indexes=[
+            {'columns': ['channel_name', 'message_id'], 'unique': True},
+            {'columns': ['search_vector'], 'type': 'gin'},
+            {'columns': ['message_text gin_trgm_ops'], 'type': 'gin'},
+            {'columns': ['message_date', 'message_id', 'channel_key']},
+            {'columns': ['channel_key', 'date_key']},
+            {'columns': ['date_key'], 'type': 'brin'},
+            {'columns': ['ingested_at']},
+        ],
+        post_hook=["{{ cluster_by(['date_key']) }}"]
+    )
+}}
 
 with messages as (
     select * from {{ ref('stg_telegram_messages') }}
+    {% if is_incremental() %}
+    -- Only rows loaded since the last build, less the ingest overlap; `dbt run --full-refresh` rebuilds everything
+    where ingested_at > {{ ingested_since() }}
+    {% endif %}
 ),
 
-channels as (
-    select * from {{ ref('dim_channels') }}
+latest as (
+    -- The loader appends on every run, so keep the newest copy of each message
+    select distinct on (channel_name, message_id) *
+    from messages
+    order by channel_name, message_id, ingested_at desc
 ),
 
 dates as (
@@ -14,14 +38,18 @@ dates as (
 
 select
     m.message_id,
-    c.channel_key,
+    m.channel_name,
+    {{ channel_key('m.channel_name') }} as channel_key,
     d.date_key,
+    m.message_date,
     m.message_text,
+    -- 'simple' config: no stemming, so Amharic and English tokens index as written
+    to_tsvector('simple', coalesce(m.message_text, '')) as search_vector,
     m.message_length,
     m.views as view_count,
     m.forwards as forward_count,
     m.has_media,
-    m.image_path
-from messages m
-left join channels c on m.channel_name = c.channel_name
+    m.image_path,
+    m.ingested_at
+from latest m
 left join dates d on m.message_date::date = d.full_date
@@ -0,0 +1,53 @@
+{{
+    config(
+        materialized='incremental',
+        unique_key=['channel_name', 'message_id', 'product_name'],
+        incremental_strategy='delete+insert',
+        indexes=[
+            {'columns': ['channel_name', 'message_id', 'product_name'], 'unique': True},
+            {'columns': ['product_name']},
+            {'columns': ['channel_key', 'date_key']},
+            {'columns': ['ingested_at']},
+        ],
+        pre_hook=["
+            {% if is_incremental() %}
+            -- Re-extracted messages replace all their mentions, including
+            -- products an edit removed, so clear them before the insert
+            delete from {{ this }} f
+            using {{ source('raw', 'product_mention_extractions') }} e
+            where f.channel_name = e.channel_name
+              and f.message_id = e.message_id
+              and e.ingested_at > {{ ingested_since() }}
+            {% else %}
+            select 1
+            {% endif %}
+        "]
+    )
+}}
+
+with mentions as (
+    select * from {{ source('raw', 'product_mentions') }}
+    {% if is_incremental() %}
+    where ingested_at > {{ ingested_since() }}
+    {% endif %}
+),
+
+latest as (
+    -- Re-loaded messages are extracted again; keep the newest extraction
+    select distinct on (channel_name, message_id, product_name) *
+    from mentions
+    order by channel_name, message_id, product_name, ingested_at desc
+)
+
+select
+    {{ channel_key('channel_name') }} as channel_key,
+    channel_name,
+    message_id,
+    to_char(message_date, 'YYYYMMDD')::int as date_key,
+    message_date,
+    product_name,
+    matched_token,
+    script,
+    price_birr,
+    ingested_at
+from latest
@@ -0,0 +1,25 @@
+-- Typed view over YOLO detections: integer message_id and the channel key,
+-- so detections join to fct_messages without casts at query time
+with detections as (
+    select * from {{ ref('stg_yolo_detections') }}
+)
+
+select
+    {{ channel_key('channel_name') }} as channel_key,
+    channel_name,
+    -- message_id is the image filename stem; older loads may hold it as text.
+    -- The case keeps the cast safe if the planner checks it before the where
+    case
+        when message_id::text ~ '^[0-9]+$' then message_id::text::bigint
+    end as message_id,
+    image_path,
+    detection_class,
+    confidence::double precision as confidence,
+    x_min::double precision as x_min,
+    y_min::double precision as y_min,
+    x_max::double precision as x_max,
+    y_max::double precision as y_max,
+    ingested_at
+from detections
+-- Images not named after a message id can't be joined to a message
+where message_id::text ~ '^[0-9]+$'
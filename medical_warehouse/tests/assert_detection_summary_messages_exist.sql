@@ -0,0 +1,7 @@
+-- Message ids are only unique within a channel, so the summary must
+-- reference fct_messages on (channel_name, message_id)
+select s.channel_name, s.message_id
+from {{ ref('fct_message_detection_summary') }} s
+left join {{ ref('fct_messages') }} m
+    on s.channel_name = m.channel_name and s.message_id = m.message_id
+where m.message_id is null
@@ -0,0 +1,9 @@
+-- Every mention in the mart is still in raw.product_mentions: an edit that
+-- drops a product (or every product) from a message drops its mart rows too
+select f.channel_name, f.message_id, f.product_name
+from {{ ref('fct_product_mentions') }} f
+left join {{ source('raw', 'product_mentions') }} r
+    on f.channel_name = r.channel_name
+    and f.message_id = r.message_id
+    and f.product_name = r.product_name
+where r.channel_name is null
@@ -6,38 +6,67 @@ This module defines the data pipeline assets for orchestrating:
 - Data loading to PostgreSQL
 - dbt transformations
 - YOLO object detection enrichment
+
+Scrape, load and detection assets are partitioned by day, one partition per
+`data/raw/telegram_messages/YYYY-MM-DD` directory of the raw data lake.
 """
 
 import os
+import re
+import json
+import time
+import shutil
+import hashlib
 import subprocess
 from pathlib import Path
 from datetime import datetime
-from dagster import asset, AssetExecutionContext, Output, MetadataValue
+from dagster import (
+    asset,
+    graph_asset,
+    op,
+    AssetExecutionContext,
+    AssetIn,
+    DailyPartitionsDefinition,
+    DynamicOut,
+    DynamicOutput,
+    In,
+    MetadataValue,
+    Nothing,
+    OpExecutionContext,
+    Output,
+)
+
+from orchestration.resources import ProfilingResource
 import sys
 
 # Add project root to path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+# One partition per `data/raw/telegram_messages/YYYY-MM-DD` directory
+daily_partitions = DailyPartitionsDefinition(
+    start_date=os.getenv("PIPELINE_START_DATE", "2025-01-01"),
+    timezone="UTC",
+)
+
 
 @asset(
     description="Scrape messages and images from Telegram channels",
-    group_name="extract"
+    group_name="extract",
+    partitions_def=daily_partitions
 )
-def telegram_scraper(context: AssetExecutionContext) -> Output[dict]:
+def telegram_scraper(context: AssetExecutionContext, profiling: ProfilingResource) -> Output[dict]:
     """
-    Execute the Telegram scraper to collect raw messages and images.
+    Execute the Telegram scraper to collect one day's raw messages and images.
     """
-    from src.scraper import main as scraper_main
-    
-    context.log.info("Starting Telegram data scraping...")
+    partition_date = context.partition_key
+    context.log.info(f"Starting Telegram data scraping for {partition_date}...")
     
     try:
-        # Run the scraper
-        # Note: scraper.py needs to be modified to return stats
-        # For now, we'll call it as a subprocess
         result = subprocess.run(
-            [sys.executable, str(project_root / "src" / "scraper.py")],
+            [sys.executable, str(project_root / "src" / "scraper.py"), "--date", partition_date],
+            cwd=project_root,
+            env=profiling.subprocess_env(context),
             capture_output=True,
             text=True,
             timeout=600  # 10 minutes timeout
@@ -50,11 +79,10 @@ def telegram_scraper(context: AssetExecutionContext) -> Output[dict]:
         context.log.info("Telegram scraping completed successfully")
         
         # Count scraped files
-        raw_data_path = project_root / "data" / "raw" / "telegram_messages"
-        image_path = project_root / "data" / "raw" / "images"
+        from src.datalake import partition_image_paths, partition_message_files
         
-        message_files = list(raw_data_path.rglob("*.json")) if raw_data_path.exists() else []
-        image_files = list(image_path.rglob("*.jpg")) if image_path.exists() else []
+        message_files = partition_message_files(str(project_root / "data"), partition_date)
+        image_files = partition_image_paths(str(project_root / "data"), partition_date)
         
         metadata = {
             "message_files": len(message_files),
@@ -68,6 +96,7 @@ def telegram_scraper(context: AssetExecutionContext) -> Output[dict]:
                 "message_files": MetadataValue.int(len(message_files)),
                 "image_files": MetadataValue.int(len(image_files)),
                 "timestamp": MetadataValue.text(metadata["timestamp"]),
+                **profiling.metadata(context, "scraper"),
             }
         )
         
@@ -79,17 +108,21 @@ def telegram_scraper(context: AssetExecutionContext) -> Output[dict]:
 @asset(
     description="Load raw JSON data into PostgreSQL staging tables",
     group_name="load",
-    deps=[telegram_scraper]
+    deps=[telegram_scraper],
+    partitions_def=daily_partitions
 )
-def data_loader(context: AssetExecutionContext) -> Output[dict]:
+def data_loader(context: AssetExecutionContext, profiling: ProfilingResource) -> Output[dict]:
     """
-    Load scraped data from JSON files into PostgreSQL raw tables.
+    Load one day's scraped JSON files into PostgreSQL raw tables.
     """
-    context.log.info("Starting data load to PostgreSQL...")
+    partition_date = context.partition_key
+    context.log.info(f"Starting data load to PostgreSQL for {partition_date}...")
     
     try:
         result = subprocess.run(
-            [sys.executable, str(project_root / "src" / "loader.py")],
+            [sys.executable, str(project_root / "src" / "loader.py"), "--date", partition_date],
+            cwd=project_root,
+            env=profiling.subprocess_env(context),
             capture_output=True,
             text=True,
             timeout=300  # 5 minutes timeout
@@ -111,6 +144,7 @@ def data_loader(context: AssetExecutionContext) -> Output[dict]:
             metadata={
                 "status": MetadataValue.text("success"),
                 "timestamp": MetadataValue.text(metadata["timestamp"]),
+                **profiling.metadata(context, "loader"),
             }
         )
         
@@ -120,52 +154,412 @@ def data_loader(context: AssetExecutionContext) -> Output[dict]:
 
 
 @asset(
-    description="Run dbt transformations to build the data warehouse",
-    group_name="transform",
+    description="Extract product names and birr prices from loaded message text",
+    group_name="load",
     deps=[data_loader]
 )
-def dbt_transform(context: AssetExecutionContext) -> Output[dict]:
+def product_mentions(context: AssetExecutionContext) -> Output[dict]:
     """
-    Execute dbt models to transform raw data into dimensional model.
+    Extract product mentions from newly loaded messages into raw.product_mentions.
     """
-    context.log.info("Starting dbt transformations...")
-    
-    dbt_project_dir = project_root / "medical_warehouse"
+    context.log.info("Starting product mention extraction...")
     
     try:
-        # Run dbt deps first
-        context.log.info("Running dbt deps...")
-        subprocess.run(
-            ["dbt", "deps"],
-            cwd=dbt_project_dir,
-            check=True,
+        result = subprocess.run(
+            [sys.executable, str(project_root / "src" / "product_mentions.py")],
+            cwd=project_root,
             capture_output=True,
-            text=True
+            text=True,
+            timeout=600
         )
         
-        # Run dbt run
-        context.log.info("Running dbt run...")
+        if result.returncode != 0:
+            context.log.error(f"Product mention extraction failed: {result.stderr}")
+            raise Exception(f"Product mention extraction failed with return code {result.returncode}")
+        
+        context.log.info(result.stdout.strip())
+        
+        metadata = {
+            "status": "success",
+            "timestamp": datetime.now().isoformat(),
+        }
+        
+        return Output(
+            value=metadata,
+            metadata={
+                "status": MetadataValue.text("success"),
+                "timestamp": MetadataValue.text(metadata["timestamp"]),
+            }
+        )
+        
+    except Exception as e:
+        context.log.error(f"Error during product mention extraction: {str(e)}")
+        raise
+
+
+@op(
+    ins={"telegram_scraper": In(Nothing)},
+    out=DynamicOut(str),
+    description="List the channels with images in the partition, one dynamic output each"
+)
+def yolo_channels(context: OpExecutionContext):
+    from src.datalake import partition_image_paths
+    from src.detection_worker import QUEUE_ENABLED, enqueue_images
+
+    partition_date = context.partition_key
+    images = partition_image_paths(str(project_root / "data"), partition_date)
+
+    if QUEUE_ENABLED:
+        # A detection worker holds the model warm; just hand it the images
+        enqueued = enqueue_images(
+            images,
+            db_path=str(project_root / "data" / "processed" / "detection_queue.sqlite"),
+        )
+        context.log.info(f"Enqueued {enqueued} new images for the detection worker")
+        return
+
+    for channel_name in sorted({channel for _, channel in images}):
+        yield DynamicOutput(channel_name, mapping_key=re.sub(r"\W", "_", channel_name))
+
+
+@op(
+    description="Run YOLO object detection on one channel's images in the partition",
+    tags={"pipeline/step": "yolo"}
+)
+def detect_channel(context: OpExecutionContext, profiling: ProfilingResource, channel_name: str) -> str:
+    partition_date = context.partition_key
+    context.log.info(f"Starting YOLO object detection for {channel_name} on {partition_date}...")
+    
+    result = subprocess.run(
+        [
+            sys.executable, str(project_root / "src" / "yolo_detect.py"),
+            "--date", partition_date, "--channel", channel_name,
+        ],
+        cwd=project_root,
+        env=profiling.subprocess_env(context),
+        capture_output=True,
+        text=True,
+        timeout=1800  # 30 minutes timeout for image processing
+    )
+    
+    if result.returncode != 0:
+        context.log.error(f"YOLO detection failed for {channel_name}: {result.stderr}")
+        raise Exception(f"YOLO detection failed with return code {result.returncode}")
+    
+    context.log.info(result.stdout.strip())
+    return str(project_root / "data" / "processed" / "yolo_detections" / partition_date / f"{channel_name}.csv")
+
+
+@op(description="Combine per-channel detection CSVs into the partition's CSV")
+def merge_channel_detections(
+    context: OpExecutionContext, profiling: ProfilingResource, channel_csvs: list
+) -> Output[dict]:
+    import pandas as pd
+    from src.detection_worker import DETECTION_FIELDS, QUEUE_ENABLED
+
+    if QUEUE_ENABLED:
+        return Output(
+            value={"status": "enqueued"},
+            metadata={"status": MetadataValue.text("enqueued")}
+        )
+
+    partition_date = context.partition_key
+    detections_csv = project_root / "data" / "processed" / "yolo_detections" / f"{partition_date}.csv"
+    
+    try:
+        frames = [pd.read_csv(path) for path in channel_csvs]
+        detections = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=DETECTION_FIELDS)
+        detections_csv.parent.mkdir(parents=True, exist_ok=True)
+        detections.to_csv(detections_csv, index=False)
+        
+        context.log.info("YOLO object detection completed successfully")
+        
+        metadata = {
+            "status": "success",
+            "timestamp": datetime.now().isoformat(),
+            "channels": len(channel_csvs),
+            "detections": len(detections),
+        }
+        
+        return Output(
+            value=metadata,
+            metadata={
+                "status": MetadataValue.text("success"),
+                "timestamp": MetadataValue.text(metadata["timestamp"]),
+                "channels": MetadataValue.int(metadata["channels"]),
+                "detections": MetadataValue.int(metadata["detections"]),
+                **profiling.metadata(context, *(f"yolo_detect_{Path(path).stem}" for path in channel_csvs)),
+            }
+        )
+        
+    except Exception as e:
+        context.log.error(f"Error during YOLO enrichment: {str(e)}")
+        raise
+
+
+@graph_asset(
+    description="Run YOLO object detection on downloaded images, fanned out per channel",
+    group_name="enrich",
+    ins={"telegram_scraper": AssetIn(dagster_type=Nothing)},
+    partitions_def=daily_partitions
+)
+def yolo_enrichment(telegram_scraper):
+    """
+    Execute YOLO object detection on one day's scraped images, one step per channel.
+    """
+    channel_csvs = yolo_channels(telegram_scraper).map(detect_channel)
+    return merge_channel_detections(channel_csvs.collect())
+
+
+# How long load_detections waits for the detection worker in queue mode
+DETECTION_QUEUE_TIMEOUT_SECONDS = float(os.getenv("DETECTION_QUEUE_TIMEOUT_SECONDS", "1800"))
+
+
+def _wait_for_detection_queue(context: AssetExecutionContext, partition_date: str) -> None:
+    """Block until the worker has finished every image of the partition it was handed."""
+    from src.datalake import partition_image_paths
+    from src.detection_worker import unfinished_jobs
+
+    image_paths = [path for path, _ in partition_image_paths(str(project_root / "data"), partition_date)]
+    db_path = str(project_root / "data" / "processed" / "detection_queue.sqlite")
+    deadline = time.monotonic() + DETECTION_QUEUE_TIMEOUT_SECONDS
+    while True:
+        remaining = unfinished_jobs(image_paths, db_path=db_path)
+        if not remaining:
+            return
+        if time.monotonic() > deadline:
+            raise Exception(
+                f"{remaining} images of {partition_date} are still queued after "
+                f"{DETECTION_QUEUE_TIMEOUT_SECONDS:.0f}s; is the detection worker running?"
+            )
+        context.log.info(f"Waiting for the detection worker: {remaining} images left")
+        time.sleep(5)
+
+
+@asset(
+    description="Load YOLO detection results into data warehouse",
+    group_name="enrich",
+    deps=[yolo_enrichment],
+    partitions_def=daily_partitions
+)
+def load_detections(context: AssetExecutionContext, profiling: ProfilingResource) -> Output[dict]:
+    """
+    Load one day's YOLO detection results into the data warehouse.
+    """
+    from src.detection_worker import QUEUE_ENABLED
+
+    partition_date = context.partition_key
+    context.log.info(f"Loading detection results for {partition_date} to warehouse...")
+    
+    try:
+        if QUEUE_ENABLED:
+            # yolo_enrichment only enqueued the images; their batch CSVs
+            # exist once the worker has processed them
+            _wait_for_detection_queue(context, partition_date)
+
         result = subprocess.run(
-            ["dbt", "run"],
-            cwd=dbt_project_dir,
+            [sys.executable, str(project_root / "src" / "load_detections.py"), "--date", partition_date],
+            cwd=project_root,
+            env=profiling.subprocess_env(context),
             capture_output=True,
             text=True,
-            timeout=600  # 10 minutes timeout
+            timeout=300
+        )
+        
+        if result.returncode != 0:
+            context.log.error(f"Detection loading failed: {result.stderr}")
+            raise Exception(f"Detection loading failed with return code {result.returncode}")
+        
+        context.log.info("Detection results loaded successfully")
+        
+        metadata = {
+            "status": "success",
+            "timestamp": datetime.now().isoformat(),
+        }
+        
+        return Output(
+            value=metadata,
+            metadata={
+                "status": MetadataValue.text("success"),
+                "timestamp": MetadataValue.text(metadata["timestamp"]),
+                **profiling.metadata(context, "load_detections"),
+            }
         )
         
+    except Exception as e:
+        context.log.error(f"Error loading detection results: {str(e)}")
+        raise
+
+
+# Runs that build dbt carry this tag; dagster.yaml lets only one of them run at a time
+DBT_RUN_TAGS = {"medical_warehouse/dbt": "build"}
+
+# Saved between runs so dbt_transform can tell what changed since the last build
+DBT_STATE_DIR = project_root / "medical_warehouse" / ".dbt_state"
+
+# Raw table -> dbt selector for the models it feeds
+RAW_TABLE_SELECTORS = {
+    "raw.telegram_messages": "stg_telegram_messages+",
+    "raw.yolo_detections": "stg_yolo_detections+",
+    "raw.product_mentions": "source:raw.product_mentions+",
+    # Moves when a re-extracted message lost all its mentions
+    "raw.product_mention_extractions": "source:raw.product_mention_extractions+",
+}
+
+
+def _raw_watermarks() -> dict:
+    """
+    Latest `ingested_at` of every raw table feeding dbt, with the table's
+    count of written rows (None if empty or missing). A load that commits
+    behind the latest `ingested_at` still moves the count.
+    """
+    from sqlalchemy import create_engine, text
+
+    db_url = (
+        f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
+        f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}"
+    )
+    engine = create_engine(db_url)
+    watermarks = {}
+    try:
+        with engine.connect() as conn:
+            for table in RAW_TABLE_SELECTORS:
+                if conn.execute(text("SELECT to_regclass(:t)"), {"t": table}).scalar() is None:
+                    watermarks[table] = None
+                    continue
+                latest = conn.execute(text(f"SELECT max(ingested_at) FROM {table}")).scalar()
+                writes = conn.execute(
+                    text("SELECT n_tup_ins + n_tup_upd + n_tup_del FROM pg_stat_user_tables WHERE relid = to_regclass(:t)"),
+                    {"t": table}
+                ).scalar()
+                watermarks[table] = f"{latest.isoformat()}/{writes}" if latest else None
+    finally:
+        engine.dispose()
+    return watermarks
+
+
+def _packages_hash(dbt_project_dir: Path) -> str:
+    """Hash of the dbt package specs, empty when the project has none."""
+    spec_files = [
+        dbt_project_dir / name
+        for name in ("packages.yml", "dependencies.yml", "package-lock.yml")
+        if (dbt_project_dir / name).exists()
+    ]
+    if not spec_files:
+        return ""
+    digest = hashlib.sha256()
+    for path in spec_files:
+        digest.update(path.name.encode())
+        digest.update(path.read_bytes())
+    return digest.hexdigest()
+
+
+def _run_dbt(context: AssetExecutionContext, args: list, dbt_project_dir: Path, timeout: int):
+    context.log.info(f"Running dbt {' '.join(args)}...")
+    return subprocess.run(
+        ["dbt", *args],
+        cwd=dbt_project_dir,
+        capture_output=True,
+        text=True,
+        timeout=timeout
+    )
+
+
+@asset(
+    description="Run dbt transformations to build the data warehouse",
+    group_name="transform",
+    deps=[data_loader, product_mentions, load_detections]
+)
+def dbt_transform(context: AssetExecutionContext) -> Output[dict]:
+    """
+    Execute dbt models to transform raw data into dimensional model.
+
+    Only models downstream of raw tables that received rows since the last
+    successful build, or of models whose code changed (`state:modified+`
+    against the previous build's manifest), are rebuilt. When neither is the
+    case the build is skipped. Setting DBT_FULL_REFRESH=1 rebuilds everything.
+    """
+    context.log.info("Starting dbt transformations...")
+    
+    dbt_project_dir = project_root / "medical_warehouse"
+    state_manifest = DBT_STATE_DIR / "manifest.json"
+    watermarks_file = DBT_STATE_DIR / "raw_watermarks.json"
+    deps_hash_file = DBT_STATE_DIR / "packages.sha256"
+    full_refresh = os.getenv("DBT_FULL_REFRESH", "0") == "1"
+    
+    try:
+        DBT_STATE_DIR.mkdir(parents=True, exist_ok=True)
+        
+        # Install packages only when their spec changed or they were cleaned away
+        packages_hash = _packages_hash(dbt_project_dir)
+        previous_hash = deps_hash_file.read_text().strip() if deps_hash_file.exists() else None
+        if packages_hash and (packages_hash != previous_hash or not (dbt_project_dir / "dbt_packages").exists()):
+            deps_result = _run_dbt(context, ["deps"], dbt_project_dir, timeout=300)
+            if deps_result.returncode != 0:
+                context.log.error(f"dbt deps failed: {deps_result.stderr}")
+                raise Exception(f"dbt deps failed with return code {deps_result.returncode}")
+            deps_hash_file.write_text(packages_hash)
+        
+        # Read the watermarks before building so rows landing mid-build are picked up next time
+        watermarks = _raw_watermarks()
+        previous_watermarks = json.loads(watermarks_file.read_text()) if watermarks_file.exists() else None
+        
+        if full_refresh or previous_watermarks is None or not state_manifest.exists():
+            selectors = []
+            state_args = []
+            mode = "full"
+        else:
+            selectors = [
+                selector for table, selector in RAW_TABLE_SELECTORS.items()
+                if watermarks[table] is not None and watermarks[table] != previous_watermarks.get(table)
+            ]
+            state_args = ["--state", str(DBT_STATE_DIR)]
+            ls_result = _run_dbt(
+                context,
+                ["ls", "--quiet", "--resource-type", "model", "--select", "state:modified", "--output", "name", *state_args],
+                dbt_project_dir,
+                timeout=300
+            )
+            if ls_result.returncode != 0:
+                context.log.error(f"dbt ls failed: {ls_result.stderr}")
+                raise Exception(f"dbt ls failed with return code {ls_result.returncode}")
+            if ls_result.stdout.strip():
+                selectors.append("state:modified+")
+            mode = "selective"
+        
+        if mode == "selective" and not selectors:
+            context.log.info("No new raw data or model changes since the last build; skipping dbt")
+            metadata = {
+                "status": "skipped",
+                "timestamp": datetime.now().isoformat(),
+                "selected": [],
+            }
+            return Output(
+                value=metadata,
+                metadata={
+                    "status": MetadataValue.text("skipped"),
+                    "timestamp": MetadataValue.text(metadata["timestamp"]),
+                }
+            )
+        
+        select_args = ["--select", *selectors, *state_args] if selectors else []
+        
+        # Run dbt run (fact tables build incrementally unless a full refresh is requested)
+        run_args = ["run", *select_args]
+        if full_refresh:
+            run_args.append("--full-refresh")
+        result = _run_dbt(context, run_args, dbt_project_dir, timeout=600)  # 10 minutes timeout
+        
         if result.returncode != 0:
             context.log.error(f"dbt run failed: {result.stderr}")
             raise Exception(f"dbt run failed with return code {result.returncode}")
         
-        # Run dbt test
-        context.log.info("Running dbt test...")
-        test_result = subprocess.run(
-            ["dbt", "test"],
-            cwd=dbt_project_dir,
-            capture_output=True,
-            text=True,
-            timeout=300
-        )
+        # Run dbt test over the same selection
+        test_result = _run_dbt(context, ["test", *select_args], dbt_project_dir, timeout=300)
+        
+        # The models are built; remember what they were built from
+        shutil.copyfile(dbt_project_dir / "target" / "manifest.json", state_manifest)
+        watermarks_file.write_text(json.dumps(watermarks, indent=2))
         
         context.log.info("dbt transformations completed successfully")
         
@@ -173,6 +567,8 @@ def dbt_transform(context: AssetExecutionContext) -> Output[dict]:
             "status": "success",
             "timestamp": datetime.now().isoformat(),
             "tests_passed": test_result.returncode == 0,
+            "mode": mode,
+            "selected": selectors,
         }
         
         return Output(
@@ -181,6 +577,8 @@ def dbt_transform(context: AssetExecutionContext) -> Output[dict]:
                 "status": MetadataValue.text("success"),
                 "timestamp": MetadataValue.text(metadata["timestamp"]),
                 "tests_passed": MetadataValue.bool(metadata["tests_passed"]),
+                "mode": MetadataValue.text(mode),
+                "selected": MetadataValue.text(" ".join(selectors) or "all"),
             }
         )
         
@@ -190,37 +588,42 @@ def dbt_transform(context: AssetExecutionContext) -> Output[dict]:
 
 
 @asset(
-    description="Run YOLO object detection on downloaded images",
-    group_name="enrich",
-    deps=[telegram_scraper]
+    description="Merge old daily lake partitions into monthly files and refresh the lake index",
+    group_name="maintenance"
 )
-def yolo_enrichment(context: AssetExecutionContext) -> Output[dict]:
+def lake_compaction(context: AssetExecutionContext) -> Output[dict]:
     """
-    Execute YOLO object detection on scraped images.
+    Compact daily `{channel}.json` files of finished months into
+    `raw/telegram_messages_compacted/YYYY-MM/` and refresh `raw/_lake_index.json`.
     """
-    context.log.info("Starting YOLO object detection...")
+    context.log.info("Starting data lake compaction...")
     
     try:
         result = subprocess.run(
-            [sys.executable, str(project_root / "src" / "yolo_detect.py")],
+            [sys.executable, str(project_root / "src" / "compaction.py")],
+            cwd=project_root,
             capture_output=True,
             text=True,
-            timeout=1800  # 30 minutes timeout for image processing
+            timeout=1800
         )
         
         if result.returncode != 0:
-            context.log.error(f"YOLO detection failed: {result.stderr}")
-            raise Exception(f"YOLO detection failed with return code {result.returncode}")
+            context.log.error(f"Compaction failed: {result.stderr}")
+            raise Exception(f"Compaction failed with return code {result.returncode}")
         
-        context.log.info("YOLO object detection completed successfully")
-        
-        # Check for detection results
-        detections_csv = project_root / "data" / "processed" / "image_detections.csv"
+        summary = json.loads(result.stdout.strip().splitlines()[-1])
+        context.log.info(
+            f"Compacted {summary['source_files']} files across {len(summary['months'])} months"
+        )
+        if summary["skipped_files"]:
+            context.log.warning(
+                f"Left {summary['skipped_files']} files with invalid messages uncompacted; see logs/compaction.log"
+            )
         
         metadata = {
             "status": "success",
             "timestamp": datetime.now().isoformat(),
-            "detections_file_exists": detections_csv.exists(),
+            **summary,
         }
         
         return Output(
@@ -228,42 +631,112 @@ def yolo_enrichment(context: AssetExecutionContext) -> Output[dict]:
             metadata={
                 "status": MetadataValue.text("success"),
                 "timestamp": MetadataValue.text(metadata["timestamp"]),
-                "detections_file_exists": MetadataValue.bool(metadata["detections_file_exists"]),
+                "compacted_months": MetadataValue.text(
+                    ", ".join(month["month"] for month in summary["months"]) or "none"
+                ),
+                "source_files": MetadataValue.int(summary["source_files"]),
+                "skipped_files": MetadataValue.int(summary["skipped_files"]),
+                "indexed_files": MetadataValue.int(summary["indexed_files"]),
+                "indexed_bytes": MetadataValue.int(summary["indexed_bytes"]),
             }
         )
         
     except Exception as e:
-        context.log.error(f"Error during YOLO enrichment: {str(e)}")
+        context.log.error(f"Error during data lake compaction: {str(e)}")
         raise
 
 
 @asset(
-    description="Load YOLO detection results into data warehouse",
-    group_name="enrich",
-    deps=[yolo_enrichment, dbt_transform]
+    description="Snapshot views and forwards of recent messages by id, without re-scraping",
+    group_name="engagement"
 )
-def load_detections(context: AssetExecutionContext) -> Output[dict]:
+def engagement_snapshots(context: AssetExecutionContext, profiling: ProfilingResource) -> Output[dict]:
     """
-    Load YOLO detection results into the data warehouse.
+    Look up messages posted within ENGAGEMENT_WINDOW_DAYS in batches of 100 ids
+    and append their current engagement to `raw/engagement_snapshots/YYYY-MM-DD/`.
     """
-    context.log.info("Loading detection results to warehouse...")
+    context.log.info("Starting engagement refresh...")
     
     try:
         result = subprocess.run(
-            [sys.executable, str(project_root / "src" / "load_detections.py")],
+            [sys.executable, str(project_root / "src" / "engagement.py")],
+            cwd=project_root,
+            env=profiling.subprocess_env(context),
             capture_output=True,
             text=True,
-            timeout=300
+            timeout=600  # 10 minutes timeout
         )
         
         if result.returncode != 0:
-            context.log.error(f"Detection loading failed: {result.stderr}")
-            raise Exception(f"Detection loading failed with return code {result.returncode}")
+            context.log.error(f"Engagement refresh failed: {result.stderr}")
+            raise Exception(f"Engagement refresh failed with return code {result.returncode}")
         
-        context.log.info("Detection results loaded successfully")
+        summary = json.loads(result.stdout.strip().splitlines()[-1])
+        context.log.info(
+            f"Captured {summary['snapshots']} snapshots in {summary['lookups']} lookups"
+        )
+        
+        failed_channels = [name for name, channel in summary["channels"].items() if "error" in channel]
+        if failed_channels and summary["snapshots"] == 0:
+            raise Exception(f"Engagement refresh captured nothing; failed channels: {', '.join(failed_channels)}")
+        
+        metadata = {
+            "status": "success",
+            "timestamp": datetime.now().isoformat(),
+            **summary,
+        }
+        
+        return Output(
+            value=metadata,
+            metadata={
+                "status": MetadataValue.text("success"),
+                "captured_at": MetadataValue.text(summary["captured_at"]),
+                "window_days": MetadataValue.int(summary["window_days"]),
+                "snapshots": MetadataValue.int(summary["snapshots"]),
+                "lookups": MetadataValue.int(summary["lookups"]),
+                "failed_channels": MetadataValue.text(", ".join(failed_channels) or "none"),
+                **profiling.metadata(context, "engagement"),
+            }
+        )
+        
+    except Exception as e:
+        context.log.error(f"Error during engagement refresh: {str(e)}")
+        raise
+
+
+@asset(
+    description="Upsert engagement snapshots into raw.message_engagement_history",
+    group_name="engagement"
+)
+def engagement_history(
+    context: AssetExecutionContext, profiling: ProfilingResource, engagement_snapshots: dict
+) -> Output[dict]:
+    """
+    Load the snapshot partition of the capture day the refresh wrote to.
+    """
+    # The refresh may have run just before midnight UTC; load the day it used
+    capture_date = engagement_snapshots["captured_at"][:10]
+    context.log.info(f"Starting engagement load for {capture_date}...")
+    
+    try:
+        result = subprocess.run(
+            [sys.executable, str(project_root / "src" / "loader.py"), "--engagement", "--date", capture_date],
+            cwd=project_root,
+            env=profiling.subprocess_env(context),
+            capture_output=True,
+            text=True,
+            timeout=300  # 5 minutes timeout
+        )
+        
+        if result.returncode != 0:
+            context.log.error(f"Engagement load failed: {result.stderr}")
+            raise Exception(f"Engagement load failed with return code {result.returncode}")
+        
+        context.log.info("Engagement loading completed successfully")
         
         metadata = {
             "status": "success",
+            "capture_date": capture_date,
             "timestamp": datetime.now().isoformat(),
         }
         
@@ -271,10 +744,12 @@ def load_detections(context: AssetExecutionContext) -> Output[dict]:
             value=metadata,
             metadata={
                 "status": MetadataValue.text("success"),
+                "capture_date": MetadataValue.text(capture_date),
                 "timestamp": MetadataValue.text(metadata["timestamp"]),
+                **profiling.metadata(context, "engagement_loader"),
             }
         )
         
     except Exception as e:
-        context.log.error(f"Error loading detection results: {str(e)}")
+        context.log.error(f"Error during engagement loading: {str(e)}")
         raise
@@ -1,29 +1,74 @@
 
 """
 Dagster Definitions for Medical Telegram Data Pipeline
-This module defines the Dagster repository with all assets, jobs, and schedules.
+This module defines the Dagster repository with all assets, jobs, schedules, and sensors.
 """
 
+import os
+
 from dagster import (
     Definitions,
     ScheduleDefinition,
+    multiprocess_executor,
     define_asset_job,
+    build_schedule_from_partitioned_job,
     AssetSelection,
 )
 
 from orchestration.assets import (
     telegram_scraper,
     data_loader,
+    product_mentions,
     dbt_transform,
     yolo_enrichment,
     load_detections,
+    lake_compaction,
+    engagement_snapshots,
+    engagement_history,
+    daily_partitions,
+    DBT_RUN_TAGS,
 )
+from orchestration.resources import ProfilingResource
+from orchestration.sensors import raw_data_sensor
+
+# Independent branches (load vs. enrich, and each channel's detection step)
+# run side by side in separate processes. YOLO steps are capped separately
+# since every one loads its own model.
+pipeline_executor = multiprocess_executor.configured({
+    "max_concurrent": int(os.getenv("PIPELINE_MAX_CONCURRENT_STEPS", "4")),
+    "tag_concurrency_limits": [
+        {
+            "key": "pipeline/step",
+            "value": "yolo",
+            "limit": int(os.getenv("PIPELINE_MAX_CONCURRENT_YOLO_STEPS", "2")),
+        },
+    ],
+})
 
 # Define the full pipeline job that runs all assets
 full_pipeline_job = define_asset_job(
     name="full_pipeline",
     description="Complete data pipeline from scraping to warehouse",
-    selection=AssetSelection.all(),
+    selection=AssetSelection.all() - AssetSelection.groups("maintenance", "engagement"),
+    partitions_def=daily_partitions,
+    tags=DBT_RUN_TAGS,
+)
+
+# Scrape, load and detect a single day. Backfilling this job reprocesses days
+# in parallel without running dbt once per partition; run transform_only after.
+daily_partition_job = define_asset_job(
+    name="daily_partition",
+    description="Scrape, load and detect one daily partition",
+    selection=AssetSelection.assets(telegram_scraper, data_loader, yolo_enrichment, load_detections),
+    partitions_def=daily_partitions,
+)
+
+# Scrape only; raw_data_sensor takes it from there once the manifest lands
+scrape_job = define_asset_job(
+    name="scrape",
+    description="Scrape one daily partition from Telegram",
+    selection=AssetSelection.assets(telegram_scraper),
+    partitions_def=daily_partitions,
 )
 
 # Define a job for just the extraction and loading
@@ -31,6 +76,7 @@ extract_load_job = define_asset_job(
     name="extract_and_load",
     description="Scrape data and load to PostgreSQL",
     selection=AssetSelection.groups("extract", "load"),
+    partitions_def=daily_partitions,
 )
 
 # Define a job for transformations only
@@ -38,6 +84,7 @@ transform_job = define_asset_job(
     name="transform_only",
     description="Run dbt transformations on existing data",
     selection=AssetSelection.groups("transform"),
+    tags=DBT_RUN_TAGS,
 )
 
 # Define a job for enrichment only
@@ -45,41 +92,84 @@ enrich_job = define_asset_job(
     name="enrich_only",
     description="Run YOLO detection and load results",
     selection=AssetSelection.groups("enrich"),
+    partitions_def=daily_partitions,
 )
 
-# Schedule to run the full pipeline daily at 2 AM
-daily_pipeline_schedule = ScheduleDefinition(
-    job=full_pipeline_job,
-    cron_schedule="0 2 * * *",  # Every day at 2 AM
-    name="daily_full_pipeline",
-    description="Run the complete pipeline daily at 2 AM",
+# Define a job for data lake upkeep
+compaction_job = define_asset_job(
+    name="compact_lake",
+    description="Compact old daily partitions and refresh the lake index",
+    selection=AssetSelection.groups("maintenance"),
 )
 
-# Schedule to run just transformations every 6 hours
-transform_schedule = ScheduleDefinition(
-    job=transform_job,
-    cron_schedule="0 */6 * * *",  # Every 6 hours
-    name="six_hourly_transform",
-    description="Run dbt transformations every 6 hours",
+# Define a job for refreshing views and forwards of recent messages
+engagement_job = define_asset_job(
+    name="engagement_refresh",
+    description="Snapshot engagement of recent messages and load it into the history table",
+    selection=AssetSelection.groups("engagement"),
+)
+
+# Scrape the day that just ended at 2 AM. Loading, detection and dbt are
+# triggered by raw_data_sensor when the scrape's manifest lands, instead of
+# on fixed crons. Backfills run in parallel, capped by dagster.yaml.
+daily_scrape_schedule = build_schedule_from_partitioned_job(
+    scrape_job,
+    hour_of_day=2,
+    name="daily_scrape",
+    description="Scrape the previous day's partition daily at 2 AM",
+)
+
+# Compact once a week; months are only touched once they are over
+compaction_schedule = ScheduleDefinition(
+    job=compaction_job,
+    cron_schedule="0 4 * * 0",  # Sundays at 4 AM
+    name="weekly_lake_compaction",
+    description="Compact finished months of the data lake weekly on Sunday at 4 AM",
+)
+
+# Engagement changes fastest in a post's first days, so sample it through the
+# day; each refresh costs one lookup per 100 recent messages
+engagement_schedule = ScheduleDefinition(
+    job=engagement_job,
+    cron_schedule="30 */6 * * *",  # Every 6 hours, clear of the 2 AM scrape
+    name="engagement_refresh_every_6_hours",
+    description="Refresh views and forwards of recent messages every 6 hours",
 )
 
 # Define the Dagster repository
 defs = Definitions(
+    executor=pipeline_executor,
+    resources={
+        # Profile the pipeline scripts when PIPELINE_PROFILE=1 or per run via launchpad config
+        "profiling": ProfilingResource(enabled=os.getenv("PIPELINE_PROFILE", "0") == "1"),
+    },
     assets=[
         telegram_scraper,
         data_loader,
+        product_mentions,
         dbt_transform,
         yolo_enrichment,
         load_detections,
+        lake_compaction,
+        engagement_snapshots,
+        engagement_history,
     ],
     jobs=[
         full_pipeline_job,
+        daily_partition_job,
+        scrape_job,
         extract_load_job,
         transform_job,
         enrich_job,
+        compaction_job,
+        engagement_job,
     ],
     schedules=[
-        daily_pipeline_schedule,
-        transform_schedule,
+        daily_scrape_schedule,
+        compaction_schedule,
+        engagement_schedule,
+    ],
+    sensors=[
+        raw_data_sensor,
     ],
 )
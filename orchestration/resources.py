@@ -0,0 +1,66 @@
+"""
+Dagster Resources for Medical Telegram Data Pipeline
+This module defines resources shared by the pipeline assets:
+- Opt-in profiling of the scripts the assets run
+"""
+
+import os
+import json
+from pathlib import Path
+from dagster import ConfigurableResource, MetadataValue, OpExecutionContext
+
+project_root = Path(__file__).parent.parent
+
+
+class ProfilingResource(ConfigurableResource):
+    """
+    Runs pipeline scripts under `src/profiling.py` when enabled, collecting
+    artifacts in `data/profiles/{run_id}/`. Defaults to PIPELINE_PROFILE and
+    can be switched on per run from the launchpad:
+
+        resources:
+          profiling:
+            config:
+              enabled: true
+    """
+
+    enabled: bool = False
+
+    def profile_dir(self, context: OpExecutionContext) -> Path:
+        return project_root / "data" / "profiles" / context.run_id
+
+    def subprocess_env(self, context: OpExecutionContext) -> dict:
+        """Environment for a script subprocess, with profiling switched on or off."""
+        env = dict(os.environ)
+        env["PIPELINE_PROFILE"] = "1" if self.enabled else "0"
+        if self.enabled:
+            env["PIPELINE_PROFILE_DIR"] = str(self.profile_dir(context))
+        return env
+
+    def metadata(self, context: OpExecutionContext, *stages: str) -> dict:
+        """Asset metadata linking the profile artifacts of `stages`, if they were profiled."""
+        summaries = [
+            json.loads(path.read_text())
+            for path in (self.profile_dir(context) / f"{stage}.json" for stage in stages)
+            if self.enabled and path.exists()
+        ]
+        if not summaries:
+            return {}
+
+        top_functions = sorted(
+            (row for summary in summaries for row in summary["top_functions"]),
+            key=lambda row: row["own_seconds"],
+            reverse=True,
+        )[:10]
+        hotspots = "\n".join(
+            ["| function | calls | own s | cumulative s |", "| --- | --- | --- | --- |"] + [
+                f"| `{row['function']}` | {row['calls']} | {row['own_seconds']} | {row['cumulative_seconds']} |"
+                for row in top_functions
+            ]
+        )
+        return {
+            "profile_dir": MetadataValue.path(str(self.profile_dir(context))),
+            "profile_wall_seconds": MetadataValue.float(sum(summary["wall_seconds"] for summary in summaries)),
+            "profile_peak_memory_mb": MetadataValue.float(max(summary["peak_memory_mb"] for summary in summaries)),
+            "profile_hotspots": MetadataValue.md(hotspots),
+        }
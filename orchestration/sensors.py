@@ -0,0 +1,125 @@
+"""
+Dagster Sensors for Medical Telegram Data Pipeline
+This module triggers downstream assets when the scraper lands new data:
+- A new or rewritten `_manifest.json` loads, enriches and transforms its partition
+- New images referenced by a partition without a new manifest are only re-detected
+"""
+
+import os
+import json
+import time
+from dagster import RunRequest, SensorEvaluationContext, SkipReason, sensor
+
+from orchestration.assets import (
+    project_root,
+    data_loader,
+    product_mentions,
+    dbt_transform,
+    yolo_enrichment,
+    load_detections,
+    daily_partitions,
+    DBT_RUN_TAGS,
+)
+from src.records import read_messages_file
+
+RAW_DIR = project_root / "data" / "raw"
+
+# Wait until the data lake has been quiet this long, so one scrape that writes
+# many files over several minutes triggers a single run per partition
+DEBOUNCE_SECONDS = float(os.getenv("PIPELINE_SENSOR_DEBOUNCE_SECONDS", "120"))
+
+# Everything downstream of the scrape for a partition with a new manifest
+MANIFEST_ASSETS = [data_loader, product_mentions, yolo_enrichment, load_detections, dbt_transform]
+IMAGE_ASSETS = [yolo_enrichment, load_detections, dbt_transform]
+
+
+def _changed_manifests(manifest_mtimes: dict) -> dict:
+    """Partitions whose `_manifest.json` is new or newer than last seen, with its mtime."""
+    changed = {}
+    for manifest in (RAW_DIR / "telegram_messages").glob("*/_manifest.json"):
+        # Today's partition only exists once the day is over
+        if not daily_partitions.has_partition_key(manifest.parent.name):
+            continue
+        mtime = manifest.stat().st_mtime
+        if mtime > manifest_mtimes.get(manifest.parent.name, 0):
+            changed[manifest.parent.name] = mtime
+    return changed
+
+
+def _new_images(since: float) -> dict:
+    """Images written after `since`, keyed by path, with their mtime."""
+    return {
+        str(image.relative_to(project_root)): image.stat().st_mtime
+        for image in (RAW_DIR / "images").glob("*/*.jpg")
+        if image.stat().st_mtime > since
+    }
+
+
+def _partitions_referencing(image_paths: set, since: float, exclude: set) -> set:
+    """Partitions whose channel JSON, written after `since`, references one of `image_paths`."""
+    partitions = set()
+    for json_file in (RAW_DIR / "telegram_messages").glob("*/*.json"):
+        partition = json_file.parent.name
+        if json_file.name.startswith("_") or partition in exclude or partition in partitions:
+            continue
+        if not daily_partitions.has_partition_key(partition):
+            continue
+        # The scraper writes a channel's JSON after downloading its images
+        if json_file.stat().st_mtime < since:
+            continue
+        if any(msg.image_path in image_paths for msg in read_messages_file(str(json_file))):
+            partitions.add(partition)
+    return partitions
+
+
+@sensor(
+    job_name="full_pipeline",
+    minimum_interval_seconds=60,
+    description="Load, enrich and transform partitions as soon as the scraper lands new data",
+)
+def raw_data_sensor(context: SensorEvaluationContext):
+    cursor = json.loads(context.cursor) if context.cursor else {}
+    manifest_mtimes = cursor.get("manifests", {})
+    images_mtime = cursor.get("images_mtime", 0)
+
+    changed_manifests = _changed_manifests(manifest_mtimes)
+    new_images = _new_images(images_mtime)
+    if not changed_manifests and not new_images:
+        return SkipReason("No new manifests or images")
+
+    latest_change = max([*changed_manifests.values(), *new_images.values()])
+    if time.time() - latest_change < DEBOUNCE_SECONDS:
+        # Leave the cursor alone; the burst is picked up once it settles
+        return SkipReason(f"Waiting for writes to settle ({DEBOUNCE_SECONDS:.0f}s debounce)")
+
+    image_partitions = set()
+    if new_images:
+        image_partitions = _partitions_referencing(
+            set(new_images), min(new_images.values()), exclude=set(changed_manifests)
+        )
+
+    run_requests = [
+        RunRequest(
+            run_key=f"manifest:{partition}:{mtime}",
+            partition_key=partition,
+            asset_selection=[asset.key for asset in MANIFEST_ASSETS],
+            tags=DBT_RUN_TAGS,
+        )
+        for partition, mtime in sorted(changed_manifests.items())
+    ] + [
+        RunRequest(
+            run_key=f"images:{partition}:{latest_change}",
+            partition_key=partition,
+            asset_selection=[asset.key for asset in IMAGE_ASSETS],
+            tags=DBT_RUN_TAGS,
+        )
+        for partition in sorted(image_partitions)
+    ]
+
+    context.update_cursor(json.dumps({
+        "manifests": {**manifest_mtimes, **changed_manifests},
+        "images_mtime": max([images_mtime, *new_images.values()]),
+    }))
+    if not run_requests:
+        return SkipReason("New images are not referenced by any partition yet")
+    return run_requests
@@ -0,0 +1,407 @@
+"""
+Load-test the analytics API against a seeded local warehouse.
+
+Seeds `dbt_dev` with synthetic marts at a chosen scale (the same tables and
+indexes the dbt project builds), then drives every API endpoint at a fixed
+concurrency and prints p50/p95/p99 latency and requests/s as JSON, so runs
+can be compared across query, index and caching changes.
+
+Examples:
+    # Seed 1M messages, then benchmark a locally running API
+    python scripts/bench_api.py --seed --messages 1000000 --channels 50 --detections 300000
+    uvicorn api.main:app --port 8000 &
+    python scripts/bench_api.py --url http://localhost:8000 --concurrency 32 --output bench.json
+
+WARNING: --seed drops and recreates the mart tables in the target schema.
+Only point it at a local development database.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import logging
+import statistics
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import httpx
+from dotenv import load_dotenv
+from sqlalchemy import create_engine, text
+
+load_dotenv()
+
+logger = logging.getLogger("bench_api")
+
+# Words used both to generate message text and as search keywords
+VOCABULARY = [
+    "paracetamol", "amoxicillin", "ibuprofen", "vitamin", "omeprazole",
+    "metformin", "cream", "lotion", "sunscreen", "syrup", "tablet", "capsule",
+    "ፓራሲታሞል", "መድሃኒት", "ቫይታሚን", "ዋጋ", "ብር",
+]
+
+# Aliases from src/product_mentions.py's PRODUCT_LEXICON that appear in VOCABULARY
+MENTION_ALIASES = {
+    "paracetamol": "paracetamol",
+    "ፓራሲታሞል": "paracetamol",
+    "amoxicillin": "amoxicillin",
+    "ibuprofen": "ibuprofen",
+    "vitamin": "vitamin",
+    "ቫይታሚን": "vitamin",
+    "omeprazole": "omeprazole",
+    "metformin": "metformin",
+    "sunscreen": "sunscreen",
+    "lotion": "moisturizer",
+}
+
+DETECTION_CLASSES = {
+    "Product Display": ["bottle", "cup", "vase", "bowl"],
+    "Lifestyle": ["person", "handbag"],
+    "Promotional": ["cell phone", "book", "laptop"],
+    "Other": ["chair", "car"],
+}
+
+
+# =============================================================================
+# SEEDING
+# =============================================================================
+
+def get_db_engine():
+    db_url = (
+        f"postgresql://{os.getenv('POSTGRES_USER')}:{os.getenv('POSTGRES_PASSWORD')}"
+        f"@{os.getenv('POSTGRES_HOST')}:{os.getenv('POSTGRES_PORT')}/{os.getenv('POSTGRES_DB')}"
+    )
+    return create_engine(db_url)
+
+
+def _sql_literal(value: str) -> str:
+    return "'" + value.replace("'", "''") + "'"
+
+
+def _sql_array(values: List[str]) -> str:
+    return "array[" + ", ".join(_sql_literal(v) for v in values) + "]"
+
+
+def _channel_key(channel_name: str) -> str:
+    """Same expression as the dbt `channel_key` macro, so seeded keys match built ones."""
+    return f"('x' || substr(md5({channel_name}), 1, 15))::bit(60)::bigint"
+
+
+def seed_warehouse(engine, schema: str, messages: int, channels: int, detections: int, days: int) -> None:
+    """Replace the marts in `schema` with synthetic data generated in-database."""
+    words = _sql_array(VOCABULARY)
+    classes = [(image_class, label) for image_class, labels in DETECTION_CLASSES.items() for label in labels]
+    image_classes = _sql_array([c for c, _ in classes])
+    labels = _sql_array([label for _, label in classes])
+    aliases = ", ".join(f"({_sql_literal(alias)}, {_sql_literal(product)})" for alias, product in MENTION_ALIASES.items())
+
+    statements = [
+        f"CREATE SCHEMA IF NOT EXISTS {schema}",
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        *[
+            f"DROP TABLE IF EXISTS {schema}.{table} CASCADE"
+            for table in (
+                "agg_channel_engagement", "agg_channel_daily_activity", "agg_detection_class_counts",
+                "fct_product_mentions", "fct_image_detections", "fct_messages", "dim_channels", "dim_dates",
+                "warehouse_builds",
+            )
+        ],
+        f"""
+        CREATE TABLE {schema}.dim_dates AS
+        SELECT to_char(full_date, 'YYYYMMDD')::int AS date_key, full_date
+        FROM (
+            SELECT (current_date - interval '5 years' + (n || ' days')::interval)::date AS full_date
+            FROM generate_series(0, 365*10) n
+        ) spine
+        """,
+        f"""
+        CREATE TABLE {schema}.fct_messages AS
+        SELECT
+            s.message_id,
+            s.channel_name,
+            {_channel_key("s.channel_name")} AS channel_key,
+            to_char(s.message_date, 'YYYYMMDD')::int AS date_key,
+            s.message_date,
+            s.message_text,
+            to_tsvector('simple', s.message_text) AS search_vector,
+            length(s.message_text) AS message_length,
+            s.view_count,
+            (s.view_count / 50)::int AS forward_count,
+            s.has_media,
+            CASE WHEN s.has_media THEN 'data/raw/images/' || s.channel_name || '/' || s.message_id || '.jpg' END AS image_path,
+            now() AS ingested_at
+        FROM (
+            SELECT
+                g AS message_id,
+                'channel_' || (1 + (g % {channels})) AS channel_name,
+                date_trunc('second', now() - random() * interval '{days} days') AS message_date,
+                concat_ws(' ',
+                    ({words})[1 + floor(random() * {len(VOCABULARY)})::int],
+                    ({words})[1 + floor(random() * {len(VOCABULARY)})::int],
+                    ({words})[1 + floor(random() * {len(VOCABULARY)})::int],
+                    (10 + floor(random() * 990))::int || ' ብር'
+                ) AS message_text,
+                floor(random() * 5000)::int AS view_count,
+                random() < 0.4 AS has_media
+            FROM generate_series(1, {messages}) g
+        ) s
+        """,
+        f"""
+        CREATE TABLE {schema}.dim_channels AS
+        SELECT
+            channel_key,
+            channel_name,
+            'Medical' AS channel_type,
+            min(message_date) AS first_post_date,
+            max(message_date) AS last_post_date,
+            count(*) AS total_posts,
+            avg(view_count) AS avg_views
+        FROM {schema}.fct_messages
+        GROUP BY channel_key, channel_name
+        """,
+        f"""
+        CREATE TABLE {schema}.fct_image_detections AS
+        SELECT
+            m.channel_key,
+            m.channel_name,
+            m.message_id,
+            m.image_path,
+            ({labels})[c.i] AS detection_class,
+            ({image_classes})[c.i] AS image_class,
+            random() AS confidence
+        FROM (
+            SELECT g, 1 + floor(random() * {len(classes)})::int AS i
+            FROM generate_series(1, {detections}) g
+        ) c
+        JOIN {schema}.fct_messages m ON m.message_id = 1 + (c.g % {messages})
+        """,
+        f"""
+        CREATE TABLE {schema}.fct_product_mentions AS
+        SELECT DISTINCT ON (m.channel_name, m.message_id, l.product_name)
+            m.channel_key,
+            m.channel_name,
+            m.message_id,
+            m.date_key,
+            m.message_date,
+            l.product_name,
+            l.alias AS matched_token,
+            CASE WHEN l.alias ~ '^[a-z]' THEN 'latin' ELSE 'ethiopic' END AS script,
+            substring(m.message_text FROM '([0-9]+) ብር')::numeric AS price_birr,
+            now() AS ingested_at
+        FROM {schema}.fct_messages m
+        CROSS JOIN LATERAL regexp_split_to_table(m.message_text, ' ') AS t(token)
+        JOIN (VALUES {aliases}) AS l(alias, product_name) ON l.alias = t.token
+        ORDER BY m.channel_name, m.message_id, l.product_name
+        """,
+        f"""
+        CREATE TABLE {schema}.agg_channel_daily_activity AS
+        SELECT channel_key, date_key,
+               count(*) AS message_count,
+               count(*) FILTER (WHERE has_media) AS media_count,
+               coalesce(sum(view_count), 0) AS total_views,
+               coalesce(sum(forward_count), 0) AS total_forwards
+        FROM {schema}.fct_messages
+        GROUP BY 1, 2
+        """,
+        f"""
+        CREATE TABLE {schema}.agg_channel_engagement AS
+        SELECT c.channel_key, c.channel_name,
+               sum(d.message_count) AS message_count,
+               sum(d.media_count) AS media_count,
+               sum(d.total_views) AS total_views,
+               sum(d.total_forwards) AS total_forwards,
+               sum(d.total_views)::numeric / nullif(sum(d.message_count), 0) AS avg_views
+        FROM {schema}.agg_channel_daily_activity d
+        JOIN {schema}.dim_channels c ON d.channel_key = c.channel_key
+        GROUP BY 1, 2
+        """,
+        f"""
+        CREATE TABLE {schema}.agg_detection_class_counts AS
+        SELECT image_class, detection_class, count(*) AS detection_count
+        FROM {schema}.fct_image_detections
+        GROUP BY 1, 2
+        """,
+        # Indexes the API query plans rely on
+        f"CREATE UNIQUE INDEX ON {schema}.dim_dates (date_key)",
+        f"CREATE UNIQUE INDEX ON {schema}.dim_channels (channel_key)",
+        f"CREATE UNIQUE INDEX ON {schema}.dim_channels (channel_name)",
+        f"CREATE UNIQUE INDEX ON {schema}.fct_messages (channel_name, message_id)",
+        f"CREATE INDEX ON {schema}.fct_messages USING gin (search_vector)",
+        f"CREATE INDEX ON {schema}.fct_messages USING gin (message_text gin_trgm_ops)",
+        f"CREATE INDEX ON {schema}.fct_messages (message_date, message_id, channel_key)",
+        f"CREATE INDEX ON {schema}.fct_messages (channel_key, date_key)",
+        f"CREATE INDEX ON {schema}.fct_image_detections (channel_name, message_id)",
+        f"CREATE INDEX ON {schema}.fct_image_detections (image_class, detection_class)",
+        f"CREATE UNIQUE INDEX ON {schema}.fct_product_mentions (channel_name, message_id, product_name)",
+        f"CREATE INDEX ON {schema}.fct_product_mentions (product_name)",
+        f"CREATE INDEX ON {schema}.fct_product_mentions (channel_key, date_key)",
+        f"CREATE INDEX ON {schema}.fct_messages USING brin (date_key)",
+        f"CREATE UNIQUE INDEX ON {schema}.agg_channel_daily_activity (channel_key, date_key)",
+        f"""
+        CREATE TABLE {schema}.warehouse_builds (
+            invocation_id text primary key,
+            built_at timestamptz not null default now()
+        )
+        """,
+        f"INSERT INTO {schema}.warehouse_builds (invocation_id) VALUES ('bench-seed-' || md5(random()::text))",
+    ]
+
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("ANALYZE"))
+
+    logger.info(f"Seeded {schema}: {messages} messages, {channels} channels, {detections} detections")
+
+
+# =============================================================================
+# LOAD GENERATION
+# =============================================================================
+
+def build_requests(channels: int, messages: int) -> Dict[str, Callable]:
+    """Endpoint name -> factory returning `(method, path, kwargs)` for one request."""
+    return {
+        "health": lambda: ("GET", "/health", {}),
+        "channels_activity": lambda: ("GET", "/channels/activity", {}),
+        "products_top": lambda: ("GET", "/products/top", {}),
+        "products_mentions": lambda: ("GET", "/products/mentions", {"params": {"limit": random.choice([10, 50])}}),
+        "visual_stats": lambda: ("GET", "/visual/stats", {}),
+        "messages_search": lambda: (
+            "GET", "/messages/search", {"params": {"keyword": random.choice(VOCABULARY)}}
+        ),
+        "messages_search_recent": lambda: (
+            "GET", "/messages/search",
+            {"params": {"keyword": random.choice(VOCABULARY), "sort": "recent", "limit": 100}},
+        ),
+        "channel_trend": lambda: (
+            "GET", f"/channels/channel_{random.randint(1, channels)}/activity",
+            {"params": {"granularity": random.choice(["day", "week", "month"])}},
+        ),
+        "messages_batch": lambda: (
+            "POST", "/messages/batch",
+            {"json": {"messages": [
+                # Seeded message ids map to channel 1 + id % channels
+                {"channel_name": f"channel_{1 + message_id % channels}", "message_id": message_id}
+                for message_id in random.sample(range(1, messages + 1), min(200, messages))
+            ]}},
+        ),
+    }
+
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+async def bench_endpoint(client: httpx.AsyncClient, make_request, requests: int, concurrency: int) -> dict:
+    latencies: List[float] = []
+    errors = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors
+        while remaining > 0:
+            remaining -= 1
+            method, path, kwargs = make_request()
+            start = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                if response.status_code >= 400:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2) if latencies else 0.0,
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def run_benchmark(
+    url: str, requests: int, concurrency: int, warmup: int, channels: int, messages: int, only: List[str]
+) -> dict:
+    endpoints = build_requests(channels, messages)
+    if only:
+        endpoints = {name: make for name, make in endpoints.items() if name in only}
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    results = {}
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=60) as client:
+        for name, make_request in endpoints.items():
+            if warmup:
+                await bench_endpoint(client, make_request, warmup, concurrency)
+            logger.info(f"Benchmarking {name} ({requests} requests, concurrency={concurrency})")
+            results[name] = await bench_endpoint(client, make_request, requests, concurrency)
+    return results
+
+
+# =============================================================================
+# MAIN ENTRY POINT
+# =============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Seed a local warehouse and benchmark the analytics API")
+    parser.add_argument("--seed", action="store_true", help="Drop and reseed the mart tables before benchmarking")
+    parser.add_argument("--seed-only", action="store_true", help="Seed and exit without benchmarking")
+    parser.add_argument("--schema", default="dbt_dev", help="Schema the API reads from (default: dbt_dev)")
+    parser.add_argument("--messages", type=int, default=100_000, help="Synthetic messages (default: 100000)")
+    parser.add_argument("--channels", type=int, default=20, help="Synthetic channels (default: 20)")
+    parser.add_argument("--detections", type=int, default=30_000, help="Synthetic detections (default: 30000)")
+    parser.add_argument("--days", type=int, default=365, help="Days of history to spread messages over (default: 365)")
+    parser.add_argument("--url", default="http://localhost:8000", help="API base URL (default: http://localhost:8000)")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint (default: 500)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent in-flight requests (default: 16)")
+    parser.add_argument("--warmup", type=int, default=20, help="Unmeasured requests per endpoint (default: 20)")
+    parser.add_argument("--endpoint", action="append", default=[], help="Only benchmark these endpoint names")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s", stream=sys.stderr)
+
+    if args.seed or args.seed_only:
+        seed_warehouse(get_db_engine(), args.schema, args.messages, args.channels, args.detections, args.days)
+        if args.seed_only:
+            sys.exit(0)
+
+    report = {
+        "run_utc": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "url": args.url,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+            "seeded_scale": (
+                {"messages": args.messages, "channels": args.channels, "detections": args.detections}
+                if args.seed else None
+            ),
+        },
+        "endpoints": asyncio.run(
+            run_benchmark(
+                args.url, args.requests, args.concurrency, args.warmup,
+                args.channels, args.messages, args.endpoint,
+            )
+        ),
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
@@ -0,0 +1,199 @@
+"""
+Benchmark the Telegram scrapers offline against a replay client.
+
+Runs `scripts/telegram.py` and/or `src/scraper.py` end to end (entity
+lookups, history paging, photo downloads, JSON/CSV writes and manifests)
+against `src/replay_client.py` instead of Telegram, with simulated latency,
+photo sizes and injected FloodWaitErrors, and prints messages/s and
+images/s as JSON so runs can be compared across scraper changes.
+
+Both scrapers replay identical channels, each into its own output
+directory (a temporary one unless --path is given).
+
+Examples:
+    # 5 synthetic channels x 1000 messages, 50ms round trips, 2 MB/s downloads
+    python scripts/bench_scraper.py --channels 5 --messages 1000 --latency 0.05 --bandwidth-kbps 2000
+
+    # FloodWait handling: every 30th request asks for a 2s wait the client won't sleep through
+    python scripts/bench_scraper.py --flood-every 30 --flood-seconds 2 --flood-sleep-threshold 0
+
+    # Replay what was scraped into the local data lake
+    python scripts/bench_scraper.py --from-lake data --scraper scripts
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import asyncio
+import argparse
+import logging
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+from datetime import datetime, timezone
+
+# Allow running this file directly: `python scripts/bench_scraper.py`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# The scrapers open log files under logs/ on import, and must not hand
+# replayed images to the real detection queue
+os.makedirs("logs", exist_ok=True)
+os.environ["DETECTION_QUEUE_ENABLED"] = "0"
+
+from scripts.telegram import scrape_all_channels
+from src.datalake import manifest_path
+from src.replay_client import ReplayTelegramClient
+from src.scraper import TelegramScraper
+
+logger = logging.getLogger("bench_scraper")
+
+
+def build_client(args) -> ReplayTelegramClient:
+    options = dict(
+        request_latency=args.latency,
+        latency_jitter=args.jitter,
+        download_bandwidth=args.bandwidth_kbps * 1024 if args.bandwidth_kbps else None,
+        flood_every=args.flood_every,
+        flood_rate=args.flood_rate,
+        flood_seconds=args.flood_seconds,
+        flood_sleep_threshold=args.flood_sleep_threshold,
+        photo_kb=tuple(args.photo_kb),
+        seed=args.seed,
+    )
+    if args.from_lake:
+        return ReplayTelegramClient.from_lake(args.from_lake, channels=args.channel or None, **options)
+    return ReplayTelegramClient.synthetic(
+        channels=args.channels,
+        messages_per_channel=args.messages,
+        photo_ratio=args.photo_ratio,
+        days=args.days,
+        **options,
+    )
+
+
+async def run_scripts_scraper(client: ReplayTelegramClient, base_path: str, args) -> None:
+    async with client:
+        await scrape_all_channels(
+            client,
+            [f"@{name}" for name in client.channel_names],
+            base_path,
+            args.limit,
+            message_delay=args.message_delay,
+            channel_delay=args.channel_delay,
+            date_str=args.date,
+        )
+
+
+async def run_src_scraper(client: ReplayTelegramClient, base_path: str, args) -> None:
+    scraper = TelegramScraper(
+        None, None, "replay",
+        date_str=args.date,
+        base_path=base_path,
+        client=client,
+        channels=[f"https://t.me/{name}" for name in client.channel_names],
+    )
+    await scraper.run()
+
+
+SCRAPERS = {
+    "scripts": run_scripts_scraper,
+    "src": run_src_scraper,
+}
+
+
+def bench_scraper(name: str, args, base_path: str) -> dict:
+    client = build_client(args)
+    logger.info(f"Benchmarking {name} scraper on {len(client.channel_names)} channels into {base_path}")
+
+    # src/scraper.py prints progress; keep stdout for the JSON report
+    started = time.perf_counter()
+    with redirect_stdout(sys.stderr):
+        asyncio.run(SCRAPERS[name](client, base_path, args))
+    elapsed = time.perf_counter() - started
+
+    partition = args.date or datetime.now().strftime("%Y-%m-%d")
+    with open(manifest_path(base_path, partition), "r", encoding="utf-8") as f:
+        messages = json.load(f)["total_messages"]
+    images = sum(1 for _ in Path(base_path, "raw", "images").glob("*/*.jpg"))
+
+    return {
+        "seconds": round(elapsed, 3),
+        "messages": messages,
+        "images": images,
+        "messages_per_second": round(messages / elapsed, 2) if elapsed else 0.0,
+        "images_per_second": round(images / elapsed, 2) if elapsed else 0.0,
+        "client": client.stats,
+    }
+
+
+# =============================================================================
+# MAIN ENTRY POINT
+# =============================================================================
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the Telegram scrapers against an offline replay client")
+    parser.add_argument("--scraper", choices=["scripts", "src", "both"], default="both",
+                        help="scripts/telegram.py, src/scraper.py or both (default: both)")
+    parser.add_argument("--from-lake", metavar="PATH", help="Replay channels recorded in this data directory")
+    parser.add_argument("--channel", action="append", default=[], help="With --from-lake, only replay these channels")
+    parser.add_argument("--channels", type=int, default=5, help="Synthetic channels (default: 5)")
+    parser.add_argument("--messages", type=int, default=500, help="Synthetic messages per channel (default: 500)")
+    parser.add_argument("--photo-ratio", type=float, default=0.4, help="Share of synthetic messages with a photo (default: 0.4)")
+    parser.add_argument("--photo-kb", type=int, nargs=2, default=[40, 250], metavar=("MIN", "MAX"),
+                        help="Synthetic photo size range in KB (default: 40 250)")
+    parser.add_argument("--days", type=int, default=30, help="Days synthetic messages are spread over (default: 30)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per simulated API request (default: 0)")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random seconds per request (default: 0)")
+    parser.add_argument("--bandwidth-kbps", type=float, default=0, help="Photo download speed in KB/s (default: unlimited)")
+    parser.add_argument("--flood-every", type=int, default=0, help="Inject a FloodWaitError every N requests")
+    parser.add_argument("--flood-rate", type=float, default=0.0, help="Probability of a FloodWaitError per request")
+    parser.add_argument("--flood-seconds", type=int, default=2, help="Wait each injected FloodWaitError asks for (default: 2)")
+    parser.add_argument("--flood-sleep-threshold", type=int, default=60,
+                        help="Waits up to this long are slept through by the client, like Telethon (default: 60)")
+    parser.add_argument("--date", help="Scrape this partition (YYYY-MM-DD) instead of the latest messages")
+    parser.add_argument("--limit", type=int, default=200,
+                        help="scripts/telegram.py messages per channel (default: 200, the fixed limit of src/scraper.py)")
+    parser.add_argument("--message-delay", type=float, default=0.0, help="scripts/telegram.py delay between messages (default: 0)")
+    parser.add_argument("--channel-delay", type=float, default=0.0, help="scripts/telegram.py delay between channels (default: 0)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed for data, latency and flood injection (default: 0)")
+    parser.add_argument("--path", help="Keep scraper output under this directory instead of a temporary one")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s", stream=sys.stderr, force=True)
+
+    names = list(SCRAPERS) if args.scraper == "both" else [args.scraper]
+    root = args.path or tempfile.mkdtemp(prefix="bench_scraper_")
+    try:
+        results = {name: bench_scraper(name, args, os.path.join(root, name)) for name in names}
+    finally:
+        if not args.path:
+            shutil.rmtree(root, ignore_errors=True)
+
+    report = {
+        "run_utc": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "source": args.from_lake or "synthetic",
+            "channels": args.channels if not args.from_lake else args.channel or None,
+            "messages_per_channel": args.messages if not args.from_lake else None,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "bandwidth_kbps": args.bandwidth_kbps or None,
+            "flood_every": args.flood_every,
+            "flood_rate": args.flood_rate,
+            "flood_seconds": args.flood_seconds,
+            "date": args.date,
+            "limit": args.limit,
+        },
+        "scrapers": results,
+    }
+
+    output = json.dumps(report, indent=2, ensure_ascii=False)
+    print(output)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
@@ -9,7 +9,7 @@ import logging
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import List, Optional
+from typing import List, Optional, Tuple
 from dotenv import load_dotenv
 from telethon import TelegramClient
 from telethon.errors import FloodWaitError
@@ -21,7 +21,9 @@ PROJECT_ROOT = Path(__file__).resolve().parents[1]
 if str(PROJECT_ROOT) not in sys.path:
     sys.path.insert(0, str(PROJECT_ROOT))
 
-from src.datalake import write_channel_messages_json, write_manifest
+from src.datalake import partition_bounds, write_channel_messages_json, write_manifest
+from src.detection_worker import QUEUE_ENABLED, enqueue_images, queue_db_path
+from src.records import TelegramMessage
 
 # =============================================================================
 # CONFIGURATION
@@ -29,19 +31,11 @@ from src.datalake import write_channel_messages_json, write_manifest
 
 load_dotenv()
 
-# Validate required environment variables before proceeding
+# Credentials; validated when run as a script, so the scraping functions
+# can be imported (e.g. by scripts/bench_scraper.py) without them
 api_id_str = os.getenv("api_id_str")
 api_hash = os.getenv("api_hash")
 
-if not api_id_str or not api_hash:
-    print("ERROR: Missing Tg_API_ID or Tg_API_HASH in .env file")
-    print("Create a .env file with:")
-    print("  Tg_API_ID=your_api_id")
-    print("  Tg_API_HASH=your_api_hash")
-    sys.exit(1)
-
-api_id = int(api_id_str)
-
 # Date string for partitioning output files
 TODAY = datetime.today().strftime("%Y-%m-%d")
 
@@ -88,6 +82,7 @@ async def scrape_channel(
     message_delay: float = DEFAULT_MESSAGE_DELAY,
     channel_delay: float = DEFAULT_CHANNEL_DELAY,
     max_retries: int = 3,
+    day_bounds: Optional[Tuple[datetime, datetime]] = None,
 ) -> int:
     """
     Scrape a single Telegram channel and save messages + images.
@@ -99,6 +94,7 @@ async def scrape_channel(
         image_dir: Directory to save downloaded images
         json_save_dir: Directory to save JSON output
         limit: Maximum number of messages to scrape (default 100)
+        day_bounds: UTC [start, end) to scrape instead of the latest `limit` messages
     
     Returns:
         Number of messages scraped
@@ -118,10 +114,19 @@ async def scrape_channel(
             channel_image_dir = os.path.join(base_path, "raw", "images", channel_name)
             os.makedirs(channel_image_dir, exist_ok=True)
 
-            logger.info(f"Starting scrape of {channel} (limit={limit})")
+            if day_bounds:
+                # Walk back from the end of the day; stop once past its start
+                logger.info(f"Starting scrape of {channel} ({date_str})")
+                message_iter = client.iter_messages(entity, offset_date=day_bounds[1])
+            else:
+                logger.info(f"Starting scrape of {channel} (limit={limit})")
+                message_iter = client.iter_messages(entity, limit=limit)
 
             # Iterate through channel messages (newest first by default)
-            async for message in client.iter_messages(entity, limit=limit):
+            async for message in message_iter:
+                if day_bounds and message.date < day_bounds[0]:
+                    break
+
                 image_path: Optional[str] = None
                 has_media = message.media is not None
 
@@ -136,33 +141,33 @@ async def scrape_channel(
                         logger.warning(f"Failed to download image for message {message.id}: {e}")
                         image_path = None
 
-                # Build message dict with all required fields
-                message_dict = {
-                    "message_id": message.id,
-                    "channel_name": channel_name,
-                    "channel_title": channel_title,
-                    "message_date": message.date.isoformat(),  # ISO format for consistency
-                    "message_text": message.message or "",     # Handle None text
-                    "has_media": has_media,
-                    "image_path": image_path,
-                    "views": message.views or 0,               # Some messages may not have views
-                    "forwards": message.forwards or 0,
-                }
+                # Build the typed record with all required fields
+                record = TelegramMessage(
+                    message_id=message.id,
+                    channel_name=channel_name,
+                    channel_title=channel_title,
+                    message_date=message.date,
+                    message_text=message.message or "",     # Handle None text
+                    has_media=has_media,
+                    image_path=image_path,
+                    views=message.views or 0,               # Some messages may not have views
+                    forwards=message.forwards or 0,
+                )
 
                 # Write to CSV (backup/alternative format)
                 writer.writerow([
-                    message_dict["message_id"],
-                    message_dict["channel_name"],
-                    message_dict["channel_title"],
-                    message_dict["message_date"],
-                    message_dict["message_text"],
-                    message_dict["has_media"],
-                    message_dict["image_path"],
-                    message_dict["views"],
-                    message_dict["forwards"],
+                    record.message_id,
+                    record.channel_name,
+                    record.channel_title,
+                    record.message_date.isoformat(),  # ISO format for consistency
+                    record.message_text,
+                    record.has_media,
+                    record.image_path,
+                    record.views,
+                    record.forwards,
                 ])
 
-                messages.append(message_dict)
+                messages.append(record)
 
                 # Optional delay between messages (reduces risk of rate limiting).
                 if message_delay and message_delay > 0:
@@ -175,6 +180,13 @@ async def scrape_channel(
                 messages=messages,
             )
 
+            # Hand the channel's images to the detection worker in one transaction
+            if QUEUE_ENABLED:
+                enqueue_images(
+                    [(record.image_path, channel_name) for record in messages if record.image_path],
+                    db_path=queue_db_path(base_path),
+                )
+
             logger.info(f"Finished scraping {channel}: {len(messages)} messages saved")
 
             # Delay between channels (recommended).
@@ -205,6 +217,7 @@ async def scrape_all_channels(
     limit: int = 100,
     message_delay: float = DEFAULT_MESSAGE_DELAY,
     channel_delay: float = DEFAULT_CHANNEL_DELAY,
+    date_str: Optional[str] = None,
 ) -> dict:
     """
     Scrape multiple Telegram channels and organize output.
@@ -214,6 +227,8 @@ async def scrape_all_channels(
         channels: List of channel usernames to scrape
         base_path: Base directory for all output (e.g., 'data')
         limit: Max messages per channel
+        date_str: Partition (YYYY-MM-DD) to scrape in full; defaults to the
+            latest `limit` messages, stored under today's partition
     
     Returns:
         Dict with scraping statistics per channel
@@ -221,9 +236,12 @@ async def scrape_all_channels(
     await client.start()
     logger.info(f"Client authenticated. Scraping {len(channels)} channels...")
     
+    partition_date = date_str or TODAY
+    day_bounds = partition_bounds(date_str) if date_str else None
+
     # Setup output directories following challenge spec
-    csv_dir = os.path.join(base_path, "raw", "csv", TODAY)
-    json_dir = os.path.join(base_path, "raw", "telegram_messages", TODAY)
+    csv_dir = os.path.join(base_path, "raw", "csv", partition_date)
+    json_dir = os.path.join(base_path, "raw", "telegram_messages", partition_date)
     image_dir = os.path.join(base_path, "raw", "images")
     
     os.makedirs(csv_dir, exist_ok=True)
@@ -258,17 +276,18 @@ async def scrape_all_channels(
                 channel=channel,
                 writer=writer,
                 base_path=base_path,
-                date_str=TODAY,
+                date_str=partition_date,
                 limit=limit,
                 message_delay=message_delay,
                 channel_delay=channel_delay,
+                day_bounds=day_bounds,
             )
             stats[channel] = count
             channel_counts[channel.strip("@")] = count
 
         write_manifest(
             base_path=base_path,
-            date_str=TODAY,
+            date_str=partition_date,
             channel_message_counts=channel_counts,
         )
     
@@ -292,6 +311,7 @@ if __name__ == "__main__":
         epilog="""
 Examples:
     python scripts/telegram.py --path data --limit 500
+    python scripts/telegram.py --date 2026-01-15  # Every message posted that day (UTC)
     python scripts/telegram.py  # Uses defaults: data/, 1000 messages
         """
     )
@@ -319,7 +339,23 @@ Examples:
         default=DEFAULT_CHANNEL_DELAY,
         help="Pause (seconds) after finishing a channel (default: 3)"
     )
+    parser.add_argument(
+        "--date",
+        type=str,
+        default=None,
+        help="Scrape every message posted on this day (YYYY-MM-DD, UTC) into its partition"
+    )
     args = parser.parse_args()
+
+    # Validate required environment variables before proceeding
+    if not api_id_str or not api_hash:
+        print("ERROR: Missing Tg_API_ID or Tg_API_HASH in .env file")
+        print("Create a .env file with:")
+        print("  Tg_API_ID=your_api_id")
+        print("  Tg_API_HASH=your_api_hash")
+        sys.exit(1)
+
+    api_id = int(api_id_str)
     
     # Initialize Telegram client
     # Session file stores auth so you don't need to re-login each time
@@ -345,6 +381,7 @@ Examples:
                 args.limit,
                 message_delay=args.message_delay,
                 channel_delay=args.channel_delay,
+                date_str=args.date,
             )
 
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,169 @@
+"""
+Data lake compaction.
+
+Merges the daily `data/raw/telegram_messages/YYYY-MM-DD/{channel}.json`
+files of months that are old enough into one file per channel and month
+under `data/raw/telegram_messages_compacted/YYYY-MM/{channel}.json`, then
+refreshes the lake index (`data/raw/_lake_index.json`) that lets readers
+prune files by channel, date or message id without opening them.
+
+Partition manifests stay where they are as the audit trail of each scrape;
+only the channel files are merged away. Each compacted message keeps the
+partition it came from in `source_partition`, so a partition can still be
+reloaded or re-detected on its own. Re-running is safe: messages are
+deduplicated by `message_id`, the most recently scraped copy winning.
+
+Usage:
+    python src/compaction.py --keep-days 7
+    python src/compaction.py --index-only
+"""
+
+import os
+import sys
+import json
+import argparse
+import logging
+from pathlib import Path
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import msgspec
+
+# Allow running this file directly: `python src/compaction.py`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.datalake import (
+    compacted_messages_json_path,
+    partition_message_files,
+    refresh_lake_index,
+)
+from src.records import TelegramMessage, read_messages_file, write_messages_file
+
+# Days a partition stays in the daily layout after its month has ended,
+# leaving room for late rescrapes and reprocessing
+DEFAULT_KEEP_DAYS = int(os.getenv('LAKE_COMPACT_KEEP_DAYS', '7'))
+
+logger = logging.getLogger("compaction")
+
+
+def compactable_months(base_path: str, keep_days: int = DEFAULT_KEEP_DAYS, today: Optional[date] = None) -> Dict[str, List[str]]:
+    """
+    Months whose last day is more than `keep_days` ago, with the daily
+    partitions that still hold channel files.
+    """
+    # Partitions are named by UTC day
+    today = today or datetime.now(timezone.utc).date()
+    cutoff = today - timedelta(days=keep_days)
+    root = os.path.join(base_path, 'raw', 'telegram_messages')
+    if not os.path.isdir(root):
+        return {}
+
+    months: Dict[str, List[str]] = {}
+    for partition in sorted(os.listdir(root)):
+        try:
+            day = datetime.strptime(partition, '%Y-%m-%d').date()
+        except ValueError:
+            continue
+        month_end = (day.replace(day=28) + timedelta(days=4)).replace(day=1) - timedelta(days=1)
+        if month_end < cutoff and partition_message_files(base_path, partition):
+            months.setdefault(day.strftime('%Y-%m'), []).append(partition)
+    return months
+
+
+def compact_month(base_path: str, month: str, partitions: List[str], dry_run: bool = False) -> dict:
+    """Merge one month's daily channel files into per-channel monthly files."""
+    sources: Dict[str, List[str]] = {}
+    for partition in sorted(partitions):
+        for path in partition_message_files(base_path, partition):
+            channel_name = os.path.splitext(os.path.basename(path))[0]
+            sources.setdefault(channel_name, []).append(path)
+
+    rows = 0
+    skipped = 0
+    for channel_name, paths in sorted(sources.items()):
+        out_path = compacted_messages_json_path(base_path, month, channel_name)
+
+        # Earlier compactions first, so newer scrapes of a message replace them
+        messages: Dict[int, TelegramMessage] = {}
+        if os.path.exists(out_path):
+            messages.update((msg.message_id, msg) for msg in read_messages_file(out_path))
+        compacted = []
+        for path in paths:
+            # A file with invalid rows stays in place rather than losing them
+            try:
+                file_messages = read_messages_file(path, strict=True)
+            except msgspec.ValidationError as e:
+                logger.error(f"Not compacting {path}, it has an invalid message: {e}")
+                continue
+            # Remembered so `--date` loads can still pick out this partition
+            partition = os.path.basename(os.path.dirname(path))
+            for msg in file_messages:
+                msg.source_partition = partition
+                messages[msg.message_id] = msg
+            compacted.append(path)
+
+        merged = sorted(messages.values(), key=lambda msg: (msg.message_date, msg.message_id))
+        rows += len(merged)
+        skipped += len(paths) - len(compacted)
+        if dry_run or not compacted:
+            continue
+
+        tmp_path = out_path + '.tmp'
+        write_messages_file(tmp_path, merged)
+        os.replace(tmp_path, out_path)
+        # Only drop the daily files once the merged file is in place
+        for path in compacted:
+            os.remove(path)
+        logger.info(f"Compacted {len(compacted)} files into {out_path} ({len(merged)} messages)")
+
+    return {
+        'month': month,
+        'partitions': len(partitions),
+        'channels': len(sources),
+        'source_files': sum(len(paths) for paths in sources.values()),
+        'rows': rows,
+        'skipped_files': skipped,
+    }
+
+
+def run_compaction(base_path: str = 'data', keep_days: int = DEFAULT_KEEP_DAYS, dry_run: bool = False) -> dict:
+    """Compact every eligible month, then refresh the lake index."""
+    months = compactable_months(base_path, keep_days)
+    results = [
+        compact_month(base_path, month, partitions, dry_run=dry_run)
+        for month, partitions in sorted(months.items())
+    ]
+    index = {} if dry_run else refresh_lake_index(base_path)
+    return {
+        'months': results,
+        'source_files': sum(result['source_files'] for result in results),
+        'skipped_files': sum(result['skipped_files'] for result in results),
+        'indexed_files': len(index),
+        'indexed_bytes': sum(entry['bytes'] for entry in index.values()),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Compact old daily partitions and refresh the lake index")
+    parser.add_argument("--path", default="data", help="Base data directory (default: data)")
+    parser.add_argument("--keep-days", type=int, default=DEFAULT_KEEP_DAYS,
+                        help=f"Leave months that ended within this many days alone (default: {DEFAULT_KEEP_DAYS})")
+    parser.add_argument("--dry-run", action="store_true", help="Report what would be compacted without writing")
+    parser.add_argument("--index-only", action="store_true", help="Only refresh the lake index")
+    args = parser.parse_args()
+
+    os.makedirs('logs', exist_ok=True)
+    logging.basicConfig(
+        filename='logs/compaction.log',
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    if args.index_only:
+        print(f"Indexed {len(refresh_lake_index(args.path))} files")
+    else:
+        summary = run_compaction(args.path, keep_days=args.keep_days, dry_run=args.dry_run)
+        # Printed as JSON so the Dagster asset can read it back
+        print(json.dumps(summary))
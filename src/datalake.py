@@ -1,7 +1,18 @@
+import hashlib
 import json
 import os
-from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from src.records import (
+    EngagementSnapshot,
+    TelegramMessage,
+    decode_messages,
+    read_messages_file,
+    read_snapshots_file,
+    write_messages_file,
+    write_snapshots_file,
+)
 
 
 def ensure_dir(path: str) -> None:
@@ -12,6 +23,62 @@ def telegram_messages_partition_dir(base_path: str, date_str: str) -> str:
     return os.path.join(base_path, "raw", "telegram_messages", date_str)
 
 
+def partition_bounds(date_str: str) -> Tuple[datetime, datetime]:
+    """UTC [start, end) of the messages that belong to a daily partition."""
+
+    start = datetime.strptime(date_str, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return start, start + timedelta(days=1)
+
+
+def partition_message_files(base_path: str, date_str: str) -> List[str]:
+    """Channel JSON files of a partition, excluding `_`-prefixed metadata files."""
+
+    partition_dir = telegram_messages_partition_dir(base_path, date_str)
+    if not os.path.isdir(partition_dir):
+        return []
+    return sorted(
+        os.path.join(partition_dir, name)
+        for name in os.listdir(partition_dir)
+        if name.endswith(".json") and not name.startswith("_")
+    )
+
+
+def iter_partition_messages(base_path: str, date_str: str) -> Iterator[Tuple[str, List[TelegramMessage]]]:
+    """
+    `(file_path, messages)` for every channel file of a partition. Once the
+    partition has been compacted, the messages it held are read back from its
+    month's compacted files.
+    """
+
+    daily_files = partition_message_files(base_path, date_str)
+    for file_path in daily_files:
+        yield file_path, read_messages_file(file_path)
+    if daily_files:
+        return
+
+    index = load_lake_index(base_path)
+    for file_path in compacted_message_files(base_path, date_str[:7]):
+        entry = index.get(os.path.relpath(file_path, base_path))
+        if entry and "partitions" in entry and date_str not in entry["partitions"]:
+            continue
+        messages = [msg for msg in read_messages_file(file_path) if source_partition(msg) == date_str]
+        if messages:
+            yield file_path, messages
+
+
+def partition_image_paths(base_path: str, date_str: str) -> List[Tuple[str, str]]:
+    """`(image_path, channel_name)` of every downloaded image referenced by a partition."""
+
+    images = []
+    for _, messages in iter_partition_messages(base_path, date_str):
+        images.extend(
+            (msg.image_path, msg.channel_name)
+            for msg in messages
+            if msg.image_path and os.path.exists(msg.image_path)
+        )
+    return images
+
+
 def telegram_images_dir(base_path: str) -> str:
     return os.path.join(base_path, "raw", "images")
 
@@ -27,13 +94,12 @@ def write_channel_messages_json(
     base_path: str,
     date_str: str,
     channel_name: str,
-    messages: List[Dict[str, Any]],
+    messages: Iterable[TelegramMessage],
 ) -> str:
     """Write messages for a (date, channel) partition to the raw data lake."""
 
     out_path = channel_messages_json_path(base_path, date_str, channel_name)
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(messages, f, ensure_ascii=False, indent=2)
+    write_messages_file(out_path, messages)
     return out_path
 
 
@@ -65,3 +131,266 @@ def write_manifest(
     with open(out_path, "w", encoding="utf-8") as f:
         json.dump(payload, f, ensure_ascii=False, indent=2)
     return out_path
+
+
+def engagement_snapshots_partition_dir(base_path: str, date_str: str) -> str:
+    return os.path.join(base_path, "raw", "engagement_snapshots", date_str)
+
+
+def engagement_snapshot_dates(base_path: str) -> List[str]:
+    """Capture dates that have a snapshot partition, oldest first."""
+
+    root = os.path.join(base_path, "raw", "engagement_snapshots")
+    if not os.path.isdir(root):
+        return []
+    return sorted(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
+
+
+def partition_snapshot_files(base_path: str, date_str: str) -> List[str]:
+    """Channel snapshot files captured on `date_str`."""
+
+    partition_dir = engagement_snapshots_partition_dir(base_path, date_str)
+    if not os.path.isdir(partition_dir):
+        return []
+    return sorted(
+        os.path.join(partition_dir, name)
+        for name in os.listdir(partition_dir)
+        if name.endswith(".json") and not name.startswith("_")
+    )
+
+
+def append_engagement_snapshots(
+    *,
+    base_path: str,
+    date_str: str,
+    channel_name: str,
+    snapshots: Iterable[EngagementSnapshot],
+) -> str:
+    """Add snapshots to a (capture date, channel) file, so refreshes during a day accumulate."""
+
+    partition_dir = engagement_snapshots_partition_dir(base_path, date_str)
+    ensure_dir(partition_dir)
+    out_path = os.path.join(partition_dir, f"{channel_name}.json")
+    existing = read_snapshots_file(out_path) if os.path.exists(out_path) else []
+
+    tmp_path = out_path + ".tmp"
+    write_snapshots_file(tmp_path, existing + list(snapshots))
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+LAKE_INDEX_FILE = "_lake_index.json"
+
+
+def telegram_messages_compacted_dir(base_path: str, month: str) -> str:
+    return os.path.join(base_path, "raw", "telegram_messages_compacted", month)
+
+
+def compacted_messages_json_path(base_path: str, month: str, channel_name: str) -> str:
+    compacted_dir = telegram_messages_compacted_dir(base_path, month)
+    ensure_dir(compacted_dir)
+    return os.path.join(compacted_dir, f"{channel_name}.json")
+
+
+def compacted_message_files(base_path: str, month: str) -> List[str]:
+    """Compacted channel files of a month (YYYY-MM)."""
+
+    compacted_dir = telegram_messages_compacted_dir(base_path, month)
+    if not os.path.isdir(compacted_dir):
+        return []
+    return sorted(
+        os.path.join(compacted_dir, name)
+        for name in os.listdir(compacted_dir)
+        if name.endswith(".json") and not name.startswith("_")
+    )
+
+
+def lake_index_path(base_path: str) -> str:
+    return os.path.join(base_path, "raw", LAKE_INDEX_FILE)
+
+
+def message_day(message: TelegramMessage) -> str:
+    """UTC day (YYYY-MM-DD) a message was posted."""
+
+    posted = message.message_date
+    if posted.tzinfo is not None:
+        posted = posted.astimezone(timezone.utc)
+    return posted.strftime("%Y-%m-%d")
+
+
+def source_partition(message: TelegramMessage) -> str:
+    """
+    Daily partition a message was scraped into. Messages compacted before
+    this was recorded fall back to the day they were posted.
+    """
+
+    return message.source_partition or message_day(message)
+
+
+def lake_message_files(base_path: str) -> List[Tuple[str, str]]:
+    """`(layout, path)` of every daily and compacted channel file in the lake."""
+
+    files = []
+    for layout, root in (
+        ("daily", os.path.join(base_path, "raw", "telegram_messages")),
+        ("monthly", os.path.join(base_path, "raw", "telegram_messages_compacted")),
+    ):
+        if not os.path.isdir(root):
+            continue
+        for partition in sorted(os.listdir(root)):
+            partition_dir = os.path.join(root, partition)
+            if not os.path.isdir(partition_dir):
+                continue
+            files.extend(
+                (layout, os.path.join(partition_dir, name))
+                for name in sorted(os.listdir(partition_dir))
+                if name.endswith(".json") and not name.startswith("_")
+            )
+    return files
+
+
+def describe_messages_file(path: str, layout: str) -> Dict[str, Any]:
+    """Index entry for one channel file: what it holds and how to verify it."""
+
+    with open(path, "rb") as f:
+        raw = f.read()
+    messages = decode_messages(raw, source=path)
+    days = [message_day(msg) for msg in messages]
+    message_ids = [msg.message_id for msg in messages]
+    partition = os.path.basename(os.path.dirname(path))
+    return {
+        "layout": layout,
+        "partition": partition,
+        # Daily partitions the file's messages were scraped into
+        "partitions": sorted({source_partition(msg) for msg in messages}) if layout == "monthly" else [partition],
+        "channel": os.path.splitext(os.path.basename(path))[0],
+        "date_min": min(days) if days else None,
+        "date_max": max(days) if days else None,
+        "message_id_min": min(message_ids) if message_ids else None,
+        "message_id_max": max(message_ids) if message_ids else None,
+        "rows": len(messages),
+        "bytes": len(raw),
+        "sha256": hashlib.sha256(raw).hexdigest(),
+        "mtime": os.path.getmtime(path),
+    }
+
+
+def load_lake_index(base_path: str) -> Dict[str, Dict[str, Any]]:
+    """Index entries keyed by file path relative to `base_path` ({} if not built yet)."""
+
+    index_path = lake_index_path(base_path)
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, "r", encoding="utf-8") as f:
+        return json.load(f)["files"]
+
+
+def refresh_lake_index(base_path: str) -> Dict[str, Dict[str, Any]]:
+    """
+    Bring the lake index up to date, re-reading only files that are new or
+    whose size or mtime changed, and dropping entries for deleted files.
+    """
+
+    previous = load_lake_index(base_path)
+    entries: Dict[str, Dict[str, Any]] = {}
+    for layout, path in lake_message_files(base_path):
+        rel_path = os.path.relpath(path, base_path)
+        entry = previous.get(rel_path)
+        stat = os.stat(path)
+        if entry is None or entry["bytes"] != stat.st_size or entry["mtime"] != stat.st_mtime:
+            entry = describe_messages_file(path, layout)
+        entries[rel_path] = entry
+
+    index_path = lake_index_path(base_path)
+    ensure_dir(os.path.dirname(index_path))
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(
+            {"updated_utc": datetime.now(timezone.utc).isoformat(), "files": entries},
+            f,
+            ensure_ascii=False,
+            indent=2,
+        )
+    os.replace(tmp_path, index_path)
+    return entries
+
+
+def _overlaps(low: Any, high: Any, start: Any, end: Any) -> bool:
+    if low is None or high is None:
+        return True
+    return (start is None or high >= start) and (end is None or low <= end)
+
+
+def select_lake_files(
+    base_path: str,
+    *,
+    channel: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    min_message_id: Optional[int] = None,
+    max_message_id: Optional[int] = None,
+    layout: Optional[str] = None,
+) -> List[str]:
+    """
+    Files that may hold messages matching the filters, pruned using the lake
+    index without opening any file. Files the index has not seen yet are
+    pruned by what their path says (channel, and the day for daily files).
+    """
+
+    index = load_lake_index(base_path)
+    selected = []
+    for file_layout, path in lake_message_files(base_path):
+        if layout and file_layout != layout:
+            continue
+        entry = index.get(os.path.relpath(path, base_path))
+        if entry is None:
+            # Not indexed yet: only the path is known
+            file_channel = os.path.splitext(os.path.basename(path))[0]
+            partition = os.path.basename(os.path.dirname(path))
+            if channel and file_channel != channel:
+                continue
+            if file_layout == "daily" and not _overlaps(partition, partition, start_date, end_date):
+                continue
+            selected.append(path)
+            continue
+
+        if entry["rows"] == 0 or (channel and entry["channel"] != channel):
+            continue
+        if not _overlaps(entry["date_min"], entry["date_max"], start_date, end_date):
+            continue
+        if not _overlaps(entry["message_id_min"], entry["message_id_max"], min_message_id, max_message_id):
+            continue
+        selected.append(path)
+    return selected
+
+
+def read_lake_messages(
+    base_path: str,
+    *,
+    channel: Optional[str] = None,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    min_message_id: Optional[int] = None,
+    max_message_id: Optional[int] = None,
+) -> Iterator[TelegramMessage]:
+    """Messages matching the filters, opening only the files the index can't rule out."""
+
+    for path in select_lake_files(
+        base_path,
+        channel=channel,
+        start_date=start_date,
+        end_date=end_date,
+        min_message_id=min_message_id,
+        max_message_id=max_message_id,
+    ):
+        for msg in read_messages_file(path):
+            day = message_day(msg)
+            if channel and msg.channel_name != channel:
+                continue
+            if (start_date and day < start_date) or (end_date and day > end_date):
+                continue
+            if min_message_id is not None and msg.message_id < min_message_id:
+                continue
+            if max_message_id is not None and msg.message_id > max_message_id:
+                continue
+            yield msg
@@ -0,0 +1,307 @@
+"""
+Long-running YOLO detection worker.
+
+Keeps the model loaded in memory and pulls images from a small SQLite job
+table, so newly downloaded images are detected within seconds instead of
+waiting for the next `yolo_enrichment` batch.
+
+Producers (the scrapers, Dagster) call `enqueue_images`; the worker writes
+each processed batch as its own CSV under `data/processed/detections_incoming/`
+which `load_detections` picks up and loads exactly once.
+
+Usage:
+    python src/detection_worker.py --poll-interval 1 --batch-size 16
+"""
+
+import os
+import sys
+import csv
+import time
+import sqlite3
+import argparse
+import logging
+from pathlib import Path
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional, Tuple
+
+# Allow running this file directly: `python src/detection_worker.py`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+def queue_db_path(base_path: str) -> str:
+    """Job queue of the data lake under `base_path`."""
+    return os.path.join(base_path, 'processed', 'detection_queue.sqlite')
+
+
+QUEUE_DB_PATH = queue_db_path('data')
+INCOMING_DIR = os.path.join('data', 'processed', 'detections_incoming')
+
+# Scrapers only enqueue when the worker is in use, otherwise the batch
+# `yolo_enrichment` asset remains the single source of detections.
+QUEUE_ENABLED = os.getenv('DETECTION_QUEUE_ENABLED', '0') == '1'
+
+# Attempts per image before it is left `failed`
+DEFAULT_MAX_ATTEMPTS = 3
+
+DETECTION_FIELDS = [
+    'image_path', 'channel_name', 'message_id', 'label', 'confidence',
+    'x_min', 'y_min', 'x_max', 'y_max',
+]
+
+logger = logging.getLogger("detection_worker")
+
+
+def _utc_now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def connect_queue(db_path: str = QUEUE_DB_PATH) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(db_path), exist_ok=True)
+    conn = sqlite3.connect(db_path, timeout=30)
+    # WAL lets producers enqueue while the worker holds a read transaction
+    conn.execute("PRAGMA journal_mode=WAL;")
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS detection_jobs (
+            image_path TEXT PRIMARY KEY,
+            channel_name TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending',
+            attempts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            enqueued_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS detection_jobs_status_idx
+        ON detection_jobs (status, enqueued_at);
+    """)
+    return conn
+
+
+def enqueue_images(
+    images: Iterable[Tuple[str, str]],
+    db_path: str = QUEUE_DB_PATH,
+) -> int:
+    """
+    Enqueue `(image_path, channel_name)` pairs for detection.
+
+    Images that are already queued or processed are ignored, so producers
+    can safely re-enqueue everything they see. Returns the number of new jobs.
+    """
+    now = _utc_now()
+    rows = [(str(path), channel_name, now, now) for path, channel_name in images]
+    if not rows:
+        return 0
+
+    conn = connect_queue(db_path)
+    try:
+        with conn:
+            before = conn.total_changes
+            conn.executemany(
+                """
+                INSERT OR IGNORE INTO detection_jobs
+                (image_path, channel_name, enqueued_at, updated_at)
+                VALUES (?, ?, ?, ?)
+                """,
+                rows,
+            )
+            return conn.total_changes - before
+    finally:
+        conn.close()
+
+
+def enqueue_image_dir(source_dir: str = 'data/raw/images', db_path: str = QUEUE_DB_PATH) -> int:
+    """Enqueue every image under `data/raw/images/{channel_name}/`."""
+    source_path = Path(source_dir)
+    if not source_path.exists():
+        return 0
+    images = [
+        (str(image_file), channel_dir.name)
+        for channel_dir in source_path.iterdir() if channel_dir.is_dir()
+        for image_file in channel_dir.glob('*.jpg')
+    ]
+    return enqueue_images(images, db_path=db_path)
+
+
+def unfinished_jobs(image_paths: Iterable[str], db_path: str = QUEUE_DB_PATH) -> int:
+    """How many of `image_paths` are still pending or running in the queue."""
+    conn = connect_queue(db_path)
+    try:
+        unfinished = {
+            image_path
+            for (image_path,) in conn.execute(
+                "SELECT image_path FROM detection_jobs WHERE status IN ('pending', 'running')"
+            )
+        }
+    finally:
+        conn.close()
+    return sum(1 for image_path in set(map(str, image_paths)) if image_path in unfinished)
+
+
+def claim_jobs(conn: sqlite3.Connection, batch_size: int) -> List[Tuple[str, str]]:
+    """Atomically move up to `batch_size` pending jobs to `running`."""
+    conn.execute("BEGIN IMMEDIATE;")
+    try:
+        jobs = conn.execute(
+            """
+            SELECT image_path, channel_name FROM detection_jobs
+            WHERE status = 'pending'
+            ORDER BY enqueued_at
+            LIMIT ?
+            """,
+            (batch_size,),
+        ).fetchall()
+        conn.executemany(
+            """
+            UPDATE detection_jobs
+            SET status = 'running', attempts = attempts + 1, updated_at = ?
+            WHERE image_path = ?
+            """,
+            [(_utc_now(), image_path) for image_path, _ in jobs],
+        )
+        conn.execute("COMMIT;")
+    except Exception:
+        conn.execute("ROLLBACK;")
+        raise
+    return jobs
+
+
+def finish_job(
+    conn: sqlite3.Connection,
+    image_path: str,
+    error: Optional[str] = None,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+) -> None:
+    """Mark a job done, or on error put it back in the queue until it has used `max_attempts`."""
+    with conn:
+        conn.execute(
+            """
+            UPDATE detection_jobs
+            SET status = CASE
+                    WHEN ? IS NULL THEN 'done'
+                    WHEN attempts < ? THEN 'pending'
+                    ELSE 'failed'
+                END,
+                error = ?, updated_at = ?
+            WHERE image_path = ?
+            """,
+            (error, max_attempts, error, _utc_now(), image_path),
+        )
+
+
+def recover_jobs(conn: sqlite3.Connection, max_attempts: int = DEFAULT_MAX_ATTEMPTS) -> None:
+    """
+    Requeue jobs left `running` by a crashed worker and `failed` jobs with
+    attempts to spare (e.g. after raising `max_attempts`); jobs left
+    `running` that have used all their attempts are marked `failed`.
+    """
+    now = _utc_now()
+    with conn:
+        conn.execute(
+            """
+            UPDATE detection_jobs SET status = 'pending', updated_at = ?
+            WHERE status IN ('running', 'failed') AND attempts < ?
+            """,
+            (now, max_attempts),
+        )
+        conn.execute(
+            """
+            UPDATE detection_jobs
+            SET status = 'failed', error = COALESCE(error, 'worker stopped while processing'), updated_at = ?
+            WHERE status = 'running' AND attempts >= ?
+            """,
+            (now, max_attempts),
+        )
+
+
+def write_batch_csv(detections: List[dict], incoming_dir: str = INCOMING_DIR) -> Optional[str]:
+    """Write one batch of detections to its own CSV for the loader to pick up."""
+    if not detections:
+        return None
+    os.makedirs(incoming_dir, exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%S%f')
+    out_path = os.path.join(incoming_dir, f"batch_{stamp}.csv")
+    # Write under a temp name so the loader never sees a partial file
+    tmp_path = out_path + '.tmp'
+    with open(tmp_path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=DETECTION_FIELDS)
+        writer.writeheader()
+        writer.writerows(detections)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+def run_worker(
+    db_path: str = QUEUE_DB_PATH,
+    incoming_dir: str = INCOMING_DIR,
+    batch_size: int = 16,
+    poll_interval: float = 1.0,
+    max_attempts: int = DEFAULT_MAX_ATTEMPTS,
+    once: bool = False,
+) -> None:
+    """
+    Process queued images until interrupted (or until the queue is drained
+    when `once` is set). The model is loaded a single time up front.
+    """
+    # Imported lazily so producers can enqueue without pulling in YOLO
+    from src.yolo_detect import load_model, detect_image
+
+    model = load_model()
+    conn = connect_queue(db_path)
+    recover_jobs(conn, max_attempts)
+    logger.info("Detection worker started")
+
+    try:
+        while True:
+            jobs = claim_jobs(conn, batch_size)
+            if not jobs:
+                if once:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            detections = []
+            errors = {}
+            for image_path, channel_name in jobs:
+                try:
+                    detections.extend(detect_image(model, image_path, channel_name))
+                except Exception as e:
+                    logger.error(f"Error processing {image_path}: {e}")
+                    errors[image_path] = str(e)
+
+            # Mark jobs done only once their results are safely on disk
+            out_path = write_batch_csv(detections, incoming_dir)
+            for image_path, _ in jobs:
+                finish_job(conn, image_path, error=errors.get(image_path), max_attempts=max_attempts)
+            logger.info(f"Processed {len(jobs)} images, {len(detections)} detections -> {out_path}")
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Persistent YOLO detection worker")
+    parser.add_argument("--batch-size", type=int, default=16, help="Images claimed per batch (default: 16)")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to wait when the queue is empty (default: 1)")
+    parser.add_argument("--max-attempts", type=int, default=DEFAULT_MAX_ATTEMPTS,
+                        help=f"Attempts per image before it is left failed (default: {DEFAULT_MAX_ATTEMPTS})")
+    parser.add_argument("--once", action="store_true", help="Drain the queue and exit")
+    parser.add_argument("--enqueue-all", action="store_true", help="Enqueue every image under data/raw/images first")
+    args = parser.parse_args()
+
+    os.makedirs('logs', exist_ok=True)
+    logging.basicConfig(
+        filename='logs/detection_worker.log',
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    if args.enqueue_all:
+        print(f"Enqueued {enqueue_image_dir()} images")
+
+    run_worker(
+        batch_size=args.batch_size,
+        poll_interval=args.poll_interval,
+        max_attempts=args.max_attempts,
+        once=args.once,
+    )
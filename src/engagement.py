@@ -0,0 +1,190 @@
+"""
+Engagement refresh for recent messages.
+
+Views and forwards keep growing for days after a post. Rather than
+re-scraping, this looks up the messages posted within the last
+`--window-days` days (found through the data lake index) by id, up to 100
+per request, and appends their current views and forwards to the capture
+day's `data/raw/engagement_snapshots/YYYY-MM-DD/{channel}.json`. No history
+is paged and no media downloaded.
+
+`python src/loader.py --engagement` then upserts the snapshots into
+`raw.message_engagement_history`.
+
+Usage:
+    python src/engagement.py --window-days 7
+"""
+
+import os
+import sys
+import json
+import asyncio
+import argparse
+import logging
+from pathlib import Path
+from datetime import datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, List, Optional
+from telethon import TelegramClient
+from telethon.errors import FloodWaitError
+from dotenv import load_dotenv
+
+# Allow running this file directly: `python src/engagement.py`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.datalake import append_engagement_snapshots, read_lake_messages
+from src.profiling import profiled
+from src.records import EngagementSnapshot
+
+# Load environment variables
+load_dotenv()
+
+API_ID = os.getenv('TG_API_ID')
+API_HASH = os.getenv('TG_API_HASH')
+PHONE = os.getenv('TG_PHONE')
+
+# Messages whose engagement is still worth following
+DEFAULT_WINDOW_DAYS = int(os.getenv('ENGAGEMENT_WINDOW_DAYS', '7'))
+
+# Telegram returns at most 100 messages per id lookup
+BATCH_SIZE = 100
+MAX_FLOOD_RETRIES = 3
+
+logger = logging.getLogger("engagement")
+
+
+def recent_message_ids(base_path: str, window_days: int, now: Optional[datetime] = None) -> Dict[str, List[int]]:
+    """Ids of messages posted on the last `window_days` days (UTC), per channel."""
+    now = now or datetime.now(timezone.utc)
+    start_date = (now - timedelta(days=window_days)).strftime('%Y-%m-%d')
+    ids: Dict[str, set] = {}
+    for msg in read_lake_messages(base_path, start_date=start_date):
+        ids.setdefault(msg.channel_name, set()).add(msg.message_id)
+    return {channel: sorted(message_ids) for channel, message_ids in sorted(ids.items())}
+
+
+async def with_flood_retry(make_request: Callable[[], Awaitable], max_retries: int = MAX_FLOOD_RETRIES):
+    """Await `make_request()`, sleeping and retrying when Telegram asks us to wait."""
+    retries = 0
+    while True:
+        try:
+            return await make_request()
+        except FloodWaitError as e:
+            retries += 1
+            if retries > max_retries:
+                raise
+            wait_seconds = max(int(getattr(e, "seconds", 0) or 0), 1)
+            logger.warning(f"FloodWaitError: sleeping {wait_seconds}s")
+            await asyncio.sleep(wait_seconds)
+
+
+async def refresh_channel(
+    client: TelegramClient,
+    channel_name: str,
+    message_ids: List[int],
+    base_path: str,
+    captured_at: datetime,
+    batch_size: int = BATCH_SIZE,
+) -> dict:
+    """Snapshot the current views and forwards of `message_ids` in one channel."""
+    entity = await with_flood_retry(lambda: client.get_entity(channel_name))
+
+    snapshots = []
+    missing = 0
+    for start in range(0, len(message_ids), batch_size):
+        batch = message_ids[start:start + batch_size]
+        for message in await with_flood_retry(lambda: client.get_messages(entity, ids=batch)):
+            # Deleted since it was scraped
+            if message is None:
+                missing += 1
+                continue
+            snapshots.append(EngagementSnapshot(
+                message_id=message.id,
+                channel_name=channel_name,
+                captured_at=captured_at,
+                views=message.views,
+                forwards=message.forwards,
+            ))
+
+    if snapshots:
+        out_path = append_engagement_snapshots(
+            base_path=base_path,
+            date_str=captured_at.strftime('%Y-%m-%d'),
+            channel_name=channel_name,
+            snapshots=snapshots,
+        )
+        logger.info(f"Saved {len(snapshots)} engagement snapshots for {channel_name} in {out_path}")
+
+    return {
+        'requested': len(message_ids),
+        'snapshots': len(snapshots),
+        'missing': missing,
+        'lookups': -(-len(message_ids) // batch_size),
+    }
+
+
+async def refresh_engagement(
+    client: TelegramClient,
+    base_path: str = 'data',
+    window_days: int = DEFAULT_WINDOW_DAYS,
+    batch_size: int = BATCH_SIZE,
+    now: Optional[datetime] = None,
+) -> dict:
+    """Refresh every channel with messages in the window; one failing channel doesn't stop the rest."""
+    captured_at = (now or datetime.now(timezone.utc)).replace(microsecond=0)
+    recent = recent_message_ids(base_path, window_days, captured_at)
+
+    channels = {}
+    for channel_name, message_ids in recent.items():
+        try:
+            channels[channel_name] = await refresh_channel(
+                client, channel_name, message_ids, base_path, captured_at, batch_size
+            )
+        except Exception as e:
+            logger.error(f"Error refreshing engagement for {channel_name}: {e}")
+            channels[channel_name] = {'requested': len(message_ids), 'snapshots': 0, 'missing': 0, 'error': str(e)}
+
+    return {
+        'captured_at': captured_at.isoformat(),
+        'window_days': window_days,
+        'channels': channels,
+        'snapshots': sum(result['snapshots'] for result in channels.values()),
+        'lookups': sum(result.get('lookups', 0) for result in channels.values()),
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Snapshot views and forwards of recent messages without re-scraping")
+    parser.add_argument("--path", default="data", help="Base data directory (default: data)")
+    parser.add_argument("--window-days", type=int, default=DEFAULT_WINDOW_DAYS,
+                        help=f"Refresh messages posted within this many days (default: {DEFAULT_WINDOW_DAYS})")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE,
+                        help=f"Message ids per lookup, at most 100 (default: {BATCH_SIZE})")
+    args = parser.parse_args()
+
+    os.makedirs('logs', exist_ok=True)
+    logging.basicConfig(
+        filename='logs/engagement.log',
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s'
+    )
+
+    if not API_ID or not API_HASH:
+        print("Please set TG_API_ID and TG_API_HASH in .env file")
+        exit(1)
+
+    async def main() -> dict:
+        # Own session file, so a refresh can run while the scraper holds its session
+        client = TelegramClient('engagement_session', API_ID, API_HASH)
+        # Not `async with client`: its __aenter__ would start the client again, without the phone
+        await client.start(phone=PHONE)
+        try:
+            return await refresh_engagement(client, args.path, args.window_days, min(args.batch_size, BATCH_SIZE))
+        finally:
+            await client.disconnect()
+
+    with profiled('engagement'):
+        summary = asyncio.run(main())
+    # Printed as JSON so the Dagster asset can read it back
+    print(json.dumps(summary))
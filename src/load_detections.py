@@ -0,0 +1,154 @@
+import os
+import sys
+import argparse
+import pandas as pd
+import logging
+from pathlib import Path
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+# Allow running this file directly: `python src/load_detections.py`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.profiling import profiled
+
+# Load environment variables
+load_dotenv()
+
+DB_USER = os.getenv('POSTGRES_USER')
+DB_PASSWORD = os.getenv('POSTGRES_PASSWORD')
+DB_NAME = os.getenv('POSTGRES_DB')
+DB_HOST = os.getenv('POSTGRES_HOST')
+DB_PORT = os.getenv('POSTGRES_PORT')
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/loader_detections.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+def get_db_engine():
+    db_url = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    return create_engine(db_url)
+
+def create_detections_table(engine):
+    with engine.connect() as conn:
+        conn.execute(text("CREATE SCHEMA IF NOT EXISTS raw;"))
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS raw.yolo_detections (
+                id SERIAL PRIMARY KEY,
+                image_path TEXT,
+                channel_name VARCHAR,
+                message_id BIGINT,
+                label VARCHAR,
+                confidence FLOAT,
+                x_min FLOAT,
+                y_min FLOAT,
+                x_max FLOAT,
+                y_max FLOAT,
+                ingested_at TIMESTAMP DEFAULT NOW()
+            );
+        """))
+        conn.commit()
+    logging.info("Table raw.yolo_detections created or exists.")
+
+def load_detections(engine, csv_path='data/processed/yolo_detections.csv'):
+    if not os.path.exists(csv_path):
+        logging.warning("No detection CSV found.")
+        return
+
+    try:
+        df = pd.read_csv(csv_path)
+        
+        # Insert data using pandas to_sql for simplicity mixed with existing engine
+        # However, to consistency with previous loader, let's use to_sql which is efficient enough for this size
+        df.to_sql('yolo_detections', engine, schema='raw', if_exists='append', index=False)
+        
+        logging.info(f"Loaded {len(df)} detections from {csv_path}")
+        print(f"Loaded {len(df)} detections from {csv_path}")
+        
+    except Exception as e:
+        logging.error(f"Error loading data: {e}")
+        print(f"Error loading data: {e}")
+        raise
+
+def load_partition_detections(engine, date_str, base_path='data'):
+    """
+    Load `data/processed/yolo_detections/{date}.csv`, replacing detections
+    previously loaded for the same images so a partition can be rerun.
+    """
+    csv_path = os.path.join(base_path, 'processed', 'yolo_detections', f"{date_str}.csv")
+    if not os.path.exists(csv_path):
+        logging.warning(f"No detection CSV found for {date_str}.")
+        return
+
+    df = pd.read_csv(csv_path)
+    image_paths = df['image_path'].dropna().unique().tolist()
+    with engine.begin() as conn:
+        if image_paths:
+            conn.execute(
+                text("DELETE FROM raw.yolo_detections WHERE image_path = ANY(:image_paths)"),
+                {'image_paths': image_paths}
+            )
+        df.to_sql('yolo_detections', conn, schema='raw', if_exists='append', index=False)
+
+    logging.info(f"Loaded {len(df)} detections from {csv_path}")
+    print(f"Loaded {len(df)} detections from {csv_path}")
+
+def load_incoming_detections(engine, incoming_dir='data/processed/detections_incoming'):
+    """
+    Load batch CSVs written by the detection worker, moving each file to
+    `loaded/` once it is in the warehouse so it is never loaded twice. A file
+    that fails stays in place for the next run; the rest are still loaded,
+    then the failures are raised.
+    """
+    if not os.path.isdir(incoming_dir):
+        return
+
+    loaded_dir = os.path.join(incoming_dir, 'loaded')
+    os.makedirs(loaded_dir, exist_ok=True)
+
+    failed = []
+    for file_name in sorted(os.listdir(incoming_dir)):
+        if not file_name.endswith('.csv'):
+            continue
+        csv_path = os.path.join(incoming_dir, file_name)
+        try:
+            df = pd.read_csv(csv_path)
+            df.to_sql('yolo_detections', engine, schema='raw', if_exists='append', index=False)
+            os.replace(csv_path, os.path.join(loaded_dir, file_name))
+            logging.info(f"Loaded {len(df)} detections from {csv_path}")
+        except Exception as e:
+            logging.error(f"Error loading {csv_path}: {e}")
+            print(f"Error loading {csv_path}: {e}")
+            failed.append(file_name)
+
+    if failed:
+        raise RuntimeError(f"Failed to load {len(failed)} detection files: {', '.join(failed)}")
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load YOLO detections into PostgreSQL")
+    parser.add_argument("--date", help="Load only this partition's detections (YYYY-MM-DD)")
+    args = parser.parse_args()
+
+    if not all([DB_USER, DB_PASSWORD, DB_NAME]):
+        print("Database credentials missing in .env")
+        exit(1)
+        
+    try:
+        engine = get_db_engine()
+        create_detections_table(engine)
+        with profiled('load_detections'):
+            if args.date:
+                load_partition_detections(engine, args.date)
+            else:
+                load_detections(engine)
+            load_incoming_detections(engine)
+        print("Data loading complete.")
+    except Exception as e:
+        logging.error(f"Detection loading failed: {e}")
+        print(f"Detection loading failed: {e}")
+        exit(1)
\ No newline at end of file
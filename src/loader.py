@@ -1,9 +1,25 @@
 import os
-import json
+import sys
 import logging
+import argparse
+from pathlib import Path
 from sqlalchemy import create_engine, text
 from dotenv import load_dotenv
 
+# Allow running this file directly: `python src/loader.py`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.datalake import (
+    engagement_snapshot_dates,
+    iter_partition_messages,
+    lake_message_files,
+    partition_snapshot_files,
+)
+from src.profiling import profiled
+from src.records import RAW_MESSAGE_COLUMNS, raw_message_row, read_messages_file, read_snapshots_file, record_fields
+
 # Load environment variables
 load_dotenv()
 
@@ -44,66 +60,162 @@ def create_raw_table(engine):
         conn.commit()
     logging.info("Table raw.telegram_messages created or exists.")
 
-def load_data(engine):
+def create_engagement_table(engine):
+    with engine.connect() as conn:
+        conn.execute(text("CREATE SCHEMA IF NOT EXISTS raw;"))
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS raw.message_engagement_history (
+                channel_name VARCHAR NOT NULL,
+                message_id BIGINT NOT NULL,
+                captured_at TIMESTAMPTZ NOT NULL,
+                views INTEGER,
+                forwards INTEGER,
+                ingested_at TIMESTAMP DEFAULT NOW(),
+                PRIMARY KEY (channel_name, message_id, captured_at)
+            );
+        """))
+        conn.commit()
+    logging.info("Table raw.message_engagement_history created or exists.")
+
+def check_raw_schema(engine):
+    """
+    Fail fast if raw.telegram_messages lacks a column the message record loads,
+    instead of erroring halfway through a load.
+    """
+    with engine.connect() as conn:
+        columns = set(conn.execute(text("""
+            SELECT column_name FROM information_schema.columns
+            WHERE table_schema = 'raw' AND table_name = 'telegram_messages'
+        """)).scalars())
+    missing = [column for column in RAW_MESSAGE_COLUMNS if column not in columns]
+    if missing:
+        raise RuntimeError(f"raw.telegram_messages is missing columns {missing}; migrate the table before loading")
+    unloaded = [field for field in record_fields() if field not in RAW_MESSAGE_COLUMNS]
+    if unloaded:
+        logging.info(f"Message fields not loaded into raw.telegram_messages: {unloaded}")
+
+def iter_message_batches(date_str=None):
+    """Yield `(file_path, messages)` for every channel file to load."""
+    if not date_str:
+        # Daily and compacted files alike; `_manifest.json` and friends are skipped
+        for _, file_path in lake_message_files('data'):
+            yield file_path, read_messages_file(file_path)
+        return
+
+    # Falls back to the month's compacted files once the partition is compacted
+    yield from iter_partition_messages('data', date_str)
+
+def load_data(engine, date_str=None):
     data_dir = os.path.join('data', 'raw', 'telegram_messages')
     if not os.path.exists(data_dir):
         logging.warning("No raw data directory found.")
         return
 
+    query = text("""
+        INSERT INTO raw.telegram_messages 
+        (message_id, channel_name, message_date, message_text, has_media, image_path, views, forwards)
+        VALUES (:message_id, :channel_name, :message_date, :message_text, :has_media, :image_path, :views, :forwards)
+    """)
+
     conn = engine.connect()
     try:
-        for root, dirs, files in os.walk(data_dir):
-            for file in files:
-                if file.endswith('.json'):
-                    file_path = os.path.join(root, file)
-                    logging.info(f"Processing {file_path}")
-                    
-                    with open(file_path, 'r', encoding='utf-8') as f:
-                        data = json.load(f)
-                        
-                    # Insert data
-                    for msg in data:
-                        # Basic UPSERT check via NOT EXISTS (simplification)
-                        # or just insert everything for now, duplicate handling is better in dbt usually
-                        # But let's check for duplicate message_id + channel_name to assume uniqueness?
-                        # For raw layer, often appending is fine, but let's try to be clean.
-                        
-                        # Use raw SQL for insertion
-                        query = text("""
-                            INSERT INTO raw.telegram_messages 
-                            (message_id, channel_name, message_date, message_text, has_media, image_path, views, forwards)
-                            VALUES (:message_id, :channel_name, :message_date, :message_text, :has_media, :image_path, :views, :forwards)
-                        """)
-                        
-                        conn.execute(query, {
-                            'message_id': msg.get('message_id'),
-                            'channel_name': msg.get('channel_name'),
-                            'message_date': msg.get('message_date'),
-                            'message_text': msg.get('message_text'),
-                            'has_media': msg.get('has_media'),
-                            'image_path': msg.get('image_path'),
-                            'views': msg.get('views'),
-                            'forwards': msg.get('forwards')
-                        })
-                    
-                    logging.info(f"Loaded {len(data)} messages from {file}")
+        for file_path, data in iter_message_batches(date_str):
+            file = os.path.basename(file_path)
+            logging.info(f"Processing {file_path}")
+
+            if date_str and data:
+                # Reloading a partition replaces what it loaded before
+                conn.execute(
+                    text("""
+                        DELETE FROM raw.telegram_messages
+                        WHERE channel_name = :channel_name AND message_id = ANY(:message_ids)
+                    """),
+                    {
+                        'channel_name': data[0].channel_name,
+                        'message_ids': [msg.message_id for msg in data],
+                    }
+                )
+                
+            # Insert the whole file in one executemany round trip
+            if data:
+                conn.execute(query, [raw_message_row(msg) for msg in data])
+            
+            logging.info(f"Loaded {len(data)} messages from {file}")
         
         conn.commit()
     except Exception as e:
         logging.error(f"Error loading data: {e}")
         print(f"Error loading data: {e}")
+        # Nothing was committed; a partition reload must not look like it succeeded
+        raise
+    finally:
+        conn.close()
+
+def load_engagement(engine, date_str=None):
+    """
+    Upsert engagement snapshots captured on `date_str` (or on every day) into
+    raw.message_engagement_history; reloading a capture day is a no-op.
+    """
+    dates = [date_str] if date_str else engagement_snapshot_dates('data')
+    query = text("""
+        INSERT INTO raw.message_engagement_history
+        (channel_name, message_id, captured_at, views, forwards)
+        VALUES (:channel_name, :message_id, :captured_at, :views, :forwards)
+        ON CONFLICT (channel_name, message_id, captured_at)
+        DO UPDATE SET views = EXCLUDED.views, forwards = EXCLUDED.forwards, ingested_at = NOW()
+    """)
+
+    conn = engine.connect()
+    try:
+        for snapshot_date in dates:
+            for file_path in partition_snapshot_files('data', snapshot_date):
+                snapshots = read_snapshots_file(file_path)
+                if not snapshots:
+                    continue
+                conn.execute(query, [
+                    {
+                        'channel_name': snapshot.channel_name,
+                        'message_id': snapshot.message_id,
+                        'captured_at': snapshot.captured_at,
+                        'views': snapshot.views,
+                        'forwards': snapshot.forwards,
+                    }
+                    for snapshot in snapshots
+                ])
+                logging.info(f"Upserted {len(snapshots)} engagement snapshots from {file_path}")
+
+        conn.commit()
+    except Exception as e:
+        logging.error(f"Error loading engagement snapshots: {e}")
+        print(f"Error loading engagement snapshots: {e}")
+        # Nothing was committed; let the caller (and the Dagster asset) see the failure
+        raise
     finally:
         conn.close()
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load raw Telegram JSON into PostgreSQL")
+    parser.add_argument("--date", help="Load only this partition (YYYY-MM-DD), replacing rows it loaded before")
+    parser.add_argument("--engagement", action="store_true",
+                        help="Upsert engagement snapshots (of --date's capture day, or all) instead of messages")
+    args = parser.parse_args()
+
     if not all([DB_USER, DB_PASSWORD, DB_NAME]):
         print("Database credentials missing in .env")
         exit(1)
         
     try:
         engine = get_db_engine()
-        create_raw_table(engine)
-        load_data(engine)
+        if args.engagement:
+            create_engagement_table(engine)
+            with profiled('engagement_loader'):
+                load_engagement(engine, date_str=args.date)
+        else:
+            create_raw_table(engine)
+            check_raw_schema(engine)
+            with profiled('loader'):
+                load_data(engine, date_str=args.date)
         print("Data loading complete.")
     except Exception as e:
-        print(f"Failed to connect to DB: {e}")
\ No newline at end of file
+        print(f"Data loading failed: {e}")
+        exit(1)
\ No newline at end of file
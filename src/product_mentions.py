@@ -0,0 +1,225 @@
+import os
+import re
+import logging
+import pandas as pd
+from sqlalchemy import create_engine, text
+from dotenv import load_dotenv
+
+# Load environment variables
+load_dotenv()
+
+DB_USER = os.getenv('POSTGRES_USER')
+DB_PASSWORD = os.getenv('POSTGRES_PASSWORD')
+DB_NAME = os.getenv('POSTGRES_DB')
+DB_HOST = os.getenv('POSTGRES_HOST')
+DB_PORT = os.getenv('POSTGRES_PORT')
+
+# Configure logging
+logging.basicConfig(
+    filename='logs/product_mentions.log',
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+CHUNK_SIZE = 50000
+
+# Loads stamp ingested_at when their transaction starts, so one can commit
+# behind the watermark; messages loaded this many minutes before it are
+# looked at again
+INGEST_OVERLAP_MINUTES = int(os.getenv('INGEST_OVERLAP_MINUTES', '60'))
+
+# Canonical product name -> spellings seen in channel posts (English and Amharic)
+PRODUCT_LEXICON = {
+    'paracetamol': ['paracetamol', 'panadol', 'acetaminophen', 'ፓራሲታሞል', 'ፓናዶል'],
+    'amoxicillin': ['amoxicillin', 'amoxil', 'amoxacillin', 'አሞክሲሲሊን'],
+    'ibuprofen': ['ibuprofen', 'brufen', 'advil', 'አይቡፕሮፌን'],
+    'diclofenac': ['diclofenac', 'voltaren', 'ዲክሎፌናክ'],
+    'metformin': ['metformin', 'glucophage', 'ሜትፎርሚን'],
+    'omeprazole': ['omeprazole', 'losec', 'ኦሜፕራዞል'],
+    'ciprofloxacin': ['ciprofloxacin', 'cipro', 'ሲፕሮፍሎክሳሲን'],
+    'azithromycin': ['azithromycin', 'zithromax', 'አዚትሮማይሲን'],
+    'insulin': ['insulin', 'ኢንሱሊን'],
+    'vitamin': ['vitamin', 'vitamins', 'multivitamin', 'ቫይታሚን'],
+    'zinc': ['zinc', 'ዚንክ'],
+    'sunscreen': ['sunscreen', 'sunblock', 'spf'],
+    'moisturizer': ['moisturizer', 'moisturiser', 'lotion'],
+    'cerave': ['cerave'],
+    'nivea': ['nivea', 'ኒቪያ'],
+    'thermometer': ['thermometer', 'ቴርሞሜትር'],
+    'glucometer': ['glucometer', 'glucose-meter'],
+}
+
+ALIAS_TO_PRODUCT = {
+    alias: product
+    for product, aliases in PRODUCT_LEXICON.items()
+    for alias in aliases
+}
+
+# Ethiopic syllables or Latin words (hyphenated brand names included). The
+# syllable range stops before Ethiopic punctuation (U+1360-U+1368, e.g. ፣ ።)
+# so "ፓራሲታሞል፣" still matches the lexicon.
+TOKEN_RE = re.compile(r'[\u1200-\u135A]+|[a-z][a-z0-9\-]+')
+ETHIOPIC_RE = re.compile(r'[\u1200-\u135A]')
+# "350 birr", "1,200 ብር", "ETB 99.50", "ብር 500"
+PRICE_RE = re.compile(
+    r'(?P<amount>\d[\d,]*(?:\.\d+)?)\s*(?:birr|br\b|etb|ብር)'
+    r'|(?:birr|etb|ብር)\s*(?P<amount_after>\d[\d,]*(?:\.\d+)?)',
+    re.IGNORECASE
+)
+
+def get_db_engine():
+    db_url = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
+    return create_engine(db_url)
+
+def create_mentions_tables(engine):
+    with engine.connect() as conn:
+        conn.execute(text("CREATE SCHEMA IF NOT EXISTS raw;"))
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS raw.product_mentions (
+                id SERIAL PRIMARY KEY,
+                channel_name VARCHAR,
+                message_id BIGINT,
+                message_date TIMESTAMP,
+                product_name VARCHAR,
+                matched_token VARCHAR,
+                script VARCHAR,
+                price_birr NUMERIC,
+                source_ingested_at TIMESTAMP,
+                ingested_at TIMESTAMP DEFAULT NOW()
+            );
+        """))
+        # Last extraction of each message, so dbt can replace the message's
+        # mentions in fct_product_mentions even when none are left
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS raw.product_mention_extractions (
+                channel_name VARCHAR,
+                message_id BIGINT,
+                ingested_at TIMESTAMP DEFAULT NOW(),
+                PRIMARY KEY (channel_name, message_id)
+            );
+        """))
+        # Tracks how far into raw.telegram_messages extraction has got
+        conn.execute(text("""
+            CREATE TABLE IF NOT EXISTS raw.product_mention_runs (
+                id SERIAL PRIMARY KEY,
+                processed_through TIMESTAMP,
+                mentions INTEGER,
+                run_at TIMESTAMP DEFAULT NOW()
+            );
+        """))
+        conn.commit()
+    logging.info("Tables raw.product_mentions, raw.product_mention_extractions and raw.product_mention_runs created or exist.")
+
+def extract_mentions(messages: pd.DataFrame) -> pd.DataFrame:
+    """
+    Extract product mentions from a batch of messages.
+
+    Expects `channel_name`, `message_id`, `message_date`, `message_text` and
+    `ingested_at` columns; returns one row per (message, product) with the
+    first birr price quoted in the message, if any.
+    """
+    columns = [
+        'channel_name', 'message_id', 'message_date', 'product_name',
+        'matched_token', 'script', 'price_birr', 'source_ingested_at',
+    ]
+    if messages.empty:
+        return pd.DataFrame(columns=columns)
+
+    text_col = messages['message_text'].fillna('')
+
+    prices = text_col.str.extract(PRICE_RE)
+    price = prices['amount'].fillna(prices['amount_after']).str.replace(',', '', regex=False)
+    messages = messages.assign(price_birr=pd.to_numeric(price, errors='coerce'))
+
+    tokens = (
+        messages.assign(matched_token=text_col.str.lower().str.findall(TOKEN_RE))
+        .explode('matched_token')
+        .dropna(subset=['matched_token'])
+    )
+    tokens['product_name'] = tokens['matched_token'].map(ALIAS_TO_PRODUCT)
+    mentions = tokens.dropna(subset=['product_name'])
+    mentions = mentions.drop_duplicates(subset=['channel_name', 'message_id', 'product_name'])
+    mentions = mentions.assign(
+        script=mentions['matched_token'].str.contains(ETHIOPIC_RE).map({True: 'ethiopic', False: 'latin'}),
+        source_ingested_at=mentions['ingested_at'],
+    )
+    return mentions[columns]
+
+def run_extraction(engine, chunk_size=CHUNK_SIZE, overlap_minutes=INGEST_OVERLAP_MINUTES):
+    with engine.connect() as conn:
+        watermark = conn.execute(text(
+            "SELECT max(processed_through) FROM raw.product_mention_runs"
+        )).scalar()
+
+    # Messages in the overlap that were already extracted from this copy are skipped
+    query = text("""
+        SELECT m.channel_name, m.message_id, m.message_date, m.message_text, m.ingested_at
+        FROM raw.telegram_messages m
+        WHERE m.message_text IS NOT NULL AND m.message_text <> ''
+          AND m.ingested_at > COALESCE(CAST(:watermark AS TIMESTAMP) - make_interval(mins => :overlap), '-infinity')
+          AND NOT EXISTS (
+              SELECT 1 FROM raw.product_mention_extractions e
+              WHERE e.channel_name = m.channel_name AND e.message_id = m.message_id
+                AND e.ingested_at >= m.ingested_at
+          )
+        ORDER BY m.ingested_at
+    """)
+
+    # Reloaded (possibly edited) messages come back with a new ingested_at;
+    # their earlier mentions are replaced, not added to
+    delete_previous = text("""
+        DELETE FROM raw.product_mentions pm
+        USING unnest(CAST(:channel_names AS VARCHAR[]), CAST(:message_ids AS BIGINT[])) AS m(channel_name, message_id)
+        WHERE pm.channel_name = m.channel_name AND pm.message_id = m.message_id
+    """)
+    # Written in the same transaction, so its ingested_at matches the new mentions'
+    mark_extracted = text("""
+        INSERT INTO raw.product_mention_extractions (channel_name, message_id)
+        SELECT DISTINCT *
+        FROM unnest(CAST(:channel_names AS VARCHAR[]), CAST(:message_ids AS BIGINT[]))
+        ON CONFLICT (channel_name, message_id) DO UPDATE SET ingested_at = NOW()
+    """)
+
+    total = 0
+    processed_through = watermark
+    params = {'watermark': watermark, 'overlap': overlap_minutes}
+    for chunk in pd.read_sql(query, engine, params=params, chunksize=chunk_size):
+        # A message loaded more than once: only its newest text counts, or
+        # products an edit removed would come back from the older copy
+        chunk = chunk.drop_duplicates(subset=['channel_name', 'message_id'], keep='last')
+        mentions = extract_mentions(chunk)
+        keys = {
+            'channel_names': chunk['channel_name'].tolist(),
+            'message_ids': [int(message_id) for message_id in chunk['message_id']],
+        }
+        with engine.begin() as conn:
+            conn.execute(delete_previous, keys)
+            conn.execute(mark_extracted, keys)
+            mentions.to_sql('product_mentions', conn, schema='raw', if_exists='append', index=False)
+        total += len(mentions)
+        # Rows from the overlap must not move the watermark back
+        processed_through = max(filter(None, [processed_through, chunk['ingested_at'].max()]))
+        logging.info(f"Extracted {len(mentions)} mentions from {len(chunk)} messages")
+
+    if processed_through != watermark:
+        with engine.connect() as conn:
+            conn.execute(
+                text("INSERT INTO raw.product_mention_runs (processed_through, mentions) VALUES (:through, :mentions)"),
+                {'through': processed_through, 'mentions': total}
+            )
+            conn.commit()
+    logging.info(f"Extracted {total} product mentions")
+    print(f"Extracted {total} product mentions")
+
+if __name__ == '__main__':
+    if not all([DB_USER, DB_PASSWORD, DB_NAME]):
+        print("Database credentials missing in .env")
+        exit(1)
+
+    try:
+        engine = get_db_engine()
+        create_mentions_tables(engine)
+        run_extraction(engine)
+    except Exception as e:
+        print(f"Failed to extract product mentions: {e}")
+        exit(1)
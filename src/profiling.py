@@ -0,0 +1,131 @@
+"""
+Opt-in profiling for pipeline stages.
+
+Wrap a stage in `profiled("loader")` and, when profiling is enabled, it runs
+under cProfile with tracemalloc tracking allocations. On exit the stage
+leaves its artifacts in the profile directory:
+
+    {stage}.prof        raw cProfile stats (open with snakeviz or pstats)
+    {stage}.txt         top functions by cumulative and own time
+    {stage}.alloc.txt   top allocation sites and peak traced memory
+    {stage}.json        summary used for Dagster asset metadata
+
+Enable with PIPELINE_PROFILE=1. Artifacts go to PIPELINE_PROFILE_DIR, which
+Dagster sets to `data/profiles/{run_id}`; scripts run by hand default to
+`data/profiles/{timestamp}`.
+"""
+
+import os
+import io
+import json
+import time
+import cProfile
+import pstats
+import logging
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, Optional
+
+# How many functions / allocation sites to keep in the text reports
+PROFILE_TOP_N = int(os.getenv('PIPELINE_PROFILE_TOP_N', '30'))
+
+logger = logging.getLogger("profiling")
+
+
+# Read at call time so a `.env` loaded after import still applies
+def profiling_enabled() -> bool:
+    return os.getenv('PIPELINE_PROFILE', '0') == '1'
+
+
+def default_profile_dir() -> str:
+    return os.getenv('PIPELINE_PROFILE_DIR') or os.path.join(
+        'data', 'profiles', datetime.now().strftime('%Y%m%dT%H%M%S')
+    )
+
+
+def _top_functions(stats: pstats.Stats, limit: int) -> list:
+    rows = []
+    for (filename, line, func), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append({
+            'function': f"{os.path.basename(filename)}:{line}({func})",
+            'calls': ncalls,
+            'own_seconds': round(tottime, 4),
+            'cumulative_seconds': round(cumtime, 4),
+        })
+    rows.sort(key=lambda row: row['own_seconds'], reverse=True)
+    return rows[:limit]
+
+
+def _write_artifacts(
+    stage: str,
+    profile_dir: str,
+    profiler: cProfile.Profile,
+    snapshot: tracemalloc.Snapshot,
+    peak_bytes: int,
+    wall_seconds: float,
+) -> str:
+    os.makedirs(profile_dir, exist_ok=True)
+    base = os.path.join(profile_dir, stage)
+
+    profiler.dump_stats(f"{base}.prof")
+
+    report = io.StringIO()
+    stats = pstats.Stats(profiler, stream=report).strip_dirs()
+    report.write(f"{stage}: {wall_seconds:.2f}s wall\n\n== By cumulative time ==\n")
+    stats.sort_stats('cumulative').print_stats(PROFILE_TOP_N)
+    report.write("\n== By own time ==\n")
+    stats.sort_stats('tottime').print_stats(PROFILE_TOP_N)
+    with open(f"{base}.txt", 'w', encoding='utf-8') as f:
+        f.write(report.getvalue())
+
+    allocations = snapshot.statistics('lineno')[:PROFILE_TOP_N]
+    with open(f"{base}.alloc.txt", 'w', encoding='utf-8') as f:
+        f.write(f"Peak traced memory: {peak_bytes / 1024 / 1024:.1f} MiB\n\n")
+        for allocation in allocations:
+            f.write(f"{allocation}\n")
+
+    summary = {
+        'stage': stage,
+        'wall_seconds': round(wall_seconds, 3),
+        'peak_memory_mb': round(peak_bytes / 1024 / 1024, 2),
+        'top_functions': _top_functions(stats, 10),
+        'top_allocations': [
+            {'site': str(allocation.traceback), 'size_kb': round(allocation.size / 1024, 1), 'count': allocation.count}
+            for allocation in allocations[:10]
+        ],
+    }
+    with open(f"{base}.json", 'w', encoding='utf-8') as f:
+        json.dump(summary, f, indent=2)
+    return base
+
+
+@contextmanager
+def profiled(stage: str, profile_dir: Optional[str] = None, enabled: Optional[bool] = None) -> Iterator[None]:
+    """
+    Profile the enclosed block as `stage` when profiling is enabled; otherwise
+    a no-op. Artifacts are written even if the block raises.
+    """
+    if not (profiling_enabled() if enabled is None else enabled):
+        yield
+        return
+
+    profile_dir = profile_dir or default_profile_dir()
+    started_tracing = not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    tracemalloc.reset_peak()
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        wall_seconds = time.perf_counter() - start
+        snapshot = tracemalloc.take_snapshot()
+        _, peak_bytes = tracemalloc.get_traced_memory()
+        if started_tracing:
+            tracemalloc.stop()
+        base = _write_artifacts(stage, profile_dir, profiler, snapshot, peak_bytes, wall_seconds)
+        logger.info(f"Profile for {stage} written to {base}.*")
@@ -0,0 +1,118 @@
+"""
+Typed records shared by the scrapers, the data lake and the loaders.
+
+`TelegramMessage` is the one shape a scraped message has from the moment it
+is built in `scrape_channel` until it is inserted into `raw.telegram_messages`.
+It is a msgspec Struct: slotted, not tracked by the garbage collector, and
+validated while decoding. A row that fails validation is logged with its
+position (e.g. `$[12].views`) and skipped, rather than loaded or failing the
+rest of its file.
+"""
+
+import logging
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+import msgspec
+
+logger = logging.getLogger("records")
+
+
+class TelegramMessage(msgspec.Struct, kw_only=True, gc=False):
+    message_id: int
+    channel_name: str
+    message_date: datetime
+    message_text: Optional[str] = None
+    has_media: bool = False
+    image_path: Optional[str] = None
+    views: Optional[int] = None
+    forwards: Optional[int] = None
+    # Only written by scripts/telegram.py; not loaded into the warehouse
+    channel_title: Optional[str] = None
+    # Daily partition the message was scraped into; set when it is compacted
+    source_partition: Optional[str] = None
+
+
+class EngagementSnapshot(msgspec.Struct, kw_only=True, gc=False, array_like=True):
+    """
+    Views and forwards of a message at `captured_at`. Encoded as a JSON array
+    rather than an object, since snapshot files hold many small rows.
+    """
+    message_id: int
+    channel_name: str
+    captured_at: datetime
+    views: Optional[int] = None
+    forwards: Optional[int] = None
+
+
+# Record fields stored in raw.telegram_messages, in insert order
+RAW_MESSAGE_COLUMNS = (
+    'message_id',
+    'channel_name',
+    'message_date',
+    'message_text',
+    'has_media',
+    'image_path',
+    'views',
+    'forwards',
+)
+
+_encoder = msgspec.json.Encoder()
+_messages_decoder = msgspec.json.Decoder(List[TelegramMessage])
+_message_decoder = msgspec.json.Decoder(TelegramMessage)
+_rows_decoder = msgspec.json.Decoder(List[msgspec.Raw])
+_snapshots_decoder = msgspec.json.Decoder(List[EngagementSnapshot])
+
+
+def encode_messages(messages: Iterable[TelegramMessage]) -> bytes:
+    return _encoder.encode(list(messages))
+
+
+def decode_messages(raw: bytes, source: str = 'channel file', strict: bool = False) -> List[TelegramMessage]:
+    """
+    Parse and validate a channel file. Invalid rows are logged and skipped,
+    or raise msgspec.ValidationError when `strict`.
+    """
+    try:
+        return _messages_decoder.decode(raw)
+    except msgspec.ValidationError:
+        if strict:
+            raise
+
+    # Only files with a bad row pay for decoding row by row
+    messages = []
+    for position, row in enumerate(_rows_decoder.decode(raw)):
+        try:
+            messages.append(_message_decoder.decode(row))
+        except msgspec.ValidationError as e:
+            logger.error(f"Skipping invalid message {position} in {source}: {e}")
+    return messages
+
+
+def read_messages_file(path: str, strict: bool = False) -> List[TelegramMessage]:
+    with open(path, 'rb') as f:
+        return decode_messages(f.read(), source=path, strict=strict)
+
+
+def write_messages_file(path: str, messages: Iterable[TelegramMessage]) -> None:
+    with open(path, 'wb') as f:
+        f.write(encode_messages(messages))
+
+
+def read_snapshots_file(path: str) -> List[EngagementSnapshot]:
+    with open(path, 'rb') as f:
+        return _snapshots_decoder.decode(f.read())
+
+
+def write_snapshots_file(path: str, snapshots: Iterable[EngagementSnapshot]) -> None:
+    with open(path, 'wb') as f:
+        f.write(_encoder.encode(list(snapshots)))
+
+
+def raw_message_row(message: TelegramMessage) -> dict:
+    """Insert parameters for raw.telegram_messages."""
+    return {column: getattr(message, column) for column in RAW_MESSAGE_COLUMNS}
+
+
+def record_fields() -> List[str]:
+    return [field.name for field in msgspec.structs.fields(TelegramMessage)]
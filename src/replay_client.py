@@ -0,0 +1,354 @@
+"""
+Offline stand-in for the TelegramClient calls the scrapers make.
+
+`ReplayTelegramClient` implements `start`, `get_entity`, `iter_messages`,
+`get_messages` and `download_media` plus the async context manager, over
+channels that are either synthetic or replayed from the raw data lake.
+Network behaviour is simulated so scraper throughput, concurrency and
+FloodWait handling can be measured without touching Telegram:
+
+    request_latency     seconds per API round trip (history pages and id
+                        lookups of 100 messages, entity lookups, media downloads)
+    latency_jitter      extra uniform random latency on top of that
+    download_bandwidth  bytes/s a photo downloads at (None: instant)
+    flood_every/rate    inject a FloodWaitError every N requests and/or with
+                        probability `flood_rate` per request
+    flood_seconds       wait the injected FloodWaitError asks for
+
+Like Telethon, waits up to `flood_sleep_threshold` seconds are slept through
+inside the client and the request retried; longer ones are raised to the
+scraper. Synthetic photos are filler bytes of the configured size, not
+decodable JPEGs.
+
+Usage:
+    client = ReplayTelegramClient.synthetic(channels=5, messages_per_channel=1000, request_latency=0.05)
+    client = ReplayTelegramClient.from_lake('data', flood_every=50, flood_seconds=2)
+"""
+
+import os
+import random
+import shutil
+import asyncio
+import logging
+import zlib
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from telethon.errors import FloodWaitError
+from telethon.tl.types import MessageMediaPhoto
+
+from src.datalake import read_lake_messages
+
+# Messages per history request, as Telegram pages them
+PAGE_SIZE = 100
+
+SYNTHETIC_WORDS = [
+    "paracetamol", "amoxicillin", "ibuprofen", "vitamin", "omeprazole",
+    "cream", "lotion", "sunscreen", "syrup", "tablet", "capsule",
+    "ፓራሲታሞል", "መድሃኒት", "ቫይታሚን", "ዋጋ",
+]
+
+logger = logging.getLogger("replay_client")
+
+
+class ReplayChannel:
+    """The entity fields the scrapers read."""
+
+    def __init__(self, username: str, title: Optional[str] = None):
+        self.username = username
+        self.id = zlib.crc32(username.encode('utf-8'))
+        self.title = title or username
+
+
+class ReplayMessage:
+    """The message fields the scrapers read; photos carry a real MessageMediaPhoto."""
+
+    def __init__(
+        self,
+        id: int,
+        date: datetime,
+        message: Optional[str],
+        views: Optional[int] = None,
+        forwards: Optional[int] = None,
+        photo_bytes: int = 0,
+        photo_source: Optional[str] = None,
+    ):
+        self.id = id
+        self.date = date
+        self.message = message
+        self.views = views
+        self.forwards = forwards
+        self.media = MessageMediaPhoto() if photo_bytes else None
+        self.photo_bytes = photo_bytes
+        # Recorded image copied on download instead of filler bytes
+        self.photo_source = photo_source
+
+    @property
+    def text(self) -> Optional[str]:
+        return self.message
+
+
+class ReplayTelegramClient:
+    def __init__(
+        self,
+        channels: Dict[ReplayChannel, List[ReplayMessage]],
+        *,
+        request_latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        download_bandwidth: Optional[float] = None,
+        flood_every: int = 0,
+        flood_rate: float = 0.0,
+        flood_seconds: int = 5,
+        flood_sleep_threshold: int = 60,
+        seed: Optional[int] = None,
+    ):
+        # Newest first, the order Telegram returns history in
+        self._channels = {
+            channel.username: (channel, sorted(messages, key=lambda msg: msg.id, reverse=True))
+            for channel, messages in channels.items()
+        }
+        self._media_messages = {
+            id(msg.media): msg
+            for _, messages in self._channels.values()
+            for msg in messages
+            if msg.media is not None
+        }
+        self.request_latency = request_latency
+        self.latency_jitter = latency_jitter
+        self.download_bandwidth = download_bandwidth
+        self.flood_every = flood_every
+        self.flood_rate = flood_rate
+        self.flood_seconds = flood_seconds
+        self.flood_sleep_threshold = flood_sleep_threshold
+        self._rng = random.Random(seed)
+        self._connected = False
+        self.stats = {
+            'requests': 0,
+            'flood_waits': 0,
+            'flood_waits_raised': 0,
+            'flood_wait_seconds': 0,
+            'messages_served': 0,
+            'downloads': 0,
+            'download_bytes': 0,
+        }
+
+    # -------------------------------------------------------------------------
+    # Constructors
+    # -------------------------------------------------------------------------
+
+    @classmethod
+    def synthetic(
+        cls,
+        channels: int = 5,
+        messages_per_channel: int = 500,
+        photo_ratio: float = 0.4,
+        photo_kb: Tuple[int, int] = (40, 250),
+        days: int = 30,
+        end: Optional[datetime] = None,
+        seed: int = 0,
+        **options,
+    ) -> 'ReplayTelegramClient':
+        """Channels `replay_channel_{n}` with messages spread evenly over the last `days` days."""
+        rng = random.Random(seed)
+        end = end or datetime.now(timezone.utc)
+        step = timedelta(days=days) / max(messages_per_channel, 1)
+
+        replay_channels = {}
+        for n in range(1, channels + 1):
+            channel = ReplayChannel(f"replay_channel_{n}", title=f"Replay Channel {n}")
+            replay_channels[channel] = [
+                ReplayMessage(
+                    id=message_id,
+                    date=(end - step * (messages_per_channel - message_id)).replace(microsecond=0),
+                    message=" ".join(rng.choices(SYNTHETIC_WORDS, k=rng.randint(3, 12))) + f" {rng.randint(10, 999)} ብር",
+                    views=rng.randint(0, 5000),
+                    forwards=rng.randint(0, 100),
+                    photo_bytes=rng.randint(*photo_kb) * 1024 if rng.random() < photo_ratio else 0,
+                )
+                for message_id in range(1, messages_per_channel + 1)
+            ]
+        return cls(replay_channels, seed=seed, **options)
+
+    @classmethod
+    def from_lake(
+        cls,
+        base_path: str = 'data',
+        channels: Optional[List[str]] = None,
+        photo_kb: Tuple[int, int] = (40, 250),
+        seed: int = 0,
+        **options,
+    ) -> 'ReplayTelegramClient':
+        """
+        Replay scraped channels from the raw data lake. Recorded images are
+        copied on download; media whose image is gone gets filler bytes.
+        """
+        rng = random.Random(seed)
+        recorded: Dict[str, Dict[int, ReplayMessage]] = {}
+        titles: Dict[str, str] = {}
+        for msg in read_lake_messages(base_path):
+            if channels and msg.channel_name not in channels:
+                continue
+            if msg.channel_title:
+                titles[msg.channel_name] = msg.channel_title
+            photo_source = msg.image_path if msg.image_path and os.path.exists(msg.image_path) else None
+            if photo_source:
+                photo_bytes = os.path.getsize(photo_source)
+            elif msg.has_media:
+                photo_bytes = rng.randint(*photo_kb) * 1024
+            else:
+                photo_bytes = 0
+            # Later partitions and rescrapes replace earlier copies
+            recorded.setdefault(msg.channel_name, {})[msg.message_id] = ReplayMessage(
+                id=msg.message_id,
+                date=msg.message_date if msg.message_date.tzinfo else msg.message_date.replace(tzinfo=timezone.utc),
+                message=msg.message_text,
+                views=msg.views,
+                forwards=msg.forwards,
+                photo_bytes=photo_bytes,
+                photo_source=photo_source,
+            )
+        if not recorded:
+            raise ValueError(f"No recorded messages found under {base_path}")
+
+        return cls(
+            {
+                ReplayChannel(name, title=titles.get(name)): list(messages.values())
+                for name, messages in recorded.items()
+            },
+            seed=seed,
+            **options,
+        )
+
+    @property
+    def channel_names(self) -> List[str]:
+        return list(self._channels)
+
+    # -------------------------------------------------------------------------
+    # Simulated network
+    # -------------------------------------------------------------------------
+
+    async def _request(self) -> None:
+        """One API round trip, sleeping through or raising injected flood waits."""
+        while True:
+            self.stats['requests'] += 1
+            latency = self.request_latency + self._rng.uniform(0, self.latency_jitter)
+            if latency > 0:
+                await asyncio.sleep(latency)
+
+            flooded = (
+                (self.flood_every and self.stats['requests'] % self.flood_every == 0)
+                or (self.flood_rate and self._rng.random() < self.flood_rate)
+            )
+            if not flooded:
+                return
+
+            self.stats['flood_waits'] += 1
+            if self.flood_seconds > self.flood_sleep_threshold:
+                self.stats['flood_waits_raised'] += 1
+                raise FloodWaitError(request=None, capture=self.flood_seconds)
+            logger.info(f"Sleeping for {self.flood_seconds}s on injected flood wait")
+            self.stats['flood_wait_seconds'] += self.flood_seconds
+            await asyncio.sleep(self.flood_seconds)
+
+    def _channel(self, entity) -> ReplayChannel:
+        if isinstance(entity, ReplayChannel):
+            return entity
+        username = str(entity)
+        for prefix in ('https://t.me/', 'http://t.me/', 't.me/', '@'):
+            if username.startswith(prefix):
+                username = username[len(prefix):]
+        if username not in self._channels:
+            raise ValueError(f'No user has "{username}" as username')
+        return self._channels[username][0]
+
+    # -------------------------------------------------------------------------
+    # TelegramClient subset
+    # -------------------------------------------------------------------------
+
+    async def start(self, phone=None, **kwargs) -> 'ReplayTelegramClient':
+        self._connected = True
+        return self
+
+    async def connect(self) -> None:
+        self._connected = True
+
+    async def disconnect(self) -> None:
+        self._connected = False
+
+    def is_connected(self) -> bool:
+        return self._connected
+
+    async def __aenter__(self) -> 'ReplayTelegramClient':
+        return await self.start()
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.disconnect()
+
+    async def get_entity(self, entity) -> ReplayChannel:
+        channel = self._channel(entity)
+        await self._request()
+        return channel
+
+    async def iter_messages(self, entity, limit: Optional[int] = None, *, offset_date: Optional[datetime] = None, wait_time: Optional[float] = None):
+        """Newest first, strictly before `offset_date`, one request per page of 100."""
+        channel = self._channel(entity)
+        messages = self._channels[channel.username][1]
+        if offset_date is not None:
+            messages = [msg for msg in messages if msg.date < offset_date]
+        if limit is not None:
+            messages = messages[:limit]
+
+        for start in range(0, max(len(messages), 1), PAGE_SIZE):
+            if start and wait_time:
+                await asyncio.sleep(wait_time)
+            await self._request()
+            for msg in messages[start:start + PAGE_SIZE]:
+                self.stats['messages_served'] += 1
+                yield msg
+
+    async def get_messages(self, entity, limit: Optional[int] = None, *, ids=None, **kwargs):
+        """
+        With `ids`, look messages up by id, one request per 100, returning
+        None for ids the channel doesn't have; otherwise `iter_messages` as a list.
+        """
+        if ids is None:
+            return [msg async for msg in self.iter_messages(entity, limit, **kwargs)]
+
+        channel = self._channel(entity)
+        by_id = {msg.id: msg for msg in self._channels[channel.username][1]}
+        single = isinstance(ids, int)
+        ids = [ids] if single else list(ids)
+
+        found = []
+        for start in range(0, len(ids), PAGE_SIZE):
+            await self._request()
+            for message_id in ids[start:start + PAGE_SIZE]:
+                msg = by_id.get(message_id)
+                if msg is not None:
+                    self.stats['messages_served'] += 1
+                found.append(msg)
+        return found[0] if single else found
+
+    async def download_media(self, message, file=None):
+        """Write the photo of a message (or its media) to `file`; returns the path, or bytes without one."""
+        msg = message if isinstance(message, ReplayMessage) else self._media_messages.get(id(message))
+        if msg is None or not msg.photo_bytes:
+            return None
+
+        await self._request()
+        if self.download_bandwidth:
+            await asyncio.sleep(msg.photo_bytes / self.download_bandwidth)
+        self.stats['downloads'] += 1
+        self.stats['download_bytes'] += msg.photo_bytes
+
+        if file is None:
+            if msg.photo_source:
+                with open(msg.photo_source, 'rb') as f:
+                    return f.read()
+            return bytes(msg.photo_bytes)
+        if msg.photo_source:
+            shutil.copyfile(msg.photo_source, file)
+        else:
+            with open(file, 'wb') as f:
+                f.write(bytes(msg.photo_bytes))
+        return file
@@ -1,12 +1,24 @@
 import os
-import json
 import asyncio
+import sys
 import logging
+import argparse
+from pathlib import Path
 from datetime import datetime
 from telethon import TelegramClient
 from telethon.tl.types import MessageMediaPhoto
 from dotenv import load_dotenv
 
+# Allow running this file directly: `python src/scraper.py`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.datalake import partition_bounds, write_channel_messages_json, write_manifest
+from src.detection_worker import QUEUE_ENABLED, enqueue_images, queue_db_path
+from src.records import TelegramMessage
+from src.profiling import profiled
+
 # Load environment variables
 load_dotenv()
 
@@ -29,11 +41,18 @@ CHANNELS = [
 ]
 
 class TelegramScraper:
-    def __init__(self, api_id, api_hash, phone):
+    def __init__(self, api_id, api_hash, phone, date_str=None, base_path='data', client=None, channels=None):
         self.api_id = api_id
         self.api_hash = api_hash
         self.phone = phone
-        self.client = TelegramClient('scraper_session', api_id, api_hash)
+        # With a date, scrape exactly the messages posted that day (UTC) into
+        # its partition; otherwise the latest messages into today's partition
+        self.date_str = date_str
+        self.base_path = base_path
+        self.channels = channels or CHANNELS
+        # Any client with the TelegramClient methods used here, e.g. the
+        # offline ReplayTelegramClient for benchmarks
+        self.client = client or TelegramClient('scraper_session', api_id, api_hash)
 
     async def scrape_channel(self, channel_url):
         try:
@@ -44,51 +63,67 @@ class TelegramScraper:
             print(f"Scraping channel: {channel_name}...")
 
             messages_data = []
-            today = datetime.now().strftime('%Y-%m-%d')
-            
-            # Create daily directory for JSON
-            json_dir = os.path.join('data', 'raw', 'telegram_messages', today)
-            os.makedirs(json_dir, exist_ok=True)
+            partition_date = self.date_str or datetime.now().strftime('%Y-%m-%d')
             
             # Create channel directory for images
-            image_dir = os.path.join('data', 'raw', 'images', channel_name)
+            image_dir = os.path.join(self.base_path, 'raw', 'images', channel_name)
             os.makedirs(image_dir, exist_ok=True)
 
-            # Limit to 100 for dev/testing purposes as instructed implicitly or by common sense for now
-            # Can be removed or increased for full scrape
-            async for message in self.client.iter_messages(entity, limit=200):
-                msg_data = {
-                    'message_id': message.id,
-                    'channel_name': channel_name,
-                    'message_date': message.date.isoformat(),
-                    'message_text': message.text,
-                    'has_media': False,
-                    'image_path': None,
-                    'views': message.views,
-                    'forwards': message.forwards,
-                }
+            if self.date_str:
+                # Walk back from the end of the day and stop once past its start
+                day_start, day_end = partition_bounds(self.date_str)
+                message_iter = self.client.iter_messages(entity, offset_date=day_end)
+            else:
+                # Limit to 100 for dev/testing purposes as instructed implicitly or by common sense for now
+                # Can be removed or increased for full scrape
+                day_start = None
+                message_iter = self.client.iter_messages(entity, limit=200)
+
+            async for message in message_iter:
+                if day_start is not None and message.date < day_start:
+                    break
+                msg_data = TelegramMessage(
+                    message_id=message.id,
+                    channel_name=channel_name,
+                    message_date=message.date,
+                    message_text=message.text,
+                    views=message.views,
+                    forwards=message.forwards,
+                )
 
                 if message.media and isinstance(message.media, MessageMediaPhoto):
-                    msg_data['has_media'] = True
+                    msg_data.has_media = True
                     image_filename = f"{message.id}.jpg"
                     image_path = os.path.join(image_dir, image_filename)
                     # Download image
                     await self.client.download_media(message, file=image_path)
-                    msg_data['image_path'] = image_path
+                    msg_data.image_path = image_path
 
                 messages_data.append(msg_data)
 
             # Save to JSON
-            json_path = os.path.join(json_dir, f"{channel_name}.json")
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(messages_data, f, ensure_ascii=False, indent=4)
+            json_path = write_channel_messages_json(
+                base_path=self.base_path,
+                date_str=partition_date,
+                channel_name=channel_name,
+                messages=messages_data,
+            )
             
+            # Hand the channel's images to the detection worker in one transaction
+            if QUEUE_ENABLED:
+                enqueue_images(
+                    [(msg.image_path, channel_name) for msg in messages_data if msg.image_path],
+                    db_path=queue_db_path(self.base_path),
+                )
+
             logging.info(f"Saved {len(messages_data)} messages for {channel_name} in {json_path}")
             print(f"Saved {len(messages_data)} messages for {channel_name}")
+            return channel_name, len(messages_data)
 
         except Exception as e:
             logging.error(f"Error scraping {channel_url}: {e}")
             print(f"Error scraping {channel_url}: {e}")
+            return None, 0
 
     async def run(self):
         # Check if phone is provided
@@ -101,15 +136,29 @@ class TelegramScraper:
         # Start the client with the phone number
         await self.client.start(phone=self.phone)
         
+        channel_counts = {}
         async with self.client:
-            for channel in CHANNELS:
-                await self.scrape_channel(channel)
+            for channel in self.channels:
+                channel_name, count = await self.scrape_channel(channel)
+                if channel_name:
+                    channel_counts[channel_name] = count
+
+        write_manifest(
+            base_path=self.base_path,
+            date_str=self.date_str or datetime.now().strftime('%Y-%m-%d'),
+            channel_message_counts=channel_counts,
+        )
 
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Scrape medical Telegram channels into the raw data lake")
+    parser.add_argument("--date", help="Partition to scrape (YYYY-MM-DD, UTC); defaults to the latest messages")
+    args = parser.parse_args()
+
     if not API_ID or not API_HASH:
         print("Please set TG_API_ID and TG_API_HASH in .env file")
         exit(1)
         
-    scraper = TelegramScraper(API_ID, API_HASH, PHONE)
+    scraper = TelegramScraper(API_ID, API_HASH, PHONE, date_str=args.date)
     # python 3.7+
-    asyncio.run(scraper.run())
\ No newline at end of file
+    with profiled('scraper'):
+        asyncio.run(scraper.run())
\ No newline at end of file
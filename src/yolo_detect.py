@@ -1,10 +1,20 @@
 import os
+import sys
+import argparse
 import cv2
 import pandas as pd
 from ultralytics import YOLO
 import logging
 from pathlib import Path
 
+# Allow running this file directly: `python src/yolo_detect.py`
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+from src.datalake import partition_image_paths
+from src.profiling import profiled
+
 # Configure logging
 logging.basicConfig(
     filename='logs/yolo_detect.log',
@@ -12,9 +22,47 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-def detect_objects(source_dir='data/raw/images', output_csv='data/processed/yolo_detections.csv'):
+def load_model(weights='yolov8n.pt'):
     # Initialize YOLO model (using nano version for speed)
-    model = YOLO('yolov8n.pt')
+    return YOLO(weights)
+
+def detect_image(model, image_path, channel_name):
+    """
+    Run inference on a single image and return one row per detection.
+    """
+    image_file = Path(image_path)
+    # Images are saved as {message_id}.jpg
+    message_id = int(image_file.stem) if image_file.stem.isdigit() else None
+
+    # Run inference
+    results = model(str(image_file), verbose=False)
+
+    # Process results
+    result = results[0]
+
+    # One row per detection for maximum flexibility in SQL
+    detections = []
+    for box in result.boxes:
+        cls_id = int(box.cls[0])
+        cls_name = model.names[cls_id]
+        conf = float(box.conf[0])
+        xyxy = box.xyxy[0].tolist()
+
+        detections.append({
+            'image_path': str(image_file),
+            'channel_name': channel_name,
+            'message_id': message_id,
+            'label': cls_name,
+            'confidence': conf,
+            'x_min': xyxy[0],
+            'y_min': xyxy[1],
+            'x_max': xyxy[2],
+            'y_max': xyxy[3]
+        })
+    return detections
+
+def detect_objects(source_dir='data/raw/images', output_csv='data/processed/yolo_detections.csv'):
+    model = load_model()
     
     detections = []
     
@@ -33,47 +81,7 @@ def detect_objects(source_dir='data/raw/images', output_csv='data/processed/yolo
             
             for image_file in channel_dir.glob('*.jpg'):
                 try:
-                    message_id = image_file.stem
-                    image_path = str(image_file)
-                    
-                    # Run inference
-                    results = model(image_path, verbose=False)
-                    
-                    # Process results
-                    result = results[0]
-                    
-                    # Collect detected classes and confidences
-                    detected_classes = []
-                    confidences = []
-                    boxes = [] # xyxy
-                    
-                    for box in result.boxes:
-                        cls_id = int(box.cls[0])
-                        cls_name = model.names[cls_id]
-                        conf = float(box.conf[0])
-                        xyxy = box.xyxy[0].tolist()
-                        
-                        detected_classes.append(cls_name)
-                        confidences.append(conf)
-                        boxes.append(xyxy)
-                        
-                        # Add individual detection row (optional, depending on granularity needed)
-                        # For now, let's keep one row per image with lists/summary, 
-                        # OR one row per detection.
-                        # The task implies "Integrate with Data Warehouse", let's do one row per detection for maximum flexibility in SQL.
-                        
-                        detections.append({
-                            'image_path': image_path,
-                            'channel_name': channel_name,
-                            'message_id': message_id,
-                            'label': cls_name,
-                            'confidence': conf,
-                            'x_min': xyxy[0],
-                            'y_min': xyxy[1],
-                            'x_max': xyxy[2],
-                            'y_max': xyxy[3]
-                        })
-                        
+                    detections.extend(detect_image(model, image_file, channel_name))
                 except Exception as e:
                     logging.error(f"Error processing {image_file}: {e}")
 
@@ -87,5 +95,50 @@ def detect_objects(source_dir='data/raw/images', output_csv='data/processed/yolo
         logging.warning("No detections found.")
         print("No detections found.")
 
+DETECTION_COLUMNS = ['image_path', 'channel_name', 'message_id', 'label', 'confidence', 'x_min', 'y_min', 'x_max', 'y_max']
+
+def partition_detections_csv(date_str, base_path='data', channel_name=None):
+    if channel_name:
+        return os.path.join(base_path, 'processed', 'yolo_detections', date_str, f"{channel_name}.csv")
+    return os.path.join(base_path, 'processed', 'yolo_detections', f"{date_str}.csv")
+
+def detect_partition(date_str, base_path='data', output_csv=None, channel_name=None):
+    """
+    Detect objects in the images referenced by one daily partition, writing
+    them to `data/processed/yolo_detections/{date}.csv`, or to
+    `data/processed/yolo_detections/{date}/{channel}.csv` for a single channel.
+    """
+    output_csv = output_csv or partition_detections_csv(date_str, base_path, channel_name)
+    os.makedirs(os.path.dirname(output_csv), exist_ok=True)
+
+    images = [
+        (image_path, channel)
+        for image_path, channel in partition_image_paths(base_path, date_str)
+        if channel_name is None or channel == channel_name
+    ]
+    model = load_model() if images else None
+
+    detections = []
+    for image_path, channel_name in images:
+        try:
+            detections.extend(detect_image(model, image_path, channel_name))
+        except Exception as e:
+            logging.error(f"Error processing {image_path}: {e}")
+
+    # Always rewrite the file so a rerun never leaves stale detections behind
+    pd.DataFrame(detections, columns=DETECTION_COLUMNS).to_csv(output_csv, index=False)
+    logging.info(f"Saved {len(detections)} detections from {len(images)} images to {output_csv}")
+    print(f"Saved {len(detections)} detections from {len(images)} images to {output_csv}")
+
 if __name__ == '__main__':
-    detect_objects()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Run YOLO object detection on scraped images")
+    parser.add_argument("--date", help="Only detect images from this partition (YYYY-MM-DD)")
+    parser.add_argument("--channel", help="With --date, only detect this channel's images")
+    args = parser.parse_args()
+
+    stage = f"yolo_detect_{args.channel}" if args.channel else 'yolo_detect'
+    with profiled(stage):
+        if args.date:
+            detect_partition(args.date, channel_name=args.channel)
+        else:
+            detect_objects()
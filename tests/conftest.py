@@ -0,0 +1,21 @@
+import os
+import sys
+from pathlib import Path
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+if str(PROJECT_ROOT) not in sys.path:
+    sys.path.insert(0, str(PROJECT_ROOT))
+
+# Several src modules configure a log file under logs/ at import time
+os.makedirs(PROJECT_ROOT / 'logs', exist_ok=True)
+os.chdir(PROJECT_ROOT)
+
+# api.database builds its engine URL at import; no connection is opened
+for name, value in {
+    'POSTGRES_USER': 'test',
+    'POSTGRES_PASSWORD': 'test',
+    'POSTGRES_DB': 'test',
+    'POSTGRES_HOST': 'localhost',
+    'POSTGRES_PORT': '5432',
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,109 @@
+from datetime import datetime, timezone
+from email.utils import format_datetime
+
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from api.cache import ResponseCache
+
+BUILT_AT = datetime(2026, 3, 1, 12, 0, 30, 500000, tzinfo=timezone.utc)
+
+
+class FakeBuilds:
+    """Session stand-in answering the build-stamp query."""
+
+    def __init__(self, version, built_at=BUILT_AT):
+        self.row = (version, built_at)
+
+    async def execute(self, query):
+        row = self.row
+
+        class Result:
+            def first(self):
+                return row
+
+        return Result()
+
+    async def rollback(self):
+        pass
+
+
+def _request(**headers):
+    return Request({
+        'type': 'http',
+        'headers': [(name.replace('_', '-').encode(), value.encode()) for name, value in headers.items()],
+    })
+
+
+def _cache(version='abc'):
+    cache = ResponseCache()
+    cache.build_version = version
+    cache.built_at = BUILT_AT
+    return cache
+
+
+def test_if_none_match_accepts_weak_tags_and_lists():
+    cache = _cache()
+    assert cache.is_not_modified(_request(if_none_match='"abc"'))
+    assert cache.is_not_modified(_request(if_none_match='W/"abc"'))
+    assert cache.is_not_modified(_request(if_none_match='"old", W/"abc"'))
+    assert cache.is_not_modified(_request(if_none_match='*'))
+    assert not cache.is_not_modified(_request(if_none_match='"old", "older"'))
+    assert not cache.is_not_modified(_request(if_none_match='abc'))
+
+
+def test_if_none_match_takes_precedence_over_if_modified_since():
+    cache = _cache()
+    fresh = format_datetime(BUILT_AT, usegmt=True)
+    assert not cache.is_not_modified(_request(if_none_match='"old"', if_modified_since=fresh))
+
+
+def test_if_modified_since_compares_whole_seconds():
+    cache = _cache()
+    assert cache.is_not_modified(_request(if_modified_since=format_datetime(BUILT_AT, usegmt=True)))
+    assert not cache.is_not_modified(_request(if_modified_since='Sun, 01 Mar 2026 12:00:29 GMT'))
+    assert not cache.is_not_modified(_request(if_modified_since='not a date'))
+
+
+def test_nothing_is_fresh_before_a_build_is_known():
+    cache = _cache(version=None)
+    assert not cache.is_not_modified(_request(if_none_match='*'))
+
+
+def test_cached_endpoint_revalidates_and_invalidates_on_new_build():
+    cache = ResponseCache(build_check_interval=0)
+    builds = FakeBuilds('build-1')
+    calls = []
+
+    async def get_db():
+        yield builds
+
+    app = FastAPI()
+
+    @app.get('/items')
+    @cache.cached
+    async def items(limit: int = 10, db=Depends(get_db)):
+        calls.append(limit)
+        return {'limit': limit, 'call': len(calls)}
+
+    client = TestClient(app)
+
+    first = client.get('/items')
+    assert first.status_code == 200
+    assert first.headers['etag'] == '"build-1"'
+    assert client.get('/items').json() == first.json()
+    # Other arguments are cached separately
+    client.get('/items', params={'limit': 5})
+    assert calls == [10, 5]
+
+    not_modified = client.get('/items', headers={'If-None-Match': 'W/"build-1"'})
+    assert not_modified.status_code == 304
+    assert not_modified.headers['etag'] == '"build-1"'
+    assert calls == [10, 5]
+
+    builds.row = ('build-2', datetime(2026, 3, 2, tzinfo=timezone.utc))
+    rebuilt = client.get('/items', headers={'If-None-Match': '"build-1"'})
+    assert rebuilt.status_code == 200
+    assert rebuilt.headers['etag'] == '"build-2"'
+    assert rebuilt.json() == {'limit': 10, 'call': 3}
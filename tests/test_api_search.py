@@ -0,0 +1,110 @@
+import json
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api.main
+from api.database import get_db
+from api.pagination import decode_cursor, encode_cursor
+
+NOON = datetime(2026, 3, 1, 12, 0, tzinfo=timezone.utc)
+
+# (message_id, channel_name, message_text, views, message_date, channel_key, rank),
+# with messages posted at the same instant and the same id in two channels
+ROWS = [
+    (message_id, f"channel_{channel_key}", "paracetamol 200 ብር", 10, NOON.replace(minute=minute), channel_key, 1.0)
+    for message_id, minute, channel_key in [
+        (1, 0, 1), (1, 0, 2), (2, 5, 1), (3, 5, 1), (3, 5, 2),
+        (4, 5, 3), (5, 10, 1), (6, 20, 2), (7, 20, 2), (8, 30, 1),
+    ]
+]
+
+
+def _recent(params):
+    """The /messages/search?sort=recent query: keyset predicate, order and limit."""
+    rows = sorted(ROWS, key=lambda row: (row[4], row[0], row[5]), reverse=True)
+    if 'cursor_date' in params:
+        keyset = (params['cursor_date'], params['cursor_id'], params['cursor_channel'])
+        rows = [row for row in rows if (row[4], row[0], row[5]) < keyset]
+    return rows[:params['limit']] if 'limit' in params else rows
+
+
+class FakeSession:
+    async def execute(self, query, params):
+        rows = _recent(params)
+
+        class Result:
+            def fetchall(self):
+                return rows
+
+        return Result()
+
+
+class FakeEngine:
+    @asynccontextmanager
+    async def connect(self):
+        class Connection:
+            async def stream(self, query, params):
+                async def rows():
+                    for row in _recent(params):
+                        yield row
+                return rows()
+        yield Connection()
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def fake_db():
+        yield FakeSession()
+
+    monkeypatch.setattr(api.main, 'engine', FakeEngine())
+    api.main.app.dependency_overrides[get_db] = fake_db
+    yield TestClient(api.main.app)
+    api.main.app.dependency_overrides.clear()
+
+
+def _key(row):
+    return row['channel_name'], row['message_id']
+
+
+def test_cursor_round_trips():
+    cursor = encode_cursor(NOON, 42, 7)
+    assert decode_cursor(cursor) == {'cursor_date': NOON, 'cursor_id': 42, 'cursor_channel': 7}
+
+
+def test_recent_pages_have_no_duplicates_or_gaps(client):
+    seen = []
+    params = {'keyword': 'paracetamol', 'sort': 'recent', 'limit': 3}
+    while True:
+        response = client.get('/messages/search', params=params)
+        assert response.status_code == 200
+        seen.extend(_key(row) for row in response.json())
+        if 'x-next-cursor' not in response.headers:
+            break
+        params['cursor'] = response.headers['x-next-cursor']
+
+    assert seen == [(row[1], row[0]) for row in _recent({})]
+
+
+def test_ndjson_ends_truncated_streams_with_the_next_cursor(client):
+    params = {'keyword': 'paracetamol', 'sort': 'recent', 'limit': 4, 'format': 'ndjson'}
+    lines = [json.loads(line) for line in client.get('/messages/search', params=params).text.splitlines()]
+    rows, last = lines[:-1], lines[-1]
+    assert len(rows) == 4 and set(last) == {'next_cursor'}
+
+    json_page = client.get('/messages/search', params={'keyword': 'paracetamol', 'sort': 'recent', 'limit': 4})
+    # Same encoding and same next page in both formats
+    assert rows == json_page.json()
+    assert last['next_cursor'] == json_page.headers['x-next-cursor']
+
+    rest = client.get('/messages/search', params={**params, 'limit': 100, 'cursor': last['next_cursor']})
+    rest_rows = [json.loads(line) for line in rest.text.splitlines()]
+    assert [_key(row) for row in rows + rest_rows] == [(row[1], row[0]) for row in _recent({})]
+
+
+def test_invalid_cursors_are_rejected(client):
+    assert client.get('/messages/search', params={'keyword': 'x', 'sort': 'recent', 'cursor': 'nope'}).status_code == 400
+    cursor = encode_cursor(NOON, 1, 1)
+    assert client.get('/messages/search', params={'keyword': 'x', 'cursor': cursor}).status_code == 400
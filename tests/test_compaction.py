@@ -0,0 +1,58 @@
+import os
+from datetime import date, datetime, timezone
+
+from src.compaction import compact_month, compactable_months
+from src.datalake import iter_partition_messages, partition_image_paths, refresh_lake_index, write_channel_messages_json
+from src.records import TelegramMessage
+
+
+def _message(message_id, posted, image_path=None):
+    return TelegramMessage(
+        message_id=message_id,
+        channel_name='chan',
+        message_date=posted,
+        has_media=image_path is not None,
+        image_path=image_path,
+    )
+
+
+def test_compacted_partition_keeps_its_messages(tmp_path):
+    base_path = str(tmp_path)
+    image_path = str(tmp_path / 'chan_2.jpg')
+    open(image_path, 'wb').close()
+    # A scrape on 2026-03-02 also picked up a message posted the day before
+    write_channel_messages_json(base_path=base_path, date_str='2026-03-01', channel_name='chan', messages=[
+        _message(1, datetime(2026, 3, 1, 9, tzinfo=timezone.utc)),
+    ])
+    write_channel_messages_json(base_path=base_path, date_str='2026-03-02', channel_name='chan', messages=[
+        _message(2, datetime(2026, 3, 1, 23, tzinfo=timezone.utc), image_path),
+        _message(3, datetime(2026, 3, 2, 8, tzinfo=timezone.utc)),
+    ])
+
+    months = compactable_months(base_path, keep_days=7, today=date(2026, 5, 1))
+    assert months == {'2026-03': ['2026-03-01', '2026-03-02']}
+    compact_month(base_path, '2026-03', months['2026-03'])
+    refresh_lake_index(base_path)
+
+    loaded = {
+        partition: sorted(msg.message_id for _, messages in iter_partition_messages(base_path, partition) for msg in messages)
+        for partition in ('2026-03-01', '2026-03-02')
+    }
+    assert loaded == {'2026-03-01': [1], '2026-03-02': [2, 3]}
+    assert partition_image_paths(base_path, '2026-03-02') == [(image_path, 'chan')]
+    assert not os.listdir(tmp_path / 'raw' / 'telegram_messages' / '2026-03-02')
+
+
+def test_files_with_invalid_messages_stay_daily(tmp_path):
+    base_path = str(tmp_path)
+    good = write_channel_messages_json(base_path=base_path, date_str='2026-03-01', channel_name='chan', messages=[
+        _message(1, datetime(2026, 3, 1, 9, tzinfo=timezone.utc)),
+    ])
+    bad = os.path.join(os.path.dirname(good), 'other.json')
+    with open(bad, 'w', encoding='utf-8') as f:
+        f.write('[{"message_id": "x", "channel_name": "other", "message_date": "2026-03-01T10:00:00"}]')
+
+    summary = compact_month(base_path, '2026-03', ['2026-03-01'])
+    assert summary['skipped_files'] == 1
+    assert not os.path.exists(good)
+    assert os.path.exists(bad)
@@ -0,0 +1,100 @@
+import json
+import subprocess
+
+import pytest
+from dagster import build_asset_context
+
+from orchestration import assets
+
+WATERMARKS = {
+    "raw.telegram_messages": "2026-03-01T12:00:00/100",
+    "raw.yolo_detections": "2026-03-01T11:00:00/40",
+    "raw.product_mentions": None,
+    "raw.product_mention_extractions": None,
+}
+
+
+@pytest.fixture
+def dbt(tmp_path, monkeypatch):
+    """Point dbt_transform at a scratch project and record the dbt commands it runs."""
+    state_dir = tmp_path / "medical_warehouse" / ".dbt_state"
+    monkeypatch.setattr(assets, "project_root", tmp_path)
+    monkeypatch.setattr(assets, "DBT_STATE_DIR", state_dir)
+    monkeypatch.setenv("DBT_FULL_REFRESH", "0")
+
+    calls = []
+    modified = []
+
+    def run_dbt(context, args, dbt_project_dir, timeout):
+        calls.append(args)
+        stdout = ""
+        if args[0] == "ls":
+            stdout = "\n".join(modified)
+        if args[0] == "run":
+            (dbt_project_dir / "target").mkdir(parents=True, exist_ok=True)
+            (dbt_project_dir / "target" / "manifest.json").write_text("{}")
+        return subprocess.CompletedProcess(["dbt", *args], 0, stdout=stdout, stderr="")
+
+    monkeypatch.setattr(assets, "_run_dbt", run_dbt)
+
+    def previous_build(watermarks):
+        state_dir.mkdir(parents=True, exist_ok=True)
+        (state_dir / "manifest.json").write_text("{}")
+        (state_dir / "raw_watermarks.json").write_text(json.dumps(watermarks))
+
+    def transform(watermarks):
+        monkeypatch.setattr(assets, "_raw_watermarks", lambda: watermarks)
+        calls.clear()
+        return assets.dbt_transform(build_asset_context()).value
+
+    yield transform, previous_build, calls, modified, state_dir
+
+
+def test_first_build_runs_everything(dbt):
+    transform, _, calls, _, state_dir = dbt
+
+    result = transform(WATERMARKS)
+    assert result["mode"] == "full"
+    assert calls == [["run"], ["test"]]
+    assert json.loads((state_dir / "raw_watermarks.json").read_text()) == WATERMARKS
+    assert (state_dir / "manifest.json").exists()
+
+
+def test_skips_when_no_watermark_moved_and_no_model_changed(dbt):
+    transform, previous_build, calls, _, _ = dbt
+    previous_build(WATERMARKS)
+
+    result = transform(dict(WATERMARKS))
+    assert result["status"] == "skipped"
+    assert [args[0] for args in calls] == ["ls"]
+
+
+def test_selects_models_downstream_of_moved_watermarks(dbt):
+    transform, previous_build, calls, _, state_dir = dbt
+    previous_build(WATERMARKS)
+
+    # A late commit behind the latest ingested_at only moves the write count
+    moved = {**WATERMARKS, "raw.telegram_messages": "2026-03-01T12:00:00/180"}
+    result = transform(moved)
+    assert result["mode"] == "selective"
+    assert result["selected"] == ["stg_telegram_messages+"]
+    assert calls[1] == ["run", "--select", "stg_telegram_messages+", "--state", str(state_dir)]
+    assert json.loads((state_dir / "raw_watermarks.json").read_text()) == moved
+
+
+def test_selects_modified_models_without_new_data(dbt):
+    transform, previous_build, calls, modified, _ = dbt
+    previous_build(WATERMARKS)
+    modified.append("fct_messages")
+
+    result = transform(dict(WATERMARKS))
+    assert result["selected"] == ["state:modified+"]
+
+
+def test_full_refresh_ignores_saved_state(dbt, monkeypatch):
+    transform, previous_build, calls, _, _ = dbt
+    previous_build(WATERMARKS)
+    monkeypatch.setenv("DBT_FULL_REFRESH", "1")
+
+    assert transform(dict(WATERMARKS))["mode"] == "full"
+    assert calls[0] == ["run", "--full-refresh"]
@@ -0,0 +1,61 @@
+from src.detection_worker import claim_jobs, connect_queue, enqueue_images, finish_job, recover_jobs, unfinished_jobs
+
+
+def _status(conn, image_path):
+    return conn.execute(
+        "SELECT status, attempts FROM detection_jobs WHERE image_path = ?", (image_path,)
+    ).fetchone()
+
+
+def test_enqueue_ignores_known_images(tmp_path):
+    db_path = str(tmp_path / 'queue.sqlite')
+
+    assert enqueue_images([('a.jpg', 'ch'), ('b.jpg', 'ch')], db_path=db_path) == 2
+    assert enqueue_images([('a.jpg', 'ch'), ('c.jpg', 'ch')], db_path=db_path) == 1
+
+
+def test_failed_jobs_are_retried_until_max_attempts(tmp_path):
+    db_path = str(tmp_path / 'queue.sqlite')
+    enqueue_images([('a.jpg', 'ch')], db_path=db_path)
+    conn = connect_queue(db_path)
+
+    for attempt in (1, 2):
+        assert claim_jobs(conn, 10) == [('a.jpg', 'ch')]
+        finish_job(conn, 'a.jpg', error='boom', max_attempts=3)
+        assert _status(conn, 'a.jpg') == ('pending', attempt)
+
+    assert claim_jobs(conn, 10) == [('a.jpg', 'ch')]
+    finish_job(conn, 'a.jpg', error='boom', max_attempts=3)
+    assert _status(conn, 'a.jpg') == ('failed', 3)
+    assert claim_jobs(conn, 10) == []
+
+
+def test_recover_jobs_requeues_or_fails_abandoned_jobs(tmp_path):
+    db_path = str(tmp_path / 'queue.sqlite')
+    enqueue_images([('fresh.jpg', 'ch'), ('stuck.jpg', 'ch'), ('spent.jpg', 'ch')], db_path=db_path)
+    conn = connect_queue(db_path)
+    with conn:
+        conn.execute("UPDATE detection_jobs SET status = 'running', attempts = 1 WHERE image_path = 'fresh.jpg'")
+        conn.execute("UPDATE detection_jobs SET status = 'running', attempts = 3 WHERE image_path = 'stuck.jpg'")
+        conn.execute("UPDATE detection_jobs SET status = 'failed', attempts = 1 WHERE image_path = 'spent.jpg'")
+
+    recover_jobs(conn, max_attempts=3)
+
+    assert _status(conn, 'fresh.jpg') == ('pending', 1)
+    assert _status(conn, 'stuck.jpg') == ('failed', 3)
+    assert _status(conn, 'spent.jpg') == ('pending', 1)
+
+
+def test_unfinished_jobs_counts_pending_and_running(tmp_path):
+    db_path = str(tmp_path / 'queue.sqlite')
+    enqueue_images([('a.jpg', 'ch'), ('b.jpg', 'ch'), ('c.jpg', 'ch')], db_path=db_path)
+    conn = connect_queue(db_path)
+    claim_jobs(conn, 1)
+    finish_job(conn, 'a.jpg')
+
+    assert unfinished_jobs(['a.jpg', 'b.jpg', 'c.jpg', 'other.jpg'], db_path=db_path) == 2
+    claim_jobs(conn, 2)
+    assert unfinished_jobs(['b.jpg', 'c.jpg'], db_path=db_path) == 2
+    finish_job(conn, 'b.jpg')
+    finish_job(conn, 'c.jpg')
+    assert unfinished_jobs(['b.jpg', 'c.jpg'], db_path=db_path) == 0
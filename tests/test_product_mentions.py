@@ -0,0 +1,38 @@
+from datetime import datetime
+
+import pandas as pd
+
+from src.product_mentions import extract_mentions
+
+
+def _messages(*texts):
+    return pd.DataFrame({
+        'channel_name': ['tikvahpharma'] * len(texts),
+        'message_id': range(1, len(texts) + 1),
+        'message_date': [datetime(2026, 1, 15)] * len(texts),
+        'message_text': list(texts),
+        'ingested_at': [datetime(2026, 1, 16)] * len(texts),
+    })
+
+
+def test_amharic_punctuation_does_not_hide_mentions():
+    mentions = extract_mentions(_messages('ፓራሲታሞል፣ ቫይታሚን። ዋጋ 200 ብር'))
+
+    assert sorted(mentions['product_name']) == ['paracetamol', 'vitamin']
+    assert set(mentions['matched_token']) == {'ፓራሲታሞል', 'ቫይታሚን'}
+    assert set(mentions['script']) == {'ethiopic'}
+    assert mentions['price_birr'].tolist() == [200, 200]
+
+
+def test_latin_mentions_and_price():
+    mentions = extract_mentions(_messages('Panadol and Amoxil, 350 birr'))
+
+    assert sorted(mentions['product_name']) == ['amoxicillin', 'paracetamol']
+    assert set(mentions['script']) == {'latin'}
+    assert mentions['price_birr'].tolist() == [350, 350]
+
+
+def test_one_row_per_message_and_product():
+    mentions = extract_mentions(_messages('panadol paracetamol ፓራሲታሞል።', 'no products here'))
+
+    assert mentions[['message_id', 'product_name']].values.tolist() == [[1, 'paracetamol']]
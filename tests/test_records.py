@@ -0,0 +1,67 @@
+import json
+from datetime import datetime, timezone
+
+import msgspec
+import pytest
+
+from src.records import raw_message_row, read_messages_file, write_messages_file
+
+# Rows as the scrapers wrote them with json.dump before the records were typed
+BASELINE_ROWS = [
+    {
+        'message_id': 101,
+        'channel_name': 'lobelia4cosmetics',
+        'message_date': '2026-01-15T08:30:00+00:00',
+        'message_text': 'ፓራሲታሞል 200 ብር',
+        'has_media': True,
+        'image_path': 'data/raw/images/lobelia4cosmetics/101.jpg',
+        'views': 1532,
+        'forwards': None,
+    },
+    {
+        'message_id': 102,
+        'channel_name': 'lobelia4cosmetics',
+        'channel_title': 'Lobelia Cosmetics',
+        'message_date': '2026-01-15T09:00:00',
+        'message_text': '',
+        'has_media': False,
+        'image_path': None,
+        'views': 0,
+        'forwards': 0,
+    },
+]
+
+
+def _write_json(path, rows):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(rows, f, ensure_ascii=False, indent=4)
+
+
+def test_baseline_file_round_trips(tmp_path):
+    baseline = tmp_path / 'baseline.json'
+    _write_json(baseline, BASELINE_ROWS)
+
+    messages = read_messages_file(str(baseline))
+    assert messages[0].message_date == datetime(2026, 1, 15, 8, 30, tzinfo=timezone.utc)
+    # Naive timestamps stay naive rather than being assumed UTC
+    assert messages[1].message_date == datetime(2026, 1, 15, 9, 0)
+    assert messages[1].channel_title == 'Lobelia Cosmetics'
+
+    rewritten = tmp_path / 'rewritten.json'
+    write_messages_file(str(rewritten), messages)
+    assert read_messages_file(str(rewritten)) == messages
+
+    for row, message in zip(BASELINE_ROWS, messages):
+        loaded = raw_message_row(message)
+        loaded['message_date'] = loaded['message_date'].isoformat()
+        assert loaded == {column: row[column] for column in loaded}
+
+
+def test_invalid_rows_are_skipped(tmp_path, caplog):
+    path = tmp_path / 'channel.json'
+    _write_json(path, BASELINE_ROWS + [dict(BASELINE_ROWS[0], message_id=103, views='1.2K')])
+
+    assert [msg.message_id for msg in read_messages_file(str(path))] == [101, 102]
+    assert '$.views' in caplog.text
+    with pytest.raises(msgspec.ValidationError):
+        read_messages_file(str(path), strict=True)
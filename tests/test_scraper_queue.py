@@ -0,0 +1,21 @@
+import asyncio
+
+import src.scraper
+from src.detection_worker import connect_queue, queue_db_path
+from src.replay_client import ReplayTelegramClient
+from src.scraper import TelegramScraper
+
+
+def test_scraper_enqueues_into_its_own_lake(tmp_path, monkeypatch):
+    monkeypatch.setattr(src.scraper, 'QUEUE_ENABLED', True)
+    client = ReplayTelegramClient.synthetic(channels=1, messages_per_channel=20, photo_ratio=1.0, photo_kb=(1, 1))
+    scraper = TelegramScraper(
+        None, None, 'replay',
+        base_path=str(tmp_path),
+        client=client,
+        channels=[f"https://t.me/{name}" for name in client.channel_names],
+    )
+    asyncio.run(scraper.run())
+
+    conn = connect_queue(queue_db_path(str(tmp_path)))
+    assert conn.execute("SELECT count(*) FROM detection_jobs").fetchone()[0] == 20
@@ -0,0 +1,92 @@
+import os
+import time
+from datetime import datetime
+
+import pytest
+from dagster import RunRequest, SkipReason, build_sensor_context
+
+from orchestration import sensors
+from src.datalake import manifest_path, write_channel_messages_json
+from src.records import TelegramMessage
+
+PARTITION = "2026-03-01"
+
+
+@pytest.fixture
+def lake(tmp_path, monkeypatch):
+    monkeypatch.setattr(sensors, "project_root", tmp_path)
+    monkeypatch.setattr(sensors, "RAW_DIR", tmp_path / "data" / "raw")
+    monkeypatch.setattr(sensors, "DEBOUNCE_SECONDS", 120)
+    return tmp_path
+
+
+def _age(path, seconds):
+    stamp = time.time() - seconds
+    os.utime(path, (stamp, stamp))
+
+
+def _write_manifest(lake, age):
+    path = manifest_path(str(lake / "data"), PARTITION)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("{}")
+    _age(path, age)
+    return path
+
+
+def _evaluate(cursor=None):
+    context = build_sensor_context(cursor=cursor)
+    return sensors.raw_data_sensor(context), context.cursor
+
+
+def test_holds_off_during_debounce_then_fires_once(lake):
+    manifest = _write_manifest(lake, age=10)
+
+    result, cursor = _evaluate()
+    assert isinstance(result, SkipReason) and "settle" in result.skip_message
+    assert cursor is None
+
+    _age(manifest, 300)
+    result, cursor = _evaluate(cursor)
+    assert [request.partition_key for request in result] == [PARTITION]
+    assert set(result[0].asset_selection) == {asset.key for asset in sensors.MANIFEST_ASSETS}
+
+    result, _ = _evaluate(cursor)
+    assert isinstance(result, SkipReason) and result.skip_message == "No new manifests or images"
+
+
+def test_rewritten_manifest_fires_again(lake):
+    manifest = _write_manifest(lake, age=600)
+    first, cursor = _evaluate()
+
+    _age(manifest, 300)
+    second, _ = _evaluate(cursor)
+    assert len(second) == 1
+    assert second[0].run_key != first[0].run_key
+
+
+def test_new_images_only_redetect_their_partition(lake):
+    image = lake / "data" / "raw" / "images" / "chan" / "7.jpg"
+    image.parent.mkdir(parents=True)
+    image.write_bytes(b"jpg")
+    _age(image, 400)
+    channel_file = write_channel_messages_json(
+        base_path=str(lake / "data"),
+        date_str=PARTITION,
+        channel_name="chan",
+        messages=[TelegramMessage(
+            message_id=7,
+            channel_name="chan",
+            message_date=datetime(2026, 3, 1, 9),
+            has_media=True,
+            image_path="data/raw/images/chan/7.jpg",
+        )],
+    )
+    _age(channel_file, 300)
+
+    result, cursor = _evaluate()
+    assert all(isinstance(request, RunRequest) for request in result)
+    assert [request.partition_key for request in result] == [PARTITION]
+    assert set(result[0].asset_selection) == {asset.key for asset in sensors.IMAGE_ASSETS}
+
+    result, _ = _evaluate(cursor)
+    assert isinstance(result, SkipReason)